@@ -1,35 +1,98 @@
 # app.py
 import os
-import logging
-from flask import Flask, send_from_directory, current_app
+import importlib
+import importlib.util
+import click
+from flask import Flask
 from flask_cors import CORS
-from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 
 from extensions import db
-from config import Config
-
-# Blueprints
-from routes.categories import categories_bp
-from routes.cv import cv_bp
-from routes.messages import messages_bp
-from routes.auth import auth_bp
-from routes.socials import socials_bp
-from routes.contact import contact_bp
-
-# Modelos
-from models import User, Category, Message, CV, ProjectImage, ProjectVideo
+from config import database_engine_options, get_config
+from compression import init_compression
+from storage import init_storage, get_storage
+from warmup import init_warmup, is_ready, start_warm_up
+from content_version import init_content_version
+from request_log import init_logging
+
+# Blueprints: (módulo, atributo, prefijo). Se importan dentro de create_app,
+# no al importar app.py.
+BLUEPRINTS = (
+    ("routes.categories", "categories_bp", "/api/categories"),
+    ("routes.cv",         "cv_bp",         "/api/cv"),
+    ("routes.messages",   "messages_bp",   "/api/messages"),
+    ("routes.auth",       "auth_bp",       "/api/auth"),
+    ("routes.socials",    "socials_bp",    "/api/socials"),
+    ("routes.contact",    "contact_bp",    "/api/contact"),
+    ("routes.site",       "site_bp",       "/api/site"),
+    ("routes.search",     "search_bp",     "/api/search"),
+    ("routes.portfolio",  "portfolio_bp",  "/api/portfolio"),
+)
+
+# Dependencias de requirements.txt que se importan tarde (con la primera
+# petición que las usa): (módulo, ¿hace falta con esta config?, qué se pierde)
+OPTIONAL_DEPENDENCIES = (
+    ("PIL", lambda cfg: True, "las imágenes se guardan sin placeholder ni dominant_color"),
+    ("brotli", lambda cfg: cfg.get("COMPRESS_ENABLED", True), "no se negocia br, solo gzip"),
+    ("boto3", lambda cfg: (cfg.get("STORAGE_BACKEND") or "local").lower() == "s3",
+     "STORAGE_BACKEND=s3 no puede arrancar"),
+)
+
+def check_optional_dependencies(app):
+    """Avisa al arrancar; find_spec no importa el módulo (no cuesta arranque)."""
+    for module, needed, effect in OPTIONAL_DEPENDENCIES:
+        if needed(app.config) and importlib.util.find_spec(module) is None:
+            app.logger.warning("%s no está instalado: %s (pip install -r requirements.txt)", module, effect)
+
+def init_migrate_for_cli(app):
+    """Flask-Migrate arrastra alembic (~0.2 s de import). Solo lo registramos
+    cuando la app la carga la CLI de Flask (`flask db ...`, `flask shell`),
+    que es cuando hay un contexto de click activo; gunicorn no lo necesita."""
+    if click.get_current_context(silent=True) is None:
+        return
+    from flask_migrate import Migrate
+    Migrate(app, db)
 
-logging.basicConfig()
-logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+def init_cli_commands(app):
+    """Comandos de mantenimiento (flask uploads-gc, search-rebuild...). Sus
+    módulos arrastran models y click; como Migrate, solo se importan cuando
+    la app la carga la CLI de Flask."""
+    if click.get_current_context(silent=True) is None:
+        return
+    from uploads_gc import uploads_gc_command
+    from search_index import search_rebuild_command
+    from faststart import video_faststart_command
+    from file_deletions import file_deletions_command
+    from media_sizes import media_sizes_command
+    from portfolio_archive import portfolio_export_command, portfolio_import_command
+    from token_revocation import revoke_tokens_command
+
+    for command in (uploads_gc_command, search_rebuild_command, video_faststart_command,
+                    file_deletions_command, media_sizes_command, portfolio_export_command,
+                    portfolio_import_command, revoke_tokens_command):
+        app.cli.add_command(command)
 
 def create_app():
+    # Necesarios en cada petición, pero importan models: no al importar app.py
+    from file_deletions import init_file_deletions
+    from token_revocation import init_token_revocation
+
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(get_config())
+    # Pool, pre-ping y timeouts si la BD es de servidor (DATABASE_URL)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS",
+                          database_engine_options(app.config["SQLALCHEMY_DATABASE_URI"]))
+    init_logging(app)
+    check_optional_dependencies(app)
 
     db.init_app(app)
-    Migrate(app, db)
+    init_migrate_for_cli(app)
     JWTManager(app)
+    init_token_revocation(app)
+    init_storage(app)
+    init_warmup(app)
+    init_content_version(app)
+    init_file_deletions(app)
 
 # === CORS ===
     # Acepta cualquier subdominio de Vercel (previews/prod) y localhost
@@ -51,6 +114,7 @@ def create_app():
         )
 
     allowed_origins = sorted(default_allowed_origins)
+    app.config["CORS_ALLOWED_ORIGINS"] = allowed_origins  # lo reutiliza asgi.py
 
     CORS(
         app,
@@ -75,27 +139,36 @@ def create_app():
             },
         },
         supports_credentials=True,
-        expose_headers=["Content-Type"],
+        expose_headers=["Content-Type", "X-Request-ID"],
         always_send=True,
     )
 
+    # === Compresión (gzip/brotli) ===
+    init_compression(app)
+
     # === Blueprints ===
-    app.register_blueprint(categories_bp, url_prefix="/api/categories")
-    app.register_blueprint(cv_bp, url_prefix="/api/cv")
-    app.register_blueprint(messages_bp, url_prefix="/api/messages")
-    app.register_blueprint(auth_bp, url_prefix="/api/auth")
-    app.register_blueprint(socials_bp, url_prefix="/api/socials")
-    app.register_blueprint(contact_bp, url_prefix="/api/contact")
-
-    # Servir subidas
+    for module_name, attr, prefix in BLUEPRINTS:
+        bp = getattr(importlib.import_module(module_name), attr)
+        app.register_blueprint(bp, url_prefix=prefix)
+
+    # Servir subidas (disco local o redirección al bucket)
     @app.route("/uploads/<path:filename>")
     def serve_uploads(filename):
-        return send_from_directory(current_app.config["UPLOADS_DIR"], filename)
+        return get_storage().serve(filename)
 
     @app.get("/api/ping")
     def ping():
         return {"pong": True}, 200
 
+    @app.get("/api/ready")
+    def ready():
+        state = app.extensions["warmup"]
+        if is_ready(app):
+            return {"ready": True, "warmup_seconds": state["seconds"]}, 200
+        if state["status"] == "failed":
+            start_warm_up(app)  # reintenta en segundo plano
+        return {"ready": False, "status": state["status"]}, 503
+
     @app.get("/")
     def index():
         return {"message": "Backend portfolio listo"}, 200
@@ -108,14 +181,11 @@ def create_app():
     def internal_error(error):
         return {"error": "Error interno del servidor"}, 500
 
-    if not app.debug:
-        from logging.handlers import RotatingFileHandler
-        handler = RotatingFileHandler("error.log", maxBytes=10000, backupCount=3)
-        handler.setLevel(logging.ERROR)
-        app.logger.addHandler(handler)
+    init_cli_commands(app)
 
     @app.shell_context_processor
     def make_shell_context():
+        from models import User, Category, Message, CV, ProjectImage, ProjectVideo
         return {
             "app": app,
             "db": db,
@@ -129,8 +199,20 @@ def create_app():
 
     return app
 
-app = create_app()
+def __getattr__(name):
+    # `gunicorn app:app`, `from app import app`, `flask --app app`: la app se
+    # crea al pedirla por primera vez, nunca por el mero `import app`.
+    # Procfile/gunicorn.conf.py usan directamente la factoría (app:create_app()).
+    if name == "app":
+        globals()["app"] = instance = create_app()
+        return instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
+    app = create_app()
     port = int(os.environ.get("PORT", 5000))
-    app.run(debug=True, host="0.0.0.0", port=port)
+    start_warm_up(app, background=False)
+    # Debug solo con APP_ENV=development, y entonces solo en local: el
+    # depurador de Werkzeug permite ejecutar código
+    host = os.environ.get("HOST", "127.0.0.1" if app.debug else "0.0.0.0")
+    app.run(debug=app.debug, host=host, port=port)
@@ -0,0 +1,163 @@
+# asgi.py
+"""
+Modo de servicio asíncrono (ASGI) sobre la misma app de create_app() que usa app.py.
+
+    Sync  (como siempre):  gunicorn "app:create_app()"
+    Async:                 uvicorn asgi:app --workers 2
+                           gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+
+- GET/HEAD /uploads/* con storage local se sirve de forma nativa en el event
+  loop: lecturas de disco por trozos en hilos y envío con await, con Range,
+  ETag y 304. Un cliente lento ya no retiene un worker ni un hilo. No pasa
+  por Flask, así que X-Request-ID y el registro de acceso (request_log.py)
+  se ponen aquí; la latencia incluye el envío del cuerpo.
+- Todo lo demás (lecturas públicas, admin, /api/messages con su SMTP) pasa por
+  WsgiToAsgi: cada petición ocupa un hilo del pool mientras dura, no un
+  proceso entero, así que esperas de red o SMTP no bloquean a los demás.
+"""
+import asyncio
+import mimetypes
+import os
+import time
+from email.utils import formatdate
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.http import parse_etags, parse_range_header
+from werkzeug.security import safe_join
+
+from app import create_app
+from request_log import log_access, request_id_from
+from storage import LocalStorage, is_hidden_key
+from warmup import start_warm_up
+
+CHUNK_SIZE = 256 * 1024
+UPLOADS_ROUTE = "/uploads/<path:filename>"  # la de app.py, para el log de acceso
+
+
+class AsyncUploadsApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.origins = set(flask_app.config.get("CORS_ALLOWED_ORIGINS") or ())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+
+        if (
+            scope["type"] == "http"
+            and scope["method"] in ("GET", "HEAD")
+            and scope["path"].startswith("/uploads/")
+        ):
+            storage = self.flask_app.extensions["storage"]
+            key = scope["path"][len("/uploads/"):]
+            if isinstance(storage, LocalStorage) and not is_hidden_key(key):
+                full = safe_join(storage.root, key)
+                if full and os.path.isfile(full):
+                    return await self._serve_logged(scope, send, full)
+
+        # Resto (y 404 / backends remotos): la app Flask de siempre
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                start_warm_up(self.flask_app)  # en segundo plano; ver /api/ready
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _serve_logged(self, scope, send, full):
+        """_serve_file con X-Request-ID y registro de acceso, como en Flask."""
+        started = time.perf_counter()
+        incoming = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")
+        request_id = request_id_from(incoming)
+        status = None
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"].append((b"x-request-id", request_id.encode()))
+            await send(message)
+
+        try:
+            await self._serve_file(scope, send_with_id, full)
+        finally:
+            log_access(self.flask_app.config, scope["method"], scope["path"], status or 500,
+                       (time.perf_counter() - started) * 1000, route=UPLOADS_ROUTE,
+                       request_id=request_id)
+
+    def _cors_headers(self, req_headers):
+        origin = req_headers.get(b"origin", b"").decode("latin-1")
+        if origin not in self.origins:
+            return []
+        return [
+            (b"access-control-allow-origin", origin.encode("latin-1")),
+            (b"access-control-allow-credentials", b"true"),
+            (b"access-control-expose-headers", b"Content-Type, X-Request-ID"),
+            (b"vary", b"Origin"),
+        ]
+
+    async def _serve_file(self, scope, send, full):
+        req_headers = dict(scope["headers"])
+        st = await asyncio.to_thread(os.stat, full)
+        size = st.st_size
+        etag = f"{st.st_mtime_ns:x}-{size:x}"
+
+        headers = [
+            (b"accept-ranges", b"bytes"),
+            (b"etag", f'"{etag}"'.encode()),
+            (b"last-modified", formatdate(st.st_mtime, usegmt=True).encode()),
+            (b"cache-control", b"no-cache"),
+        ] + self._cors_headers(req_headers)
+
+        if_none_match = req_headers.get(b"if-none-match")
+        if if_none_match and parse_etags(if_none_match.decode("latin-1")).contains_weak(etag):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        status, start, stop = 200, 0, size
+        range_header = req_headers.get(b"range")
+        if range_header:
+            rng = parse_range_header(range_header.decode("latin-1"))
+            span = rng.range_for_length(size) if rng else None
+            if span is None:
+                headers.append((b"content-range", f"bytes */{size}".encode()))
+                await send({"type": "http.response.start", "status": 416, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            status, (start, stop) = 206, span
+            headers.append((b"content-range", f"bytes {start}-{stop - 1}/{size}".encode()))
+
+        ctype = mimetypes.guess_type(full)[0] or "application/octet-stream"
+        headers += [
+            (b"content-type", ctype.encode()),
+            (b"content-length", str(stop - start).encode()),
+        ]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        fh = await asyncio.to_thread(open, full, "rb")
+        try:
+            await asyncio.to_thread(fh.seek, start)
+            remaining = stop - start
+            while remaining > 0:
+                chunk = await asyncio.to_thread(fh.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            await asyncio.to_thread(fh.close)
+
+
+app = AsyncUploadsApp(create_app())
@@ -0,0 +1,80 @@
+# benchmarks/cold_start.py
+"""
+Mide el arranque en frío como lo ve un host con scale-to-zero: cada muestra es
+un proceso Python nuevo que importa app.py y sirve la primera petición.
+
+    python benchmarks/cold_start.py --runs 10 --path /api/site
+    python benchmarks/cold_start.py --importtime 15   # módulos más lentos
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+client = app_module.create_app().test_client()
+t2 = time.perf_counter()
+resp = client.get(sys.argv[1])
+resp.get_data()
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_request": t3 - t2,
+                  "status": resp.status_code}))
+"""
+
+
+def sample(path):
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, path],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def importtime_top(n):
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT, capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = [p.strip() for p in line[len("import time:"):].split("|")]
+        rows.append((int(cumulative_us), int(self_us), name))
+    rows.sort(reverse=True)
+    return rows[:n]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--path", default="/api/site")
+    ap.add_argument("--importtime", type=int, default=0, help="lista los N imports más caros")
+    args = ap.parse_args()
+
+    sample(args.path)  # descarta la primera (caché de disco / .pyc)
+    samples = [sample(args.path) for _ in range(args.runs)]
+
+    for key in ("import", "create_app", "first_request"):
+        values = [s[key] * 1000 for s in samples]
+        print(f"{key:14} median {statistics.median(values):8.1f} ms   "
+              f"min {min(values):8.1f} ms   max {max(values):8.1f} ms")
+    total = [(s["import"] + s["create_app"] + s["first_request"]) * 1000 for s in samples]
+    print(f"{'total':14} median {statistics.median(total):8.1f} ms   (status {samples[-1]['status']})")
+
+    if args.importtime:
+        print("\ncumulative_us   self_us  module")
+        for cumulative, self_us, name in importtime_top(args.importtime):
+            print(f"{cumulative:>13} {self_us:>9}  {name}")
+
+
+if __name__ == "__main__":
+    main()
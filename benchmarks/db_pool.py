@@ -0,0 +1,165 @@
+# benchmarks/db_pool.py
+"""
+Comportamiento del pool de conexiones bajo carga concurrente, sin servidor de
+BD: un SQLite temporal hace de "servidor" y cada conexión nueva paga una
+latencia de conexión simulada (TCP + TLS + auth, --connect-ms), igual que cada
+consulta paga --query-ms (función sleep_ms registrada en SQLite). Los hilos
+emulan los de un worker gthread: sacan una conexión, hacen --queries
+consultas y la devuelven.
+
+Escenarios:
+  sin pool      NullPool: una conexión nueva por petición
+  pool corto    pool_size=2, max_overflow=0: los hilos esperan turno
+  configurado   pool_options() de config.py (DB_POOL_SIZE, DB_MAX_OVERFLOW...)
+  reinicio      a mitad de la carga, con el pool en reposo, mueren todas las
+                conexiones abiertas (reinicio/failover del servidor, idle
+                timeout de un proxy), con y sin pool_pre_ping
+
+    python benchmarks/db_pool.py --requests 400
+    python benchmarks/db_pool.py --threads 8   # más hilos que conexiones: esperas
+    DB_POOL_SIZE=8 python benchmarks/db_pool.py --connect-ms 40
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.pool import NullPool, QueuePool  # noqa: E402
+
+from config import pool_options  # noqa: E402
+
+
+class _Connection(sqlite3.Connection):
+    """Conexión que, tras un reinicio del 'servidor', falla como una cerrada."""
+
+    def _check(self):
+        if self.generation != self.server.generation:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+
+    def cursor(self, *args, **kwargs):
+        self._check()
+        return super().cursor(*args, **kwargs)
+
+    def rollback(self):
+        self._check()
+        return super().rollback()
+
+
+class StandIn:
+    """'Servidor' de BD: abre conexiones SQLite con retardo y puede 'reiniciarse'."""
+
+    def __init__(self, path, connect_ms, query_ms):
+        self.path = path
+        self.connect_s = connect_ms / 1000
+        self.query_s = query_ms / 1000
+        self.opened = 0
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def connect(self):
+        time.sleep(self.connect_s)
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, factory=_Connection)
+        conn.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000))
+        conn.server, conn.generation = self, self.generation
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def restart(self):
+        # Todas las conexiones abiertas hasta ahora quedan muertas
+        self.generation += 1
+
+
+def run_scenario(server, pool_kwargs, threads, requests, queries, restart=False):
+    engine = create_engine("sqlite://", creator=server.connect, **pool_kwargs)
+    query = text("SELECT sleep_ms(:ms)")
+    latencies, waits, errors = [], [], []
+    lock = threading.Lock()
+
+    def one_request(_):
+        t0 = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                waited = time.perf_counter() - t0
+                for _ in range(queries):
+                    conn.execute(query, {"ms": server.query_s * 1000})
+        except Exception as e:
+            with lock:
+                errors.append(type(e).__name__)
+            return
+        with lock:
+            latencies.append(time.perf_counter() - t0)
+            waits.append(waited)
+
+    opened_before = server.opened
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        if restart:
+            # Mitad de la carga, reinicio con el pool en reposo y la otra mitad
+            list(pool.map(one_request, range(requests // 2)))
+            server.restart()
+            list(pool.map(one_request, range(requests - requests // 2)))
+        else:
+            list(pool.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - t0
+    engine.dispose()
+
+    def pct(values, p):
+        if not values:
+            return float("nan")
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+    return {
+        "req/s": len(latencies) / elapsed,
+        "p50": pct(latencies, 0.50),
+        "p99": pct(latencies, 0.99),
+        "espera p99": pct(waits, 0.99),
+        "conexiones": server.opened - opened_before,
+        "errores": len(errors),
+        "tipos": sorted(set(errors)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=int(os.getenv("GUNICORN_THREADS", "4")),
+                    help="hilos concurrentes de un worker gthread")
+    ap.add_argument("--requests", type=int, default=400)
+    ap.add_argument("--queries", type=int, default=3, help="consultas por petición")
+    ap.add_argument("--connect-ms", type=float, default=20)
+    ap.add_argument("--query-ms", type=float, default=2)
+    args = ap.parse_args()
+
+    configured = pool_options()
+    scenarios = [
+        ("sin pool", {"poolclass": NullPool}, False),
+        ("pool corto", {"poolclass": QueuePool, "pool_size": 2, "max_overflow": 0, "pool_timeout": 30}, False),
+        ("configurado", {"poolclass": QueuePool, **configured}, False),
+        ("reinicio sin ping", {"poolclass": QueuePool, **configured, "pool_pre_ping": False}, True),
+        ("reinicio con ping", {"poolclass": QueuePool, **configured}, True),
+    ]
+
+    with tempfile.TemporaryDirectory() as root:
+        server = StandIn(os.path.join(root, "standin.db"), args.connect_ms, args.query_ms)
+        print(f"{args.threads} hilos, {args.requests} peticiones x {args.queries} consultas; "
+              f"conexión {args.connect_ms:g} ms, consulta {args.query_ms:g} ms")
+        print(f"configurado: pool_size={configured['pool_size']} max_overflow={configured['max_overflow']} "
+              f"pool_recycle={configured['pool_recycle']} pre_ping={configured['pool_pre_ping']}")
+        print(f"{'':18} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'espera p99':>11} {'conexiones':>11} {'errores':>8}")
+        for label, kwargs, restart in scenarios:
+            r = run_scenario(server, kwargs, args.threads, args.requests, args.queries, restart)
+            print(f"{label:18} {r['req/s']:>8.0f} {r['p50']:>8.1f} {r['p99']:>8.1f} {r['espera p99']:>11.1f} "
+                  f"{r['conexiones']:>11} {r['errores']:>8}" + (f"  {', '.join(r['tipos'])}" if r["tipos"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# benchmarks/faststart_ttff.py
+"""
+Tiempo hasta el primer frame (TTFF) de un MP4 servido por /uploads, antes y
+después de faststart.
+
+Se emula lo que hace un navegador con Range: lee desde el byte 0 hasta dar con
+`moov`; si antes aparece `mdat`, corta y pide el final del archivo. Con `moov`
+ya leído pide el primer chunk. Las peticiones pasan de verdad por la app
+(206 + bytes servidos) y el TTFF se calcula para varios perfiles de red como
+peticiones * RTT + bytes / ancho de banda. También mide la propia reescritura
+(MB/s y memoria máxima con tracemalloc) y comprueba que cada offset de chunk
+sigue apuntando a los mismos bytes tras la reescritura.
+
+    python benchmarks/faststart_ttff.py --size-mb 64
+    python benchmarks/faststart_ttff.py --largesize   # moov con cabecera de 64 bits
+    python benchmarks/faststart_ttff.py --file render.mp4
+"""
+import argparse
+import os
+import shutil
+import struct
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BENCH_REL = "bench/faststart.mp4"
+PROFILES = {  # nombre: (RTT en s, bytes/s)
+    "3g": (0.150, 1.5e6 / 8),
+    "4g": (0.060, 12e6 / 8),
+    "cable": (0.020, 100e6 / 8),
+}
+
+
+def _box(box_type, payload):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def synthetic_mp4(path, size_mb, chunks=500, largesize=False):
+    """ftyp + mdat + moov (moov al final, como muchos exportadores).
+       largesize=True: moov con cabecera de 64 bits (size=1 + tamaño en 8 bytes)."""
+    ftyp = _box(b"ftyp", b"isom\0\0\2\0isomiso2avc1mp41")
+    mdat_len = size_mb * 1024 * 1024
+    step = mdat_len // chunks
+    offsets = [len(ftyp) + 8 + i * step for i in range(chunks)]
+
+    def full(box_type, payload):
+        return _box(box_type, b"\0\0\0\0" + payload)
+
+    stsd = full(b"stsd", struct.pack(">I", 1) + _box(b"avc1", b"\0" * 6 + b"\0\1" + b"\0" * 16
+                                                     + struct.pack(">HH", 1920, 1080) + b"\0" * 50))
+    stco = full(b"stco", struct.pack(">I", chunks) + b"".join(struct.pack(">I", o) for o in offsets))
+    tkhd = full(b"tkhd", b"\0" * 20 + b"\0" * 16 + struct.pack(">9i", 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+                + struct.pack(">II", 1920 << 16, 1080 << 16))
+    mdhd = full(b"mdhd", struct.pack(">IIII", 0, 0, 90000, 90000 * 60) + b"\0" * 4)
+    hdlr = full(b"hdlr", b"\0\0\0\0vide" + b"\0" * 12 + b"video\0")
+    mvhd = full(b"mvhd", struct.pack(">IIII", 0, 0, 1000, 60000) + b"\0" * 80)
+    # tablas de muestras de relleno para que moov tenga un tamaño realista
+    stsz = full(b"stsz", struct.pack(">II", 0, chunks * 30) + os.urandom(chunks * 30 * 4))
+    stbl = _box(b"stbl", stsd + stsz + stco)
+    moov_payload = mvhd + _box(b"trak", tkhd + _box(b"mdia", mdhd + hdlr + _box(b"minf", stbl)))
+    if largesize:
+        moov = struct.pack(">I4sQ", 1, b"moov", 16 + len(moov_payload)) + moov_payload
+    else:
+        moov = _box(b"moov", moov_payload)
+
+    with open(path, "wb") as fh:
+        fh.write(ftyp)
+        fh.write(struct.pack(">I4s", 8 + mdat_len, b"mdat"))
+        block = os.urandom(1024 * 1024)
+        for _ in range(size_mb):
+            fh.write(block)
+        fh.write(moov)
+
+
+def _boxes(data_at, size):
+    """Cabeceras de primer nivel leyendo solo 16 bytes por caja."""
+    pos, out = 0, []
+    while size - pos >= 8:
+        head = data_at(pos, 16)
+        box_size, box_type = struct.unpack(">I4s", head[:8])
+        if box_size == 1:
+            box_size = struct.unpack(">Q", head[8:16])[0]
+        elif box_size == 0:
+            box_size = size - pos
+        out.append((box_type, pos, pos + box_size))
+        pos += box_size
+    return out
+
+
+def _first_chunk(moov):
+    for tag, fmt, width in ((b"stco", ">I", 4), (b"co64", ">Q", 8)):
+        i = moov.find(tag)
+        if i >= 0:
+            count = struct.unpack_from(">I", moov, i + 8)[0]
+            first = struct.unpack_from(fmt, moov, i + 12)[0]
+            second = struct.unpack_from(fmt, moov, i + 12 + width)[0] if count > 1 else first + 256 * 1024
+            return first, second
+    raise RuntimeError("sin tabla de chunks")
+
+
+def chunk_samples(path, n=32):
+    """16 bytes en cada uno de los primeros `n` offsets de la tabla de chunks."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as fh:
+        def data_at(pos, length):
+            fh.seek(pos)
+            return fh.read(length)
+
+        moov = next(b for b in _boxes(data_at, size) if b[0] == b"moov")
+        table = data_at(moov[1], moov[2] - moov[1])
+        for tag, fmt, width in ((b"stco", ">I", 4), (b"co64", ">Q", 8)):
+            i = table.find(tag)
+            if i >= 0:
+                count = min(struct.unpack_from(">I", table, i + 8)[0], n)
+                offsets = [struct.unpack_from(fmt, table, i + 12 + k * width)[0] for k in range(count)]
+                return [data_at(o, 16) for o in offsets]
+    raise RuntimeError("sin tabla de chunks")
+
+
+def emulate_player(client, url, size):
+    """Devuelve (peticiones, bytes) necesarios para el primer frame."""
+    requests = transferred = 0
+
+    def get_range(start, end, new_request=True):
+        nonlocal requests, transferred
+        resp = client.get(url, headers={"Range": f"bytes={start}-{end - 1}"})
+        assert resp.status_code == 206, resp.status_code
+        requests += new_request
+        transferred += len(resp.data)
+        return resp.data
+
+    # Estructura del archivo (no cuenta: el navegador la descubre leyendo)
+    boxes = _boxes(lambda pos, n: client.get(url, headers={"Range": f"bytes={pos}-{min(pos + n, size) - 1}"}).data, size)
+    moov = next(b for b in boxes if b[0] == b"moov")
+    mdat = next(b for b in boxes if b[0] == b"mdat")
+
+    if moov[1] < mdat[1]:
+        # faststart: ftyp + moov + primer chunk en la misma respuesta
+        data = get_range(0, moov[2])
+        first, second = _first_chunk(data[moov[1]:])
+        get_range(moov[2], second, new_request=False)
+    else:
+        get_range(0, mdat[1] + 16)  # cabeceras hasta ver mdat
+        data = get_range(moov[1], moov[2])  # salto al final
+        first, second = _first_chunk(data)
+        get_range(first, second)  # primer chunk
+    return requests, transferred
+
+
+def rewrite_stats(path):
+    from faststart import faststart_file
+
+    size = os.path.getsize(path)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    changed = faststart_file(path)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return changed, size / elapsed / 1e6, peak / 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size-mb", type=int, default=64)
+    ap.add_argument("--file", help="MP4 propio en lugar del sintético")
+    ap.add_argument("--largesize", action="store_true", help="moov sintético con cabecera de 64 bits")
+    args = ap.parse_args()
+
+    from app import create_app
+    app = create_app()
+    dest = os.path.join(app.config["UPLOADS_DIR"], *BENCH_REL.split("/"))
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if args.file:
+        shutil.copyfile(args.file, dest)
+    else:
+        synthetic_mp4(dest, args.size_mb, largesize=args.largesize)
+
+    size = os.path.getsize(dest)
+    client = app.test_client()
+    url = f"/uploads/{BENCH_REL}"
+    try:
+        before = emulate_player(client, url, size)
+        samples = chunk_samples(dest)
+        changed, mbps, peak_mb = rewrite_stats(dest)
+        offsets_ok = chunk_samples(dest) == samples
+        after = emulate_player(client, url, size)
+    finally:
+        os.remove(dest)
+
+    print(f"archivo: {size / 1e6:.1f} MB, reescrito: {changed}, "
+          f"{mbps:.0f} MB/s, memoria máx. {peak_mb:.1f} MB, "
+          f"offsets de chunk {'correctos' if offsets_ok else 'INCORRECTOS'}")
+    print(f"{'':9} {'peticiones':>10} {'KB':>10}  " + "  ".join(f"{p:>9}" for p in PROFILES))
+    # Un cliente que no usa Range (descarga progresiva) necesita el archivo entero
+    rows = (("antes", before), ("sin Range", (1, size) if before != after else after), ("después", after))
+    for label, (reqs, nbytes) in rows:
+        ttff = [reqs * rtt + nbytes / bw for rtt, bw in PROFILES.values()]
+        print(f"{label:9} {reqs:>10} {nbytes / 1024:>10.0f}  " + "  ".join(f"{t * 1000:>7.0f}ms" for t in ttff))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/search_bench.py
+"""
+FTS5 (search_index.py) contra un LIKE ingenuo sobre un portfolio sintético
+grande, en una base SQLite temporal (no toca database.db).
+
+    python benchmarks/search_bench.py --categories 500 --media 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+import models  # noqa: E402,F401  (registra las tablas en db.metadata)
+from extensions import db  # noqa: E402
+from search_index import ensure_search_index, fts_search, like_search, query_terms  # noqa: E402
+
+WORDS = (
+    "robot arm character rigging animation shader texture lighting render "
+    "environment prop weapon vehicle creature stylized realistic lowpoly "
+    "highpoly sculpt retopology unreal unity blender maya houdini particles "
+    "simulation cloth hair facial mocap cinematic trailer gameplay concept"
+).split()
+
+
+def make_vocabulary(rng, size=5000):
+    # Vocabulario con reparto tipo Zipf: pocas palabras muy comunes y una cola larga
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    extra = {"".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)}
+    vocab = WORDS + sorted(extra)
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    return vocab, weights
+
+
+VOCAB, WEIGHTS = None, None
+
+
+def sentence(rng, n):
+    return " ".join(rng.choices(VOCAB, WEIGHTS, k=n))
+
+
+def seed(conn, n_categories, n_media, rng):
+    conn.execute(text("INSERT INTO user (id, name, email, password) VALUES (1, 'bench', 'b@b', 'x')"))
+    cats, imgs, vids = [], [], []
+    for cid in range(1, n_categories + 1):
+        cats.append({"id": cid, "name": sentence(rng, 3), "slug": f"c{cid}",
+                     "description": sentence(rng, 30), "order": cid, "user_id": 1})
+        for pos in range(n_media):
+            row = {"url": f"/uploads/x/{cid}_{pos}", "d": sentence(rng, 12), "p": pos, "c": cid}
+            (imgs if pos % 4 else vids).append(row)
+    conn.execute(text('INSERT INTO category (id, name, slug, description, "order", user_id) '
+                      'VALUES (:id, :name, :slug, :description, :order, :user_id)'), cats)
+    conn.execute(text("INSERT INTO project_image (image_url, description, position, is_carousel, category_id) "
+                      "VALUES (:url, :d, :p, 0, :c)"), imgs)
+    conn.execute(text("INSERT INTO project_video (video_url, description, position, is_carousel, category_id) "
+                      "VALUES (:url, :d, :p, 0, :c)"), vids)
+    return len(cats) + len(imgs) + len(vids)
+
+
+def timed(fn, conn, terms, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(conn, terms, 20, 0)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--categories", type=int, default=500)
+    ap.add_argument("--media", type=int, default=200, help="media por categoría")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    rng = random.Random(42)
+    global VOCAB, WEIGHTS
+    VOCAB, WEIGHTS = make_vocabulary(rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            ensure_search_index(conn, rebuild=False)  # los triggers indexan al sembrar
+            t0 = time.perf_counter()
+            rows = seed(conn, args.categories, args.media, rng)
+            print(f"{rows} filas sembradas (con triggers FTS) en {time.perf_counter() - t0:.1f} s")
+
+        rare = VOCAB[len(VOCAB) // 2]
+        queries = ["robot", "rig", "robot arm", "cinematic trailer unreal", rare, rare[:3], "zzz"]
+        print(f"{'consulta':28} {'FTS5 ms':>9} {'LIKE ms':>9} {'x':>7}")
+        with engine.connect() as conn:
+            for q in queries:
+                terms = query_terms(q)
+                fts = timed(fts_search, conn, terms, args.repeat)
+                like = timed(like_search, conn, terms, args.repeat)
+                print(f"{q:28} {fts:>9.2f} {like:>9.2f} {like / fts if fts else float('nan'):>7.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# benchmarks/serving_modes.py
+"""
+Compara el modo sync (gunicorn "app:create_app()") con el async (uvicorn asgi:app) con el
+mismo número de procesos, es decir, memoria parecida (se mide y se imprime).
+
+Escenario: N clientes lentos descargan un archivo de /uploads a poco ritmo y,
+mientras tanto, se mide la latencia de /api/ping. Con workers sync cada
+cliente lento retiene un worker; en modo async no.
+
+    python benchmarks/serving_modes.py --workers 2 --slow-clients 16
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BLOB_REL = "bench/slow_blob.bin"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_tree_mb(pid):
+    """RSS total (MB) del proceso y sus hijos, leyendo /proc (solo Linux)."""
+    total = 0
+    pids = [pid]
+    try:
+        out = subprocess.run(["pgrep", "-P", str(pid)], capture_output=True, text=True).stdout
+        pids += [int(p) for p in out.split()]
+    except FileNotFoundError:
+        pass
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/status") as fh:
+                for line in fh:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total / 1024
+
+
+def start_server(mode, port, workers):
+    if mode == "sync":
+        cmd = ["gunicorn", "app:create_app()", "-w", str(workers), "-b", f"127.0.0.1:{port}", "--timeout", "120"]
+    else:
+        cmd = ["uvicorn", "asgi:app", "--workers", str(workers), "--port", str(port), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                time.sleep(1.0)  # que arranquen todos los workers
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"el servidor {mode} no arrancó")
+
+
+async def slow_client(port, stop, read_size, pause):
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    except OSError:
+        return
+    writer.write(f"GET /uploads/{BLOB_REL} HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    try:
+        while not stop.is_set():
+            if not await reader.read(read_size):
+                break
+            await asyncio.sleep(pause)
+    finally:
+        writer.close()
+
+
+async def probe(port, timeout):
+    t0 = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+        writer.write(b"GET /api/ping HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        await asyncio.wait_for(reader.read(), timeout)
+        writer.close()
+        return time.perf_counter() - t0
+    except (asyncio.TimeoutError, OSError):
+        return None
+
+
+async def run_scenario(port, args):
+    stop = asyncio.Event()
+    clients = [asyncio.create_task(slow_client(port, stop, 16 * 1024, 0.05)) for _ in range(args.slow_clients)]
+    await asyncio.sleep(1.0)
+
+    latencies, timeouts = [], 0
+    for _ in range(args.probes):
+        lat = await probe(port, args.probe_timeout)
+        if lat is None:
+            timeouts += 1
+        else:
+            latencies.append(lat)
+        await asyncio.sleep(0.05)
+
+    stop.set()
+    for c in clients:
+        c.cancel()
+    await asyncio.gather(*clients, return_exceptions=True)
+    return latencies, timeouts
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--slow-clients", type=int, default=16)
+    ap.add_argument("--probes", type=int, default=40)
+    ap.add_argument("--probe-timeout", type=float, default=2.0)
+    ap.add_argument("--blob-mb", type=int, default=32)
+    ap.add_argument("--modes", default="sync,async")
+    args = ap.parse_args()
+
+    from config import Config
+    blob = os.path.join(Config.UPLOADS_DIR, *BLOB_REL.split("/"))
+    os.makedirs(os.path.dirname(blob), exist_ok=True)
+    with open(blob, "wb") as fh:
+        fh.write(os.urandom(args.blob_mb * 1024 * 1024))
+
+    print(f"{'modo':6} {'workers':>7} {'RSS MB':>8} {'p50 ms':>8} {'p99 ms':>8} {'timeouts':>8}")
+    try:
+        for mode in args.modes.split(","):
+            port = free_port()
+            proc = start_server(mode, port, args.workers)
+            try:
+                rss = rss_tree_mb(proc.pid)
+                lats, timeouts = asyncio.run(run_scenario(port, args))
+            finally:
+                proc.send_signal(signal.SIGTERM)
+                proc.wait(timeout=30)
+
+            lats.sort()
+            p50 = statistics.median(lats) * 1000 if lats else float("nan")
+            p99 = lats[min(len(lats) - 1, int(len(lats) * 0.99))] * 1000 if lats else float("nan")
+            print(f"{mode:6} {args.workers:>7} {rss:>8.1f} {p50:>8.1f} {p99:>8.1f} {timeouts:>8}")
+    finally:
+        os.remove(blob)
+
+
+if __name__ == "__main__":
+    main()
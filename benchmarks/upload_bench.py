@@ -0,0 +1,310 @@
+# benchmarks/upload_bench.py
+"""
+Subidas grandes de extremo a extremo: genera imágenes (PNG), videos (MP4 con
+moov al final) y PDFs sintéticos y los sube por HTTP a un gunicorn real con N
+clientes a la vez. Por escenario (endpoint x tamaño) imprime MB/s, latencia
+p50/p99 y RSS pico por worker (VmHWM de /proc, solo Linux).
+
+Cada escenario arranca un servidor nuevo (así el RSS pico es solo suyo) contra
+una carpeta temporal con su propia BD SQLite y su propio UPLOADS_DIR; no toca
+database.db ni uploads/. MAX_CONTENT_LENGTH se sube lo justo para el tamaño
+más grande.
+
+    python benchmarks/upload_bench.py --sizes 1,8,32 --concurrency 4
+    python benchmarks/upload_bench.py --endpoints media-video,cv --workers 2 --threads 4
+"""
+import argparse
+import os
+import shutil
+import signal
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# nombre: (ruta, campos extra del form, tipo de archivo)
+ENDPOINTS = {
+    "media-image": ("/api/categories/{category_id}/media", {"type": "image"}, "png"),
+    "media-video": ("/api/categories/{category_id}/media", {"type": "video"}, "mp4"),
+    "contact-image": ("/api/contact/upload-image", {}, "png"),
+    "contact-video": ("/api/contact/upload-video", {}, "mp4"),
+    "cv": ("/api/cv/", {}, "pdf"),
+}
+
+
+# ======================================================
+# App del benchmark (la carga gunicorn en cada servidor)
+# ======================================================
+
+def _configure(root, max_content_length):
+    from config import get_config
+
+    Config = get_config()  # la clase que usará create_app (APP_ENV)
+
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(root, 'bench.db')}"
+    Config.UPLOADS_DIR = os.path.join(root, "uploads")
+    Config.IMAGES_DIR = os.path.join(Config.UPLOADS_DIR, "projects", "images")
+    Config.VIDEOS_DIR = os.path.join(Config.UPLOADS_DIR, "projects", "videos")
+    Config.CV_DIR = os.path.join(Config.UPLOADS_DIR, "cvs")
+    Config.STORAGE_BACKEND = "local"
+    Config.MAX_CONTENT_LENGTH = max_content_length
+    Config.LOG_FILE = os.path.join(root, "logs", "app.jsonl")
+    Config.CONTENT_VERSION_FILE = os.path.join(root, ".content_version")
+    Config.WARMUP_ENABLED = False
+
+
+def bench_app():
+    """gunicorn "benchmarks.upload_bench:bench_app()" (BENCH_ROOT en el entorno)."""
+    _configure(os.environ["BENCH_ROOT"], int(os.environ["BENCH_MAX_CONTENT_LENGTH"]))
+    from app import create_app
+    return create_app()
+
+
+def prepare_database(root, max_content_length):
+    """Crea el esquema, un usuario y una categoría; devuelve (token, category_id)."""
+    _configure(root, max_content_length)
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from extensions import db
+    from models import Category, User
+    from search_index import ensure_search_index
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as conn:
+            ensure_search_index(conn)
+        user = User(name="bench", email="bench@example.com", password="x")
+        db.session.add(user)
+        db.session.flush()
+        category = Category(name="Bench", user_id=user.id, order=1)
+        db.session.add(category)
+        db.session.commit()
+        return create_access_token(identity=str(user.id)), category.id
+
+
+# ======================================================
+# Archivos sintéticos
+# ======================================================
+
+def synthetic_png(size_bytes):
+    """PNG RGB de ruido sin comprimir (el tamaño del archivo ~ el pedido)."""
+    side = max(16, int((size_bytes / 3) ** 0.5))
+    row = 1 + side * 3
+    raw = bytearray()
+    noise = os.urandom(row * 64)
+    for y in range(side):
+        start = (y % 64) * row
+        raw += b"\0" + noise[start + 1:start + row]
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    ihdr = struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", zlib.compress(bytes(raw), 0)) \
+        + chunk(b"IEND", b"")
+
+
+def synthetic_pdf(size_bytes):
+    filler = os.urandom(max(0, size_bytes - 64))
+    return b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n" + filler + b"\n%%EOF\n"
+
+
+def synthetic_file(kind, size_mb, folder):
+    path = os.path.join(folder, f"sample-{size_mb}mb.{kind}")
+    if kind == "mp4":
+        from faststart_ttff import synthetic_mp4  # benchmarks/ está en sys.path al ejecutarse como script
+        synthetic_mp4(path, size_mb)
+    else:
+        data = synthetic_png(size_mb * 1024 * 1024) if kind == "png" else synthetic_pdf(size_mb * 1024 * 1024)
+        with open(path, "wb") as fh:
+            fh.write(data)
+    return path
+
+
+# ======================================================
+# Servidor y clientes
+# ======================================================
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def worker_peaks_mb(master_pid):
+    """VmHWM (RSS pico) de cada worker hijo del master de gunicorn, en MB."""
+    out = subprocess.run(["pgrep", "-P", str(master_pid)], capture_output=True, text=True).stdout
+    peaks = []
+    for pid in out.split():
+        try:
+            with open(f"/proc/{pid}/status") as fh:
+                for line in fh:
+                    if line.startswith("VmHWM:"):
+                        peaks.append(int(line.split()[1]) / 1024)
+        except OSError:
+            pass
+    return peaks
+
+
+def start_server(root, port, args, max_content_length):
+    env = dict(os.environ, BENCH_ROOT=root, BENCH_MAX_CONTENT_LENGTH=str(max_content_length))
+    cmd = ["gunicorn", "benchmarks.upload_bench:bench_app()", "-b", f"127.0.0.1:{port}",
+           "-w", str(args.workers), "-k", "gthread", "--threads", str(args.threads), "--timeout", "300"]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/api/ping")
+            if conn.getresponse().status == 200:
+                time.sleep(0.5)  # que terminen de arrancar todos los workers
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("gunicorn no arrancó")
+
+
+def multipart_parts(fields, filename, content_type):
+    boundary = uuid.uuid4().hex
+    head = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode()
+        for k, v in fields.items()
+    )
+    head += (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+             f"Content-Type: {content_type}\r\n\r\n").encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    return boundary, head, tail
+
+
+def upload_once(port, path, fields, sample, token):
+    ext = os.path.splitext(sample)[1]
+    content_type = {".png": "image/png", ".mp4": "video/mp4", ".pdf": "application/pdf"}[ext]
+    boundary, head, tail = multipart_parts(fields, f"bench-{uuid.uuid4().hex[:12]}{ext}", content_type)
+    size = os.path.getsize(sample)
+
+    t0 = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    conn.putrequest("POST", path)
+    conn.putheader("Authorization", f"Bearer {token}")
+    conn.putheader("Content-Type", f"multipart/form-data; boundary={boundary}")
+    conn.putheader("Content-Length", str(len(head) + size + len(tail)))
+    conn.endheaders()
+    conn.send(head)
+    with open(sample, "rb") as fh:
+        while True:
+            block = fh.read(256 * 1024)
+            if not block:
+                break
+            conn.send(block)
+    conn.send(tail)
+    resp = conn.getresponse()
+    resp.read()
+    conn.close()
+    return time.perf_counter() - t0, resp.status, size
+
+
+def run_scenario(port, path, fields, sample, token, args):
+    results = []
+    lock = threading.Lock()
+
+    def one(_):
+        try:
+            r = upload_once(port, path, fields, sample, token)
+        except OSError:
+            r = (None, 0, 0)
+        with lock:
+            results.append(r)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(one, range(args.requests)))
+    return time.perf_counter() - t0, results
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else float("nan")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1,8,32", help="tamaños en MB, separados por comas")
+    ap.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--requests", type=int, default=16, help="subidas por escenario")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--threads", type=int, default=4)
+    args = ap.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        ap.error(f"endpoints desconocidos: {', '.join(sorted(unknown))}")
+    max_content_length = (max(sizes) + 1) * 1024 * 1024
+
+    work = tempfile.mkdtemp(prefix="upload-bench-")
+    try:
+        samples = {}
+        for name in endpoints:
+            kind = ENDPOINTS[name][2]
+            for size in sizes:
+                if (kind, size) not in samples:
+                    samples[kind, size] = synthetic_file(kind, size, work)
+
+        print(f"workers={args.workers} threads={args.threads} concurrencia={args.concurrency} "
+              f"subidas/escenario={args.requests}")
+        print(f"{'endpoint':14} {'MB':>5} {'ok':>4} {'err':>4} {'MB/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'RSS pico/worker MB':>19}")
+        for name in endpoints:
+            route, fields, kind = ENDPOINTS[name]
+            for size in sizes:
+                root = os.path.join(work, f"{name}-{size}")
+                os.makedirs(root)
+                # La BD se prepara en un proceso aparte: este no importa la app
+                out = subprocess.run(
+                    [sys.executable, __file__, "--prepare", root, str(max_content_length)],
+                    cwd=ROOT, capture_output=True, text=True, check=True,
+                ).stdout.split()
+                token, category_id = out[-2], int(out[-1])
+
+                port = free_port()
+                proc = start_server(root, port, args, max_content_length)
+                try:
+                    elapsed, results = run_scenario(
+                        port, route.format(category_id=category_id), fields, samples[kind, size], token, args)
+                    peaks = worker_peaks_mb(proc.pid)
+                finally:
+                    proc.send_signal(signal.SIGTERM)
+                    proc.wait(timeout=60)
+
+                ok = [r for r in results if 200 <= r[1] < 300]
+                latencies = [r[0] for r in ok]
+                mbps = sum(r[2] for r in ok) / elapsed / 1e6 if elapsed else 0.0
+                peak = f"{max(peaks):.0f} (media {statistics.mean(peaks):.0f})" if peaks else "n/d"
+                print(f"{name:14} {size:>5} {len(ok):>4} {len(results) - len(ok):>4} {mbps:>8.1f} "
+                      f"{statistics.median(latencies) * 1000 if latencies else float('nan'):>8.0f} "
+                      f"{percentile(latencies, 0.99) * 1000:>8.0f} {peak:>19}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--prepare":
+        token, category_id = prepare_database(sys.argv[2], int(sys.argv[3]))
+        print(token, category_id)
+    else:
+        main()
@@ -0,0 +1,138 @@
+# compression.py
+"""
+Compresión de respuestas (gzip / brotli) negociada por Accept-Encoding.
+
+- Solo se comprimen cuerpos de tipo texto/JSON por encima de COMPRESS_MIN_SIZE.
+- Las variantes comprimidas se guardan en una LRU indexada por el hash del
+  cuerpo: si la misma respuesta pública se sirve otra vez (mismos bytes),
+  se reutiliza el resultado en lugar de volver a comprimir.
+- brotli va en requirements.txt; si aun así falta se usa solo gzip (create_app
+  lo avisa al arrancar).
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+_brotli = None
+
+
+def _load_brotli():
+    """brotli es opcional y se importa con la primera respuesta a comprimir."""
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+            _brotli = brotli
+        except Exception:
+            _brotli = False
+    return _brotli or None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/csv",
+    "image/svg+xml",
+}
+
+
+class CompressedVariantCache:
+    """LRU en memoria de variantes comprimidas, acotada por bytes totales."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+
+def _compress(data: bytes, encoding: str, cfg) -> bytes:
+    if encoding == "br":
+        return _load_brotli().compress(data, quality=cfg.get("COMPRESS_BR_LEVEL", 5))
+    return gzip.compress(data, compresslevel=cfg.get("COMPRESS_GZIP_LEVEL", 6), mtime=0)
+
+
+def _negotiate(offered) -> str | None:
+    # Orden de preferencia del servidor; Accept-Encoding decide con sus q=
+    return request.accept_encodings.best_match(offered) or None
+
+
+def init_compression(app):
+    cfg = app.config
+    if not cfg.get("COMPRESS_ENABLED", True):
+        return
+
+    cache = CompressedVariantCache(int(cfg.get("COMPRESS_CACHE_MAX_BYTES", 8 * 1024 * 1024)))
+    app.extensions["compression_cache"] = cache
+
+    @app.after_request
+    def compress_response(response):
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return response
+        if response.direct_passthrough or response.is_streamed:
+            return response
+        if "Content-Encoding" in response.headers:
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        offered = ["br", "gzip"] if _load_brotli() is not None else ["gzip"]
+        encoding = _negotiate(offered)
+        if encoding not in offered:
+            return response
+
+        body = response.get_data()
+        if len(body) < int(cfg.get("COMPRESS_MIN_SIZE", 500)):
+            return response
+
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = _compress(body, encoding, cfg)
+            cache.put(key, compressed)
+
+        if len(compressed) >= len(body):
+            return response
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+
+        # Los bytes ya no son los del ETag original: pasa a ser débil (como
+        # hace nginx), así If-None-Match sigue validando con comparación débil
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        return response
@@ -12,6 +12,51 @@ except Exception:
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+
+def _database_url():
+    url = os.getenv("DATABASE_URL")
+    # Heroku/Render siguen dando postgres://, que SQLAlchemy ya no acepta
+    if url and url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def pool_options():
+    """
+    Pool de conexiones para una BD de servidor. Cada hilo de gunicorn usa como
+    mucho una conexión a la vez, así que pool_size = hilos por worker; el margen
+    (max_overflow) es para los hilos de fondo (borrados, faststart, warm-up).
+    Conexiones abiertas contra la BD ≈ workers * (pool_size + max_overflow).
+    """
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", os.getenv("GUNICORN_THREADS", "4"))),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "2")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),    # espera máx. por una conexión, s
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),    # antes que el idle timeout del servidor/proxy
+        "pool_pre_ping": True,  # descarta conexiones muertas (reinicio, failover) antes de usarlas
+    }
+
+
+def database_engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS según el motor. SQLite (archivo local) se queda
+    con lo que pone Flask-SQLAlchemy."""
+    from sqlalchemy.engine import make_url
+
+    backend = make_url(uri).get_backend_name()
+    if backend == "sqlite":
+        return {}
+
+    statement_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+    connect_args = {"connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5"))}
+    if backend == "postgresql":
+        connect_args["options"] = f"-c statement_timeout={statement_ms}"
+    elif backend == "mysql":
+        connect_args["init_command"] = f"SET SESSION max_execution_time={statement_ms}"
+    elif backend == "mariadb":
+        connect_args["init_command"] = f"SET SESSION max_statement_time={statement_ms / 1000}"
+    return {**pool_options(), "connect_args": connect_args}
+
+
 class Config:
     # --- Base de datos ---
     SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(basedir, 'database.db')}"
@@ -22,19 +67,78 @@ class Config:
     JWT_TOKEN_LOCATION = ["headers"]
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "valor_por_defecto")
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hora
+    # Revocación (token_revocation.py): generación compartida por los workers
+    # del host; la recarga periódica cubre varios hosts sin archivo común
+    TOKEN_REVOCATION_FILE = os.getenv("TOKEN_REVOCATION_FILE", os.path.join(basedir, ".token_revocation"))
+    TOKEN_REVOCATION_REFRESH = float(os.getenv("TOKEN_REVOCATION_REFRESH", "60"))  # s
 
     # --- Uploads ---
     UPLOADS_DIR = os.path.join(basedir, "uploads")
     IMAGES_DIR  = os.path.join(UPLOADS_DIR, "projects", "images")
     VIDEOS_DIR  = os.path.join(UPLOADS_DIR, "projects", "videos")
     CV_DIR      = os.path.join(UPLOADS_DIR, "cvs")
-
-    os.makedirs(IMAGES_DIR, exist_ok=True)
-    os.makedirs(VIDEOS_DIR, exist_ok=True)
-    os.makedirs(CV_DIR, exist_ok=True)
+    # Las carpetas las crea el storage al guardar (sin efectos al importar)
 
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
 
+    # --- Storage de uploads: "local" (UPLOADS_DIR) o "s3" (bucket S3-compatible) ---
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+    S3_BUCKET = os.getenv("S3_BUCKET")
+    S3_PREFIX = os.getenv("S3_PREFIX", "")
+    S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")        # p.ej. MinIO local: http://localhost:9000
+    S3_REGION = os.getenv("S3_REGION")
+    S3_PUBLIC_BASE_URL = os.getenv("S3_PUBLIC_BASE_URL")  # CDN/bucket público; si no, URLs prefirmadas
+    S3_PRESIGN_EXPIRES = int(os.getenv("S3_PRESIGN_EXPIRES", "3600"))
+
+    # --- Warm-up de workers (ver warmup.py / gunicorn.conf.py) ---
+    WARMUP_ENABLED = str(os.getenv("WARMUP_ENABLED", "True")).lower() in ("1","true","yes","y")
+
+    # --- MP4 subidos con moov al final: reescritura en segundo plano (faststart.py) ---
+    FASTSTART_ENABLED = str(os.getenv("FASTSTART_ENABLED", "True")).lower() in ("1","true","yes","y")
+
+    # --- Caché por proceso de respuestas públicas (public_cache.py) ---
+    # Se vacía cuando cambia la generación de contenido, compartida por los
+    # workers del host mediante CONTENT_VERSION_FILE (content_version.py)
+    PUBLIC_CACHE_ENABLED = str(os.getenv("PUBLIC_CACHE_ENABLED", "True")).lower() in ("1","true","yes","y")
+    PUBLIC_CACHE_MAX_ENTRIES = int(os.getenv("PUBLIC_CACHE_MAX_ENTRIES", "200"))
+    PUBLIC_CACHE_MAX_BYTES = int(os.getenv("PUBLIC_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    CONTENT_VERSION_FILE = os.getenv("CONTENT_VERSION_FILE", os.path.join(basedir, ".content_version"))
+
+    # --- Borrado diferido de archivos (file_deletions.py) ---
+    FILE_DELETION_INTERVAL = float(os.getenv("FILE_DELETION_INTERVAL", "60"))  # repaso del diario, s
+    FILE_DELETION_BATCH = int(os.getenv("FILE_DELETION_BATCH", "200"))
+
+    # --- Detalle de categoría: Link rel=preload (y 103) de los primeros slides ---
+    PRELOAD_SLIDES = int(os.getenv("PRELOAD_SLIDES", "3"))
+
+    # --- Exportar / importar el portfolio (portfolio_archive.py) ---
+    PORTFOLIO_IMPORT_MAX_BYTES = int(os.getenv("PORTFOLIO_IMPORT_MAX_BYTES", str(4 * 1024 ** 3)))
+
+    # --- GC de uploads (flask uploads-gc) ---
+    UPLOADS_GC_GRACE_SECONDS = int(os.getenv("UPLOADS_GC_GRACE_SECONDS", str(24 * 3600)))
+    # temporales (.tmp/, .*.part, .*.faststart) sin tocar desde hace tanto: abandonados
+    UPLOADS_GC_TEMP_SECONDS = int(os.getenv("UPLOADS_GC_TEMP_SECONDS", str(6 * 3600)))
+    # Fuera de UPLOADS_DIR: lo que hay ahí se sirve en /uploads/<path>
+    UPLOADS_GC_STATE = os.getenv("UPLOADS_GC_STATE", os.path.join(basedir, ".uploads_gc_state.json"))
+
+    # --- Compresión de respuestas ---
+    COMPRESS_ENABLED = str(os.getenv("COMPRESS_ENABLED", "True")).lower() in ("1","true","yes","y")
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))  # bytes
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BR_LEVEL = int(os.getenv("COMPRESS_BR_LEVEL", "5"))
+    COMPRESS_CACHE_MAX_BYTES = int(os.getenv("COMPRESS_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+    # --- Logging JSON en segundo plano (request_log.py); LOG_FILE="-" = stderr ---
+    LOG_FILE = os.getenv("LOG_FILE", os.path.join(basedir, "logs", "app.jsonl"))
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+    LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "midnight")
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "14"))
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Fracción de 2xx/3xx que llega al log de acceso (errores y lentas, siempre)
+    LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", "1.0"))
+    LOG_SLOW_MS = float(os.getenv("LOG_SLOW_MS", "1000"))
+
     # --- Email (desde .env) ---
     MAIL_SERVER   = os.getenv("MAIL_SERVER", "smtp.gmail.com")
     MAIL_PORT     = int(os.getenv("MAIL_PORT", "587"))
@@ -44,10 +148,26 @@ class Config:
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
     CONTACT_DEST_EMAIL = os.getenv("CONTACT_DEST_EMAIL")
     MAIL_TIMEOUT = float(os.getenv("MAIL_TIMEOUT", "15"))
+    # Ventana en la que un envío idéntico (email + contenido) se da por repetido
+    MESSAGE_DEDUP_SECONDS = int(os.getenv("MESSAGE_DEDUP_SECONDS", "600"))
 
 class DevelopmentConfig(Config):
     DEBUG = True
 
 class ProductionConfig(Config):
     DEBUG = False
-    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', Config.SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_DATABASE_URI = _database_url() or Config.SQLALCHEMY_DATABASE_URI
+
+CONFIGS = {
+    "development": DevelopmentConfig,
+    "production": ProductionConfig,
+}
+
+def get_config(name=None):
+    """Clase de configuración según APP_ENV. Por defecto production: gunicorn
+    nunca arranca en modo debug por olvidarse una variable."""
+    name = (name or os.getenv("APP_ENV") or "production").strip().lower()
+    try:
+        return CONFIGS[name]
+    except KeyError:
+        raise RuntimeError(f"APP_ENV desconocido: {name!r} (válidos: {', '.join(CONFIGS)})") from None
@@ -0,0 +1,107 @@
+# content_version.py
+"""
+Generación global del contenido público, compartida por todos los workers
+del host a través de un archivo pequeño (CONTENT_VERSION_FILE):
+
+- bump() escribe el contador siguiente en un temporal y lo mueve con
+  os.replace, así que cada generación es un inode nuevo.
+- El token de la generación es (inode, mtime_ns, tamaño) de os.stat: una
+  llamada al sistema por petición, sin leer el archivo ni consultar la BD.
+- Cada proceso recuerda el último token visto. Si cambia, antes de atender
+  la petición llama a los callbacks registrados con on_change() (cachés por
+  proceso), que se vacían sin volver a consultar nada.
+
+Las rutas de admin lo activan con bump_on_write(blueprint): cualquier
+escritura con respuesta 2xx sube la generación.
+"""
+import os
+import threading
+
+from flask import current_app, request
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+_callbacks = []
+_seen = {"token": None}
+_lock = threading.Lock()
+
+
+def on_change(callback):
+    """Registra un callback sin argumentos que vacía una caché por proceso."""
+    _callbacks.append(callback)
+    return callback
+
+
+def file_token(path):
+    """(inode, mtime_ns, tamaño) del archivo de generación, o None si no existe."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def read_generation(path) -> int:
+    try:
+        with open(path, "r", encoding="ascii") as fh:
+            return int(fh.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def check(app=None):
+    """O(1): si otro worker subió la generación, vacía las cachés de este."""
+    app = app or current_app
+    token = file_token(app.config["CONTENT_VERSION_FILE"])
+    if token == _seen["token"]:
+        return
+    with _lock:
+        if token == _seen["token"]:
+            return
+        _seen["token"] = token
+        for callback in list(_callbacks):
+            try:
+                callback()
+            except Exception:
+                app.logger.exception("No se pudo invalidar una caché")
+
+
+def bump_file(path) -> int:
+    """Escribe la generación siguiente en un inode nuevo (temporal + os.replace)."""
+    generation = read_generation(path) + 1
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="ascii") as fh:
+        fh.write(str(generation))
+    os.replace(tmp, path)
+    return generation
+
+
+def bump(app=None) -> int:
+    app = app or current_app
+    with _lock:
+        generation = bump_file(app.config["CONTENT_VERSION_FILE"])
+    check(app)  # este worker no espera a la siguiente petición
+    return generation
+
+
+def bump_on_write(blueprint):
+    @blueprint.after_request
+    def _bump_content_version(response):
+        if request.method in WRITE_METHODS and 200 <= response.status_code < 300:
+            try:
+                bump()
+            except OSError:
+                current_app.logger.exception("No se pudo subir la generación de contenido")
+        return response
+
+    return blueprint
+
+
+def init_content_version(app):
+    app.config.setdefault(
+        "CONTENT_VERSION_FILE", os.path.join(app.root_path, ".content_version")
+    )
+
+    @app.before_request
+    def _check_content_version():
+        check(app)
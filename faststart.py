@@ -0,0 +1,209 @@
+# faststart.py
+"""
+"Fast start" de MP4: si el átomo `moov` está detrás de `mdat`, el navegador
+tiene que pedir el final del archivo antes de poder empezar a reproducir.
+Aquí se reescribe el archivo con `moov` delante:
+
+- Solo `moov` se lee a memoria (acotado a MAX_MOOV_BYTES); `mdat` se copia
+  por bloques de 1 MB a un temporal en la misma carpeta.
+- Los offsets de `stco`/`co64` se desplazan lo que ocupa `moov`.
+- El original se sustituye con os.replace (atómico); quien lo esté sirviendo
+  sigue leyendo el inode anterior. Si el archivo cambió mientras tanto, el
+  resultado se descarta.
+- Las subidas lo programan en un hilo de fondo (schedule_faststart) para no
+  alargar la petición. Solo aplica al storage local.
+"""
+import os
+import shutil
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from content_version import bump
+from media_probe import MAX_MOOV_BYTES, ProbeError, iter_boxes
+
+COPY_CHUNK = 1024 * 1024
+MP4_EXTENSIONS = (".mp4", ".m4v", ".mov")
+_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+
+class FaststartError(ValueError):
+    pass
+
+
+def _top_level(f):
+    f.seek(0, os.SEEK_END)
+    return list(iter_boxes(f, 0, f.tell()))
+
+
+def needs_faststart(path) -> bool:
+    with open(path, "rb") as f:
+        types = [b[0] for b in _top_level(f)]
+    return b"moov" in types and b"mdat" in types and types.index(b"moov") > types.index(b"mdat")
+
+
+def _patch_chunk_offsets(moov: bytearray, payload_at, shift_from, shift_to, delta):
+    """Suma `delta` a los offsets de chunk que caen en [shift_from, shift_to).
+       `payload_at`: inicio de los hijos de moov (8, o 16 con largesize)."""
+    f = BytesIO(moov)
+    pending = [(payload_at, len(moov))]
+    while pending:
+        start, end = pending.pop()
+        for box_type, _, payload, box_end in iter_boxes(f, start, end):
+            if box_type in _CONTAINERS:
+                pending.append((payload, box_end))
+            elif box_type == b"cmov":
+                raise FaststartError("moov comprimido")
+            elif box_type in (b"stco", b"co64"):
+                wide = box_type == b"co64"
+                fmt, width = (">Q", 8) if wide else (">I", 4)
+                count = struct.unpack_from(">I", moov, payload + 4)[0]
+                at = payload + 8
+                if at + count * width > box_end:
+                    raise FaststartError("tabla de chunks truncada")
+                for i in range(count):
+                    pos = at + i * width
+                    offset = struct.unpack_from(fmt, moov, pos)[0]
+                    if shift_from <= offset < shift_to:
+                        offset += delta
+                        if not wide and offset > 0xFFFFFFFF:
+                            raise FaststartError("stco desborda 32 bits")
+                        struct.pack_into(fmt, moov, pos, offset)
+
+
+def faststart_file(path) -> bool:
+    """Reescribe `path` con moov delante. False si no hacía falta."""
+    before = os.stat(path)
+    with open(path, "rb") as src:
+        boxes = _top_level(src)
+        types = [b[0] for b in boxes]
+        if b"moov" not in types or b"mdat" not in types:
+            return False
+        moov_i, mdat_i = types.index(b"moov"), types.index(b"mdat")
+        if moov_i < mdat_i:
+            return False
+
+        _, moov_start, moov_payload, moov_end = boxes[moov_i]
+        if moov_end - moov_start > MAX_MOOV_BYTES:
+            raise FaststartError("moov demasiado grande")
+        src.seek(moov_start)
+        moov = bytearray(src.read(moov_end - moov_start))
+        if struct.unpack_from(">I", moov)[0] == 0:
+            struct.pack_into(">I", moov, 0, len(moov))  # "hasta el final" ya no vale
+        # Todo lo que había entre el primer mdat y el moov se desplaza len(moov)
+        _patch_chunk_offsets(moov, moov_payload - moov_start, boxes[mdat_i][1], moov_start, len(moov))
+
+        order = boxes[:mdat_i] + [boxes[moov_i]] + boxes[mdat_i:moov_i] + boxes[moov_i + 1:]
+        folder, name = os.path.split(path)
+        tmp = os.path.join(folder, f".{name}.faststart")
+        try:
+            with open(tmp, "wb") as dst:
+                for box_type, start, _, end in order:
+                    if box_type == b"moov" and start == moov_start:
+                        dst.write(moov)
+                        continue
+                    src.seek(start)
+                    remaining = end - start
+                    while remaining:
+                        block = src.read(min(COPY_CHUNK, remaining))
+                        if not block:
+                            raise FaststartError("archivo truncado")
+                        dst.write(block)
+                        remaining -= len(block)
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            after = os.stat(path)
+            if (after.st_ino, after.st_size, after.st_mtime_ns) != (before.st_ino, before.st_size, before.st_mtime_ns):
+                raise FaststartError("el archivo cambió durante la reescritura")
+            shutil.copymode(path, tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+    return True
+
+
+# ======================================================
+# Segundo plano
+# ======================================================
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Se crea en el primer uso: con preload_app cada worker tiene el suyo tras el fork
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="faststart")
+        return _executor
+
+
+def schedule_faststart(app, path):
+    """Programa la reescritura de `path`; devuelve el Future (o None si está desactivado)."""
+    if not path.lower().endswith(MP4_EXTENSIONS) or not app.config.get("FASTSTART_ENABLED", True):
+        return None
+    logger = app.logger
+
+    def job():
+        try:
+            if faststart_file(path):
+                logger.info("faststart: moov movido al principio en %s", path)
+        except FileNotFoundError:
+            pass  # borrado o reemplazado antes de llegar aquí
+        except (FaststartError, ProbeError, struct.error) as e:
+            logger.info("faststart omitido en %s: %s", path, e)
+        except Exception:
+            logger.exception("faststart falló en %s", path)
+
+    return _get_executor().submit(job)
+
+
+# ======================================================
+# CLI: flask video-faststart [--apply]
+# ======================================================
+
+@click.command("video-faststart")
+@click.option("--apply", "apply_", is_flag=True, help="Reescribe de verdad (por defecto solo lista).")
+@with_appcontext
+def video_faststart_command(apply_):
+    """Busca en /uploads los MP4 con moov al final (p. ej. subidos antes de esto)."""
+    if (current_app.config.get("STORAGE_BACKEND") or "local").lower() != "local":
+        raise click.ClickException("video-faststart solo recorre el backend de storage local")
+
+    root = current_app.config["UPLOADS_DIR"]
+    found = fixed = 0
+    for folder, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if name.startswith(".") or not name.lower().endswith(MP4_EXTENSIONS):
+                continue
+            path = os.path.join(folder, name)
+            try:
+                if not needs_faststart(path):
+                    continue
+            except (OSError, ValueError, struct.error):
+                continue
+            found += 1
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            if not apply_:
+                click.echo(f"moov al final  /uploads/{rel}")
+                continue
+            try:
+                fixed += faststart_file(path)
+                click.echo(f"reescrito      /uploads/{rel}")
+            except (OSError, FaststartError, ProbeError, struct.error) as e:
+                click.echo(f"omitido        /uploads/{rel}: {e}")
+    if fixed:
+        bump(current_app)  # los workers vacían sus cachés públicas
+    click.echo(f"{'DRY-RUN ' if not apply_ else ''}MP4 con moov al final: {found}, reescritos: {fixed}")
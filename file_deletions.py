@@ -0,0 +1,165 @@
+# file_deletions.py
+"""
+Borrado diferido de archivos de /uploads.
+
+- schedule_deletion(url) solo añade una fila PendingDeletion a la sesión: se
+  confirma (o se deshace) junto con el borrado de la fila dueña. Si el commit
+  falla, el archivo sigue ahí.
+- Tras un commit que incluya borrados se despierta un hilo por proceso que los
+  procesa por lotes fuera de la petición. También repasa el diario cada
+  FILE_DELETION_INTERVAL segundos, así lo que dejó a medias un worker que murió
+  lo recoge cualquier otro.
+- Idempotente: borrar un archivo que ya no existe no es un error y varios
+  workers pueden procesar la misma fila. Antes de borrar se comprueba que
+  ninguna fila vuelva a apuntar a esa key (p. ej. el CV, que siempre se llama
+  igual) y que el archivo no se haya reescrito después de apuntarlo.
+"""
+import os
+import threading
+from datetime import timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, PendingDeletion
+from storage import LocalStorage, get_storage, key_from_url
+
+MAX_ATTEMPTS = 5
+
+
+def schedule_deletion(url):
+    """Apunta el archivo de `url` para borrarlo cuando la transacción haga commit."""
+    key = key_from_url(url)
+    if not key:
+        return
+    db.session.add(PendingDeletion(key=key))
+    db.session.info["file_deletions"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(session):
+    if session.info.pop("file_deletions", False):
+        _wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("file_deletions", None)
+
+
+# ======================================================
+# Proceso por lotes
+# ======================================================
+
+def _rewritten_after(storage, key, scheduled_at):
+    """¿El archivo se volvió a escribir después de apuntarlo? (solo disco local)"""
+    if not isinstance(storage, LocalStorage):
+        return False
+    try:
+        mtime = os.stat(storage.path(key)).st_mtime
+    except FileNotFoundError:
+        return False
+    if scheduled_at.tzinfo is None:  # SQLite devuelve fechas naive (UTC)
+        scheduled_at = scheduled_at.replace(tzinfo=timezone.utc)
+    return mtime > scheduled_at.timestamp()
+
+
+def process_pending(batch_size=200):
+    """Procesa un lote; devuelve cuántas filas del diario se cerraron."""
+    from uploads_gc import build_reference_index
+
+    rows = PendingDeletion.query.order_by(PendingDeletion.id).limit(batch_size).all()
+    if not rows:
+        return 0
+
+    storage = get_storage()
+    refs = build_reference_index()
+    done = []
+    for row in rows:
+        try:
+            if row.key not in refs and not _rewritten_after(storage, row.key, row.created_at):
+                storage.delete(row.key)
+            done.append(row.id)
+        except Exception:
+            row.attempts += 1
+            if row.attempts >= MAX_ATTEMPTS:
+                current_app.logger.error("Se abandona el borrado de %s tras %d intentos", row.key, row.attempts)
+                done.append(row.id)
+            else:
+                current_app.logger.warning("No se pudo borrar %s (intento %d)", row.key, row.attempts)
+
+    if done:
+        PendingDeletion.query.filter(PendingDeletion.id.in_(done)).delete(synchronize_session=False)
+    db.session.commit()
+    return len(done)
+
+
+# ======================================================
+# Hilo de fondo
+# ======================================================
+
+_state = {"thread": None, "pid": None}
+_wakeup = threading.Event()
+_lock = threading.Lock()
+
+
+def _run(app):
+    interval = float(app.config.get("FILE_DELETION_INTERVAL", 60))
+    batch_size = int(app.config.get("FILE_DELETION_BATCH", 200))
+    while True:
+        _wakeup.wait(interval)
+        _wakeup.clear()
+        with app.app_context():
+            try:
+                while process_pending(batch_size) >= batch_size:
+                    pass
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("Fallo procesando el diario de borrados")
+            finally:
+                db.session.remove()
+
+
+def start_unlinker(app):
+    # Un hilo por proceso; tras un fork (gunicorn --preload) el heredado no existe
+    with _lock:
+        thread = _state["thread"]
+        if thread is not None and thread.is_alive() and _state["pid"] == os.getpid():
+            return
+        _state["pid"] = os.getpid()
+        _state["thread"] = threading.Thread(target=_run, args=(app,), name="file-deletions", daemon=True)
+        _state["thread"].start()
+    _wakeup.set()  # primera pasada: lo que quedara pendiente de antes
+
+
+def _wake():
+    if _state["pid"] == os.getpid() and _state["thread"] is not None:
+        _wakeup.set()
+
+
+def init_file_deletions(app):
+    @app.before_request
+    def _ensure_unlinker():
+        if _state["pid"] != os.getpid():
+            start_unlinker(app)
+
+
+# ======================================================
+# CLI: flask file-deletions
+# ======================================================
+
+@click.command("file-deletions")
+@with_appcontext
+def file_deletions_command():
+    """Procesa ya todo el diario de borrados pendientes."""
+    total = 0
+    while True:
+        n = process_pending()
+        total += n
+        if n == 0:
+            break
+    left = PendingDeletion.query.count()
+    click.echo(f"Borrados procesados: {total}, pendientes: {left}")
@@ -0,0 +1,80 @@
+# gunicorn.conf.py
+"""
+Perfil de producción: gunicorn -c gunicorn.conf.py "app:create_app()"
+
+- workers/threads según CPUs y memoria disponible (WEB_CONCURRENCY y
+  GUNICORN_THREADS mandan si están definidos).
+- preload_app: la app y los modelos se importan una vez en el master y los
+  workers los heredan por fork (copy-on-write).
+- post_fork: cada worker descarta las conexiones heredadas y se calienta en
+  segundo plano; /api/ready responde 503 hasta que termina.
+"""
+import os
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _memory_limit_mb():
+    # Límite del contenedor (cgroup v2 / v1) o, si no hay, memoria disponible
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as fh:
+                raw = fh.read().strip()
+            if raw.isdigit() and int(raw) < 1 << 60:
+                return int(raw) // (1024 * 1024)
+        except OSError:
+            pass
+    try:
+        with open("/proc/meminfo") as fh:
+            for line in fh:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def _default_workers():
+    by_cpu = 2 * _cpu_count() + 1
+    mem = _memory_limit_mb()
+    per_worker = int(os.getenv("WEB_WORKER_MEMORY_MB", "120"))
+    if mem:
+        return max(1, min(by_cpu, mem // per_worker))
+    return by_cpu
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", _default_workers()))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recicla workers de vez en cuando (fugas de memoria de librerías)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = 200
+
+accesslog = None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    from extensions import db
+    from warmup import start_warm_up
+
+    flask_app = server.app.wsgi()  # creada en el master por preload_app
+    with flask_app.app_context():
+        # No compartir sockets de BD abiertos en el master con los hijos
+        db.engine.dispose(close=False)
+
+    flask_app.config["WARMUP_CONNECTIONS"] = threads
+    start_warm_up(flask_app)
@@ -0,0 +1,473 @@
+# media_probe.py
+"""
+Metadatos de video e imagen leyendo solo cabeceras, sin decodificar y sin
+binarios externos (ffprobe).
+
+Video:
+
+- MP4/MOV (ISO BMFF): se recorren las cajas de primer nivel saltando `mdat`
+  con seek y se lee `moov` -> mvhd / trak (tkhd, mdhd, hdlr, stsd).
+- WebM/Matroska (EBML): Segment -> Info (duración) y Tracks (pista de video),
+  parando en el primer Cluster.
+
+probe_video(fileobj) -> {"width", "height", "duration", "codec"} o None si el
+formato no se reconoce o no hay pista de video.
+
+Imagen:
+
+- probe_image(fileobj) -> {"width", "height"} de PNG (IHDR), JPEG (SOFn, con
+  la orientación EXIF aplicada) y WebP (VP8/VP8L/VP8X).
+- image_placeholder(fileobj) -> {"placeholder", "dominant_color"}: miniatura
+  borrosa de unos cientos de bytes como data URI y color medio. Esta sí
+  decodifica y necesita Pillow, que es opcional: sin él devuelve None.
+
+Los archivos deben admitir seek; la posición se restaura al terminar.
+"""
+import base64
+import io
+import struct
+
+MAX_MOOV_BYTES = 64 * 1024 * 1024  # moov más grande: no es un video razonable
+
+
+class ProbeError(ValueError):
+    pass
+
+
+def probe_video(fileobj):
+    try:
+        start = fileobj.tell()
+        fileobj.seek(0, io.SEEK_END)
+        size = fileobj.tell()
+        fileobj.seek(0)
+    except (AttributeError, OSError, ValueError):
+        return None  # stream sin seek
+
+    try:
+        head = fileobj.read(12)
+        fileobj.seek(0)
+        if head[:4] == b"\x1a\x45\xdf\xa3":
+            return _probe_ebml(fileobj, size)
+        if head[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide"):
+            return _probe_mp4(fileobj, size)
+        return None
+    except (ProbeError, struct.error, UnicodeDecodeError, OverflowError):
+        return None
+    finally:
+        fileobj.seek(start)
+
+
+def _result(width, height, duration, codec):
+    if not width or not height:
+        return None
+    return {
+        "width": int(width),
+        "height": int(height),
+        "duration": round(duration, 3) if duration else None,
+        "codec": codec or None,
+    }
+
+
+# ======================================================
+# MP4 / ISO BMFF
+# ======================================================
+
+def iter_boxes(f, start, end):
+    """(tipo, inicio, inicio_payload, fin) de cada caja entre start y end."""
+    pos = start
+    while end - pos >= 8:
+        f.seek(pos)
+        size, box_type = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - pos  # hasta el final del archivo
+        if size < header or pos + size > end:
+            raise ProbeError("caja truncada")
+        yield box_type, pos, pos + header, pos + size
+        pos += size
+
+
+def _read_payload(f, payload_start, box_end, limit=256):
+    f.seek(payload_start)
+    return f.read(min(box_end - payload_start, limit))
+
+
+def _probe_mp4(f, size):
+    for box_type, _, payload, end in iter_boxes(f, 0, size):
+        if box_type == b"moov":
+            if end - payload > MAX_MOOV_BYTES:
+                return None
+            return _parse_moov(f, payload, end)
+    return None  # sin moov (o fragmentado sin cabecera)
+
+
+def _parse_moov(f, start, end):
+    movie_duration = None
+    video = None
+
+    for box_type, _, payload, box_end in iter_boxes(f, start, end):
+        if box_type == b"mvhd":
+            timescale, duration = _parse_time_header(_read_payload(f, payload, box_end))
+            if timescale and duration:
+                movie_duration = duration / timescale
+        elif box_type == b"trak" and video is None:
+            track = _parse_trak(f, payload, box_end)
+            if track.get("handler") == b"vide":
+                video = track
+
+    if video is None:
+        return None
+    width, height = video.get("width"), video.get("height")
+    if not (width and height):
+        width, height = video.get("entry_width"), video.get("entry_height")
+    duration = movie_duration or video.get("duration")
+    return _result(width, height, duration, video.get("codec"))
+
+
+def _parse_time_header(data):
+    """mvhd/mdhd -> (timescale, duration). Duración 'todo unos' = desconocida."""
+    if data[0] == 1:
+        timescale, duration = struct.unpack(">IQ", data[20:32])
+        unknown = 0xFFFFFFFFFFFFFFFF
+    else:
+        timescale, duration = struct.unpack(">II", data[12:20])
+        unknown = 0xFFFFFFFF
+    return timescale, (None if duration == unknown else duration)
+
+
+def _parse_trak(f, start, end):
+    track = {}
+    pending = [(start, end)]
+    while pending:
+        s, e = pending.pop()
+        for box_type, _, payload, box_end in iter_boxes(f, s, e):
+            if box_type in (b"mdia", b"minf", b"stbl"):
+                pending.append((payload, box_end))
+            elif box_type == b"tkhd":
+                _parse_tkhd(_read_payload(f, payload, box_end), track)
+            elif box_type == b"mdhd":
+                timescale, duration = _parse_time_header(_read_payload(f, payload, box_end))
+                if timescale and duration:
+                    track["duration"] = duration / timescale
+            elif box_type == b"hdlr":
+                track["handler"] = _read_payload(f, payload, box_end)[8:12]
+            elif box_type == b"stsd":
+                _parse_stsd(_read_payload(f, payload, box_end), track)
+    return track
+
+
+def _parse_tkhd(data, track):
+    matrix_at = 52 if data[0] == 1 else 40
+    a, b, _, c, d = struct.unpack(">5i", data[matrix_at:matrix_at + 20])
+    width, height = struct.unpack(">II", data[matrix_at + 36:matrix_at + 44])
+    width, height = width >> 16, height >> 16  # 16.16 fijo
+    if a == 0 and d == 0 and b != 0 and c != 0:
+        width, height = height, width  # rotado 90/270: tamaño de presentación
+    track["width"], track["height"] = width, height
+
+
+def _parse_stsd(data, track):
+    # version/flags (4) + entry_count (4) + primera entrada: size (4) + formato (4)
+    if len(data) < 16:
+        return
+    track["codec"] = data[12:16].decode("ascii", "replace").strip()
+    # VisualSampleEntry: 6 reservados + data_ref (2) + 16 predefinidos -> width, height
+    if len(data) >= 44:
+        track["entry_width"], track["entry_height"] = struct.unpack(">HH", data[40:44])
+
+
+# ======================================================
+# WebM / Matroska (EBML)
+# ======================================================
+
+EBML_HEADER = 0x1A45DFA3
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_TYPE = 0x83
+CODEC_ID = 0x86
+VIDEO = 0xE0
+PIXEL_WIDTH = 0xB0
+PIXEL_HEIGHT = 0xBA
+DISPLAY_WIDTH = 0x54B0
+DISPLAY_HEIGHT = 0x54BA
+CLUSTER = 0x1F43B675
+
+
+def _read_vint(f, keep_marker):
+    first = f.read(1)
+    if not first or first[0] == 0:
+        raise ProbeError("vint no válido")
+    first = first[0]
+    length, mask = 1, 0x80
+    while not first & mask:
+        mask >>= 1
+        length += 1
+    value = first if keep_marker else first & (mask - 1)
+    rest = f.read(length - 1)
+    if len(rest) != length - 1:
+        raise ProbeError("vint truncado")
+    for byte in rest:
+        value = (value << 8) | byte
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, unknown
+
+
+def iter_elements(f, start, end):
+    """(id, inicio_datos, fin) de cada elemento; fin=None si el tamaño es desconocido."""
+    pos = start
+    while pos < end:
+        f.seek(pos)
+        element_id, _ = _read_vint(f, keep_marker=True)
+        size, unknown = _read_vint(f, keep_marker=False)
+        data = f.tell()
+        if unknown:
+            yield element_id, data, None
+            return
+        if data + size > end:
+            raise ProbeError("elemento truncado")
+        yield element_id, data, data + size
+        pos = data + size
+
+
+def _read_uint(f, start, end):
+    f.seek(start)
+    return int.from_bytes(f.read(end - start), "big") if end > start else 0
+
+
+def _read_float(f, start, end):
+    f.seek(start)
+    data = f.read(end - start)
+    if len(data) == 4:
+        return struct.unpack(">f", data)[0]
+    if len(data) == 8:
+        return struct.unpack(">d", data)[0]
+    return None
+
+
+def _probe_ebml(f, size):
+    elements = iter_elements(f, 0, size)
+    element_id, _, header_end = next(elements)
+    if element_id != EBML_HEADER or header_end is None:
+        return None
+
+    for element_id, data, end in elements:
+        if element_id == SEGMENT:
+            return _parse_segment(f, data, end or size)
+    return None
+
+
+def _parse_segment(f, start, end):
+    scale, raw_duration, video = 1_000_000, None, None
+
+    for element_id, data, el_end in iter_elements(f, start, end):
+        if el_end is None or element_id == CLUSTER:
+            break  # a partir de aquí solo hay frames
+        if element_id == INFO:
+            for child, c_data, c_end in iter_elements(f, data, el_end):
+                if child == TIMECODE_SCALE and c_end:
+                    scale = _read_uint(f, c_data, c_end) or scale
+                elif child == DURATION and c_end:
+                    raw_duration = _read_float(f, c_data, c_end)
+        elif element_id == TRACKS:
+            video = _parse_tracks(f, data, el_end)
+        if video is not None and raw_duration is not None:
+            break
+
+    if video is None:
+        return None
+    duration = raw_duration * scale / 1e9 if raw_duration else None
+    return _result(video.get("width"), video.get("height"), duration, video.get("codec"))
+
+
+def _parse_tracks(f, start, end):
+    for element_id, data, el_end in iter_elements(f, start, end):
+        if element_id != TRACK_ENTRY or el_end is None:
+            continue
+        track = {}
+        for child, c_data, c_end in iter_elements(f, data, el_end):
+            if c_end is None:
+                break
+            if child == TRACK_TYPE:
+                track["type"] = _read_uint(f, c_data, c_end)
+            elif child == CODEC_ID:
+                f.seek(c_data)
+                codec = f.read(c_end - c_data).rstrip(b"\0").decode("ascii", "replace")
+                track["codec"] = codec[2:].lower() if codec.startswith("V_") else codec.lower()
+            elif child == VIDEO:
+                for v_child, v_data, v_end in iter_elements(f, c_data, c_end):
+                    if v_end is None:
+                        break
+                    if v_child == PIXEL_WIDTH:
+                        track["width"] = _read_uint(f, v_data, v_end)
+                    elif v_child == PIXEL_HEIGHT:
+                        track["height"] = _read_uint(f, v_data, v_end)
+                    elif v_child == DISPLAY_WIDTH:
+                        track["display_width"] = _read_uint(f, v_data, v_end)
+                    elif v_child == DISPLAY_HEIGHT:
+                        track["display_height"] = _read_uint(f, v_data, v_end)
+        if track.get("type") == 1:  # 1 = video
+            if track.get("display_width") and track.get("display_height"):
+                track["width"], track["height"] = track["display_width"], track["display_height"]
+            return track
+    return None
+
+
+# ======================================================
+# Imágenes: dimensiones
+# ======================================================
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# SOF0..SOF15 salvo DHT (C4), JPG (C8) y DAC (CC)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def probe_image(fileobj):
+    try:
+        start = fileobj.tell()
+        fileobj.seek(0)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+    try:
+        head = fileobj.read(32)
+        if head.startswith(PNG_SIGNATURE) and head[12:16] == b"IHDR":
+            width, height = struct.unpack(">II", head[16:24])
+        elif head[:2] == b"\xff\xd8":
+            width, height = _jpeg_size(fileobj)
+        elif head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            width, height = _webp_size(head)
+        else:
+            return None
+        if not width or not height:
+            return None
+        return {"width": int(width), "height": int(height)}
+    except (ProbeError, struct.error, IndexError):
+        return None
+    finally:
+        fileobj.seek(start)
+
+
+def _jpeg_size(f):
+    f.seek(2)
+    orientation = 1
+    while True:
+        byte = f.read(1)
+        if not byte:
+            raise ProbeError("JPEG sin SOF")
+        if byte != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":  # relleno
+            marker = f.read(1)
+        if not marker:
+            raise ProbeError("JPEG truncado")
+        code = marker[0]
+        if code in (0x01, 0xD8) or 0xD0 <= code <= 0xD7:
+            continue  # marcadores sin longitud
+        if code in (0xD9, 0xDA):
+            raise ProbeError("JPEG sin SOF antes de los datos")
+        length = struct.unpack(">H", f.read(2))[0]
+        if length < 2:
+            raise ProbeError("segmento JPEG no válido")
+        segment_end = f.tell() + length - 2
+        if code == 0xE1:
+            orientation = _exif_orientation(f.read(min(length - 2, 64 * 1024))) or orientation
+        elif code in _JPEG_SOF:
+            height, width = struct.unpack(">xHH", f.read(5))
+            if orientation in (5, 6, 7, 8):  # rotada 90/270: tamaño en pantalla
+                width, height = height, width
+            return width, height
+        f.seek(segment_end)
+
+
+def _exif_orientation(app1):
+    if not app1.startswith(b"Exif\0\0"):
+        return None
+    tiff = app1[6:]
+    endian = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if endian is None:
+        return None
+    ifd = struct.unpack(endian + "I", tiff[4:8])[0]
+    count = struct.unpack(endian + "H", tiff[ifd:ifd + 2])[0]
+    for i in range(count):
+        entry = ifd + 2 + i * 12
+        tag = struct.unpack(endian + "H", tiff[entry:entry + 2])[0]
+        if tag == 0x0112:
+            return struct.unpack(endian + "H", tiff[entry + 8:entry + 10])[0]
+    return None
+
+
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    raise ProbeError("WebP no reconocido")
+
+
+# ======================================================
+# Imágenes: placeholder (Pillow opcional)
+# ======================================================
+
+PLACEHOLDER_SIZE = 16
+_pil = None
+
+
+def _load_pillow():
+    """Pillow es opcional y se importa con la primera imagen subida."""
+    global _pil
+    if _pil is None:
+        try:
+            from PIL import Image, ImageFilter, ImageOps
+            _pil = (Image, ImageFilter, ImageOps)
+        except Exception:
+            _pil = False
+    return _pil or None
+
+
+def image_placeholder(fileobj):
+    pil = _load_pillow()
+    if pil is None:
+        return None
+    Image, ImageFilter, ImageOps = pil
+    try:
+        start = fileobj.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+    try:
+        fileobj.seek(0)
+        with Image.open(fileobj) as im:
+            im.draft("RGB", (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))  # JPEG: decodifica ya reducida
+            im = ImageOps.exif_transpose(im)
+            if im.mode in ("RGBA", "LA", "P"):
+                im = im.convert("RGBA")
+                background = Image.new("RGBA", im.size, (255, 255, 255, 255))
+                im = Image.alpha_composite(background, im)
+            im = im.convert("RGB")
+            im.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+
+            r, g, b = im.resize((1, 1), Image.Resampling.BOX).getpixel((0, 0))
+            small = im.filter(ImageFilter.GaussianBlur(0.6))
+            buf = io.BytesIO()
+            small.save(buf, "WEBP", quality=40)
+        return {
+            "placeholder": "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii"),
+            "dominant_color": f"#{r:02x}{g:02x}{b:02x}",
+        }
+    except Exception:
+        return None  # formato raro, imagen corrupta o bomba de descompresión
+    finally:
+        fileobj.seek(start)
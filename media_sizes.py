@@ -0,0 +1,45 @@
+# media_sizes.py
+"""
+CLI: flask media-sizes
+
+Rellena size_bytes/content_type de la media subida antes de que se guardaran
+al subir (el manifest y el preload los leen de la fila, nunca del disco).
+Hace un stat por archivo una sola vez. Solo recorre el storage local.
+"""
+import mimetypes
+import os
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from content_version import bump
+from models import db, ProjectImage, ProjectVideo
+from storage import LocalStorage, get_storage, key_from_url
+
+
+@click.command("media-sizes")
+@with_appcontext
+def media_sizes_command():
+    """Guarda tamaño y tipo de la media que aún no los tiene."""
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise click.ClickException("media-sizes solo recorre el backend de storage local")
+
+    filled = missing = 0
+    for model, url_attr in ((ProjectImage, "image_url"), (ProjectVideo, "video_url")):
+        for m in model.query.filter(model.size_bytes.is_(None)):
+            key = key_from_url(getattr(m, url_attr))
+            if not key:
+                continue  # URL externa
+            try:
+                m.size_bytes = os.path.getsize(storage.path(key))
+            except OSError:
+                missing += 1
+                continue
+            m.content_type = m.content_type or mimetypes.guess_type(key)[0]
+            filled += 1
+    db.session.commit()
+    if filled:
+        bump(current_app)
+    click.echo(f"Media actualizada: {filled}, archivos que faltan: {missing}")
@@ -0,0 +1,98 @@
+"""add FTS5 search index
+
+Revision ID: c1f3a9e5d7b2
+Revises: a68314837300
+Create Date: 2026-10-19 09:05:12.418203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1f3a9e5d7b2'
+down_revision = 'a68314837300'
+branch_labels = None
+depends_on = None
+
+
+# Copia congelada del esquema de search_index.py (las migraciones no importan la app)
+FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        title, body, category_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS search_category_ai AFTER INSERT ON category BEGIN
+        INSERT INTO search_index(rowid, title, body, category_id)
+        VALUES (new.id * 4 + 0, new.name, coalesce(new.description, ''), new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_category_au AFTER UPDATE OF name, description ON category BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 0;
+        INSERT INTO search_index(rowid, title, body, category_id)
+        VALUES (new.id * 4 + 0, new.name, coalesce(new.description, ''), new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_category_ad AFTER DELETE ON category BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_image_ai AFTER INSERT ON project_image
+    WHEN coalesce(new.description, '') <> '' BEGIN
+        INSERT INTO search_index(rowid, title, body, category_id)
+        VALUES (new.id * 4 + 1, '', new.description, new.category_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_image_au AFTER UPDATE OF description, category_id ON project_image BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+        INSERT INTO search_index(rowid, title, body, category_id)
+        SELECT new.id * 4 + 1, '', new.description, new.category_id
+        WHERE coalesce(new.description, '') <> '';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_image_ad AFTER DELETE ON project_image BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_video_ai AFTER INSERT ON project_video
+    WHEN coalesce(new.description, '') <> '' BEGIN
+        INSERT INTO search_index(rowid, title, body, category_id)
+        VALUES (new.id * 4 + 2, '', new.description, new.category_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_video_au AFTER UPDATE OF description, category_id ON project_video BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+        INSERT INTO search_index(rowid, title, body, category_id)
+        SELECT new.id * 4 + 2, '', new.description, new.category_id
+        WHERE coalesce(new.description, '') <> '';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_video_ad AFTER DELETE ON project_video BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+    END""",
+)
+
+BACKFILL = (
+    """INSERT INTO search_index(rowid, title, body, category_id)
+       SELECT id * 4 + 0, name, coalesce(description, ''), id FROM category""",
+    """INSERT INTO search_index(rowid, title, body, category_id)
+       SELECT id * 4 + 1, '', description, category_id FROM project_image
+       WHERE coalesce(description, '') <> ''""",
+    """INSERT INTO search_index(rowid, title, body, category_id)
+       SELECT id * 4 + 2, '', description, category_id FROM project_video
+       WHERE coalesce(description, '') <> ''""",
+)
+
+TRIGGERS = (
+    'search_category_ai', 'search_category_au', 'search_category_ad',
+    'search_image_ai', 'search_image_au', 'search_image_ad',
+    'search_video_ai', 'search_video_au', 'search_video_ad',
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return  # fuera de SQLite la búsqueda usa LIKE
+    for stmt in FTS_DDL + BACKFILL:
+        op.execute(stmt)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for name in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {name}')
+    op.execute('DROP TABLE IF EXISTS search_index')
@@ -14,6 +14,8 @@ class User(db.Model):
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=False, index=True)
     password = db.Column(db.String(255), nullable=False)
+    # Va en cada token ("ver"); subirla revoca todos los tokens emitidos antes
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
 
 
@@ -44,10 +46,63 @@ class Category(db.Model):
         cascade="all, delete-orphan",
         order_by="ProjectVideo.position"
     )
+    slug_redirects = db.relationship(
+        'CategorySlugRedirect',
+        backref='category',
+        lazy=True,
+        cascade="all, delete-orphan",
+    )
 
-    def ensure_slug(self):
+    __table_args__ = (
+        # keyset (order, id): listado público y listado por usuario
+        db.Index('ix_category_order_id', 'order', 'id'),
+        db.Index('ix_category_user_order_id', 'user_id', 'order', 'id'),
+        # índice único (no constraint) para no reconstruir la tabla en SQLite
+        db.Index('uq_category_user_slug', 'user_id', 'slug', unique=True),
+    )
+
+    def ensure_slug(self, connection=None):
         if not self.slug and self.name:
-            self.slug = slugify(self.name)
+            base = slugify(self.name)
+            self.slug = unique_slug(connection, self.user_id, base, self.id) if connection is not None else base
+
+
+def unique_slug(connection, user_id, base, exclude_id=None) -> str:
+    """base, base-2, base-3... el primero libre para ese usuario."""
+    base = base[:110]
+    q = db.select(Category.slug).where(
+        Category.user_id == user_id,
+        db.or_(Category.slug == base, Category.slug.like(f"{base}-%")),
+    )
+    # Tampoco los slugs antiguos de otras categorías: siguen redirigiendo
+    old = db.select(CategorySlugRedirect.slug).where(
+        CategorySlugRedirect.user_id == user_id,
+        db.or_(CategorySlugRedirect.slug == base, CategorySlugRedirect.slug.like(f"{base}-%")),
+    )
+    if exclude_id is not None:
+        q = q.where(Category.id != exclude_id)
+        old = old.where(CategorySlugRedirect.category_id != exclude_id)
+    taken = set(connection.execute(q).scalars()) | set(connection.execute(old).scalars())
+    if base not in taken:
+        return base
+    n = 2
+    while f"{base}-{n}" in taken:
+        n += 1
+    return f"{base}-{n}"
+
+
+# ---------------- Slugs antiguos (tras renombrar) ----------------
+class CategorySlugRedirect(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    slug = db.Column(db.String(120), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id', ondelete="CASCADE"), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'slug', name='uq_slug_redirect_user_slug'),
+    )
 
 
 # ---------------- Media: Imágenes ----------------
@@ -60,6 +115,15 @@ class ProjectImage(db.Model):
     is_carousel = db.Column(db.Boolean, nullable=False, default=False, index=True)
     slide_key = db.Column(db.String(64), nullable=True, index=True)
 
+    # Al subir (media_probe): tamaño para reservar el hueco y placeholder borroso
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    placeholder = db.Column(db.Text, nullable=True)         # data URI de unos cientos de bytes
+    dominant_color = db.Column(db.String(7), nullable=True)  # "#rrggbb"
+    # Del archivo subido (manifest y preload sin stat por petición)
+    size_bytes = db.Column(db.BigInteger, nullable=True)
+    content_type = db.Column(db.String(100), nullable=True)
+
     created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
 
@@ -67,6 +131,7 @@ class ProjectImage(db.Model):
 
     __table_args__ = (
         db.Index('ix_img_cat_slide', 'category_id', 'slide_key'),
+        db.Index('ix_img_cat_pos_id', 'category_id', 'position', 'id'),  # keyset (position, id)
     )
 
 
@@ -80,6 +145,15 @@ class ProjectVideo(db.Model):
     is_carousel = db.Column(db.Boolean, nullable=False, default=False, index=True)
     slide_key = db.Column(db.String(64), nullable=True, index=True)
 
+    # Metadatos leídos de la cabecera al subir (media_probe); None si es una URL externa
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    duration = db.Column(db.Float, nullable=True)
+    codec = db.Column(db.String(32), nullable=True)
+    # Del archivo subido (manifest y preload sin stat por petición)
+    size_bytes = db.Column(db.BigInteger, nullable=True)
+    content_type = db.Column(db.String(100), nullable=True)
+
     created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
 
@@ -87,6 +161,7 @@ class ProjectVideo(db.Model):
 
     __table_args__ = (
         db.Index('ix_vid_cat_slide', 'category_id', 'slide_key'),
+        db.Index('ix_vid_cat_pos_id', 'category_id', 'position', 'id'),  # keyset (position, id)
     )
 
 
@@ -97,12 +172,26 @@ class Message(db.Model):
     last_name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), nullable=False, index=True)
     content = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    # callable: cada mensaje con su hora, no la de arranque del proceso
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     is_read = db.Column(db.Boolean, default=False)
 
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     user = db.relationship('User', backref=db.backref('messages', lazy=True))
 
+    __table_args__ = (
+        # bandeja: no leídos / todos, del más reciente al más antiguo (keyset)
+        db.Index('ix_message_user_read_created', 'user_id', 'is_read', 'created_at', 'id'),
+        db.Index('ix_message_user_created', 'user_id', 'created_at', 'id'),
+    )
+
+
+# ---------------- Envíos recientes del formulario (anti-duplicados) ----------------
+class MessageDedup(db.Model):
+    # sha256 de email + contenido normalizado; la PK hace de cerrojo entre workers
+    key = db.Column(db.String(64), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
 
 # ---------------- CV (uno por usuario) ----------------
 class CV(db.Model):
@@ -143,14 +232,32 @@ class ContactPage(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
 
 
+# ---------------- Diario de borrados de archivos ----------------
+class PendingDeletion(db.Model):
+    # Se escribe en la misma transacción que borra la fila dueña del archivo;
+    # el unlink lo hace file_deletions.py después del commit
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(512), nullable=False)  # key del storage ("projects/images/a.png")
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+
+# ---------------- Tokens revocados (logout) ----------------
+class RevokedToken(db.Model):
+    """jti de tokens revocados uno a uno; la fila sobra cuando el token caduca."""
+    jti = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
 # ---------------- Hooks ----------------
 from sqlalchemy import event
 
 @event.listens_for(Category, "before_insert")
 def set_slug_before_insert(mapper, connection, target: Category):
-    target.ensure_slug()
+    target.ensure_slug(connection)
 
 @event.listens_for(Category, "before_update")
 def set_slug_before_update(mapper, connection, target: Category):
     if not target.slug:
-        target.ensure_slug()
+        target.ensure_slug(connection)
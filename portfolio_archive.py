@@ -0,0 +1,472 @@
+# portfolio_archive.py
+"""
+Exportación / importación del portfolio en un único tar:
+
+    manifest.json     categorías con su media, página de contacto, redes y CV
+    files/<key>       cada archivo de /uploads que referencia el manifest
+
+- Exportar: el tar se genera al vuelo (cabeceras con TarInfo.tobuf y el
+  contenido por bloques desde el storage), nunca entero en memoria. Como los
+  tamaños se conocen de antemano, también se sabe el Content-Length.
+- Importar: se lee como stream (tarfile "r|*", sin seek). manifest.json tiene
+  que ir primero; solo se aceptan los archivos que lista. Cada uno se vuelca
+  a UPLOADS_DIR/.tmp calculando su sha256: si ya existe un archivo idéntico
+  con esa key se descarta el temporal (dedupe); si existe con otro contenido
+  se guarda con otra key y se reescriben las URLs. Las filas se crean en una
+  sola transacción al final.
+
+No se exportan los mensajes ni los slugs antiguos de las categorías.
+"""
+import hashlib
+import json
+import os
+import posixpath
+import tarfile
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from content_version import bump
+from file_deletions import schedule_deletion
+from models import (db, User, Category, ProjectImage, ProjectVideo, ContactPage,
+                    SocialLink, CV, slugify, unique_slug)
+from storage import LocalStorage, get_storage, key_from_url, url_for_key
+
+FORMAT = "portfolio-archive"
+VERSION = 1
+MANIFEST_NAME = "manifest.json"
+FILES_PREFIX = "files/"
+MAX_MANIFEST_BYTES = 32 * 1024 * 1024
+CHUNK = 1024 * 1024
+BLOCK = tarfile.BLOCKSIZE
+
+MEDIA_FIELDS = ("description", "position", "is_carousel", "slide_key", "width", "height",
+                "size_bytes", "content_type")
+IMAGE_FIELDS = MEDIA_FIELDS + ("placeholder", "dominant_color")
+VIDEO_FIELDS = MEDIA_FIELDS + ("duration", "codec")
+CONTACT_FIELDS = ("title", "intro", "body", "footer_note", "hero_image_url")
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+# ======================================================
+# Exportar
+# ======================================================
+
+def build_manifest(user_id):
+    storage = get_storage()
+    sizes = {}
+
+    def ref(url):
+        key = key_from_url(url)
+        if key and _safe_key(key) and key not in sizes:
+            sizes[key] = storage.size(key)
+        return url
+
+    categories = []
+    for c in Category.query.filter_by(user_id=user_id).order_by(Category.order, Category.id):
+        media = [
+            {"type": "image", "url": ref(m.image_url), **{f: getattr(m, f) for f in IMAGE_FIELDS}}
+            for m in c.images
+        ] + [
+            {"type": "video", "url": ref(m.video_url), **{f: getattr(m, f) for f in VIDEO_FIELDS}}
+            for m in c.videos
+        ]
+        media.sort(key=lambda m: (m["position"] or 0, m["type"]))
+        categories.append({
+            "name": c.name,
+            "slug": c.slug,
+            "description": c.description,
+            "order": c.order,
+            "media": media,
+        })
+
+    contact = None
+    cp = ContactPage.query.filter_by(user_id=user_id).first()
+    if cp:
+        contact = {f: getattr(cp, f) for f in CONTACT_FIELDS}
+        ref(cp.hero_image_url)
+        try:
+            blocks = json.loads(cp.videos_json or "[]")
+        except ValueError:
+            blocks = []
+        contact["blocks"] = [b for b in blocks if isinstance(b, dict)] if isinstance(blocks, list) else []
+        for b in contact["blocks"]:
+            ref(b.get("url"))
+
+    cv = CV.query.filter_by(user_id=user_id).first()
+
+    return {
+        "format": FORMAT,
+        "version": VERSION,
+        "exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "categories": categories,
+        "contact_page": contact,
+        "socials": [{"platform": s.platform, "url": s.url}
+                    for s in SocialLink.query.filter_by(user_id=user_id).order_by(SocialLink.id)],
+        "cv": {"url": ref(cv.file_path)} if cv else None,
+        "files": {k: n for k, n in sorted(sizes.items()) if n is not None},
+        "missing": sorted(k for k, n in sizes.items() if n is None),
+    }
+
+
+def _header(name, size, mtime):
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    return info.tobuf(format=tarfile.PAX_FORMAT)
+
+
+def _padding(size):
+    return b"\0" * (-size % BLOCK)
+
+
+def archive_plan(manifest):
+    """[(cabecera, bytes del manifest o key, tamaño)] en el orden del tar."""
+    data = json.dumps(manifest, ensure_ascii=False, indent=1, default=str).encode("utf-8")
+    now = time.time()
+    plan = [(_header(MANIFEST_NAME, len(data), now), data, len(data))]
+    for key, size in manifest["files"].items():
+        plan.append((_header(FILES_PREFIX + key, size, now), key, size))
+    return plan
+
+
+def archive_size(plan):
+    return sum(len(h) + size + len(_padding(size)) for h, _, size in plan) + 2 * BLOCK
+
+
+def iter_archive(plan, storage):
+    for header, source, size in plan:
+        yield header
+        if isinstance(source, bytes):
+            yield source
+        else:
+            remaining = size
+            with closing(storage.open(source)) as fh:
+                while remaining:
+                    block = fh.read(min(CHUNK, remaining))
+                    if not block:
+                        # El tar queda truncado a propósito: mejor que uno válido con datos malos
+                        raise ArchiveError(f"{source} ha cambiado durante la exportación")
+                    remaining -= len(block)
+                    yield block
+        yield _padding(size)
+    yield b"\0" * (2 * BLOCK)
+
+
+# ======================================================
+# Importar
+# ======================================================
+
+def _safe_key(key):
+    parts = key.split("/")
+    if "\\" in key or any(not p or p.startswith(".") for p in parts):
+        return None
+    return key
+
+
+def _alt_key(key, n):
+    base, ext = posixpath.splitext(key)
+    return f"{base}-{n}{ext}"
+
+
+def _same_file(storage, key, size, digest):
+    if storage.size(key) != size:
+        return False
+    h = hashlib.sha256()
+    with open(storage.path(key), "rb") as fh:
+        for block in iter(lambda: fh.read(CHUNK), b""):
+            h.update(block)
+    return h.hexdigest() == digest
+
+
+def _store_file(storage, key, stream):
+    """Guarda un archivo del tar; devuelve (key final, ¿ya existía igual?)."""
+    if not isinstance(storage, LocalStorage):
+        # Sin hash barato en remoto: si la key está ocupada va con otra
+        final, n = key, 2
+        while storage.exists(final):
+            final, n = _alt_key(key, n), n + 1
+        storage.save(stream, final)
+        return final, False
+
+    tmp = storage.spool_file()
+    try:
+        h, size = hashlib.sha256(), 0
+        for block in iter(lambda: stream.read(CHUNK), b""):
+            h.update(block)
+            tmp.write(block)
+            size += len(block)
+        digest = h.hexdigest()
+
+        final, n = key, 2
+        while storage.exists(final):
+            if _same_file(storage, final, size, digest):
+                return final, True
+            final, n = _alt_key(key, n), n + 1
+        storage.save(tmp, final)  # está en .tmp: se publica con os.replace
+        return final, False
+    finally:
+        tmp.close()
+        try:
+            os.remove(tmp.name)
+        except FileNotFoundError:
+            pass
+
+
+def _read_manifest(tar, member):
+    if member.size > MAX_MANIFEST_BYTES:
+        raise ArchiveError("manifest.json demasiado grande")
+    try:
+        manifest = json.loads(tar.extractfile(member).read().decode("utf-8"))
+    except ValueError:
+        raise ArchiveError("manifest.json no es JSON válido")
+    if not isinstance(manifest, dict) or manifest.get("format") != FORMAT:
+        raise ArchiveError("El archivo no es una exportación del portfolio")
+    if manifest.get("version") != VERSION:
+        raise ArchiveError(f"Versión de exportación no soportada: {manifest.get('version')}")
+    try:
+        # Antes de escribir ningún archivo: nada de '/uploads/../…' ni rutas raras
+        for u in _manifest_urls(manifest):
+            _check_url(u)
+    except (AttributeError, TypeError):
+        raise ArchiveError("manifest.json con una estructura no válida") from None
+    return manifest
+
+
+def _text(v, max_len=None):
+    if v is None:
+        return None
+    v = str(v)
+    return v[:max_len] if max_len else v
+
+
+# Tipo (o longitud máxima del texto) de cada campo de media del manifest
+_MEDIA_TYPES = {
+    "position": int, "width": int, "height": int, "size_bytes": int, "duration": float, "is_carousel": bool,
+    "slide_key": 64, "content_type": 100, "codec": 32, "dominant_color": 7,
+}
+
+
+def _media_kwargs(m, fields):
+    out = {}
+    for f in fields:
+        v = m.get(f)
+        if v is None:
+            continue
+        kind = _MEDIA_TYPES.get(f)
+        try:
+            if kind is bool:
+                out[f] = v if isinstance(v, bool) else str(v).strip().lower() in ("1", "true")
+            elif kind in (int, float):
+                out[f] = kind(v)
+            else:
+                out[f] = _text(v, kind)
+        except (TypeError, ValueError):
+            raise ArchiveError(f"Valor no válido para {f}: {v!r}") from None
+    out.setdefault("position", 0)
+    out.setdefault("is_carousel", False)
+    return out
+
+
+def _manifest_urls(manifest):
+    for c in manifest.get("categories") or []:
+        for m in c.get("media") or []:
+            yield m.get("url")
+    contact = manifest.get("contact_page") or {}
+    yield contact.get("hero_image_url")
+    for b in contact.get("blocks") or []:
+        yield b.get("url")
+    yield (manifest.get("cv") or {}).get("url")
+
+
+def _check_url(u):
+    """URL del manifest: externa (http/https) o una key de /uploads válida."""
+    if not u:
+        return u
+    if not isinstance(u, str):
+        raise ArchiveError(f"URL no válida en el manifest: {u!r}")
+    if u.startswith(("http://", "https://")):
+        return u
+    key = key_from_url(u)
+    if not key or not _safe_key(key):
+        raise ArchiveError(f"URL no válida en el manifest: {u!r}")
+    return u
+
+
+def apply_manifest(manifest, user_id, remap, replace=False):
+    """Crea las filas del manifest (una transacción). `remap`: key del tar -> key guardada."""
+    from routes.contact import _safe_blocks
+    from routes.socials import ALLOWED, normalize_url
+
+    def url(u):
+        key = key_from_url(_check_url(u))
+        return url_for_key(remap[key]) if key in remap else u
+
+    if replace:
+        for c in Category.query.filter_by(user_id=user_id):
+            for m in c.images:
+                schedule_deletion(m.image_url)
+            for m in c.videos:
+                schedule_deletion(m.video_url)
+            db.session.delete(c)
+        db.session.flush()
+
+    next_order = (db.session.query(db.func.max(Category.order))
+                  .filter(Category.user_id == user_id).scalar() or 0) + 1
+    counts = {"categories": 0, "media": 0}
+    for i, c in enumerate(manifest.get("categories") or []):
+        name = _text(c.get("name"), 100)
+        if not name:
+            raise ArchiveError(f"Categoría {i + 1} sin nombre")
+        category = Category(name=name, description=_text(c.get("description")),
+                            order=next_order + i, user_id=user_id)
+        category.slug = unique_slug(db.session.connection(), user_id, slugify(c.get("slug") or name))
+        db.session.add(category)
+        db.session.flush()  # el siguiente unique_slug tiene que ver este
+        counts["categories"] += 1
+
+        for m in c.get("media") or []:
+            if m.get("type") == "image" and m.get("url"):
+                db.session.add(ProjectImage(image_url=url(m["url"]), category_id=category.id,
+                                            **_media_kwargs(m, IMAGE_FIELDS)))
+            elif m.get("type") == "video" and m.get("url"):
+                db.session.add(ProjectVideo(video_url=url(m["url"]), category_id=category.id,
+                                            **_media_kwargs(m, VIDEO_FIELDS)))
+            else:
+                continue
+            counts["media"] += 1
+
+    for s in manifest.get("socials") or []:
+        platform = (s.get("platform") or "").lower().strip()
+        link = normalize_url(s.get("url") or "")
+        if platform not in ALLOWED or not link:
+            continue
+        row = SocialLink.query.filter_by(user_id=user_id, platform=platform).first()
+        if row:
+            row.url = link
+        else:
+            db.session.add(SocialLink(platform=platform, url=link, user_id=user_id))
+
+    contact = manifest.get("contact_page")
+    if contact:
+        cp = ContactPage.query.filter_by(user_id=user_id).first()
+        if cp is None:
+            cp = ContactPage(user_id=user_id)
+            db.session.add(cp)
+        cp.title = _text(contact.get("title"), 200) or "Contacto"
+        cp.intro = _text(contact.get("intro")) or ""
+        cp.body = _text(contact.get("body")) or ""
+        cp.footer_note = _text(contact.get("footer_note")) or ""
+        cp.hero_image_url = url(contact.get("hero_image_url"))
+        blocks = [dict(b, url=url(b.get("url"))) if b.get("url") else b
+                  for b in contact.get("blocks") or [] if isinstance(b, dict)]
+        cp.videos_json = json.dumps(_safe_blocks(blocks), ensure_ascii=False)
+
+    cv = manifest.get("cv")
+    if cv and cv.get("url"):
+        path = url(cv["url"])
+        row = CV.query.filter_by(user_id=user_id).first()
+        if row is None:
+            db.session.add(CV(file_path=path, user_id=user_id, uploaded_at=datetime.now(timezone.utc)))
+        elif row.file_path != path:
+            schedule_deletion(row.file_path)
+            row.file_path = path
+            row.uploaded_at = datetime.now(timezone.utc)
+
+    db.session.commit()
+    return counts
+
+
+def import_archive(fileobj, user_id, replace=False):
+    """Importa un tar (stream, sin seek) para `user_id`; devuelve un resumen."""
+    storage = get_storage()
+    manifest, remap = None, {}
+    stats = {"files": 0, "deduplicated": 0, "renamed": 0, "skipped": 0}
+
+    with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+        for member in tar:
+            if manifest is None:
+                if member.name != MANIFEST_NAME or not member.isfile():
+                    raise ArchiveError("manifest.json tiene que ser el primer elemento del archivo")
+                manifest = _read_manifest(tar, member)
+                listed = manifest.get("files") or {}
+                continue
+
+            key = member.name[len(FILES_PREFIX):] if member.name.startswith(FILES_PREFIX) else None
+            if not member.isfile() or not key or key not in listed or not _safe_key(key):
+                stats["skipped"] += 1
+                continue
+
+            final, existed = _store_file(storage, key, tar.extractfile(member))
+            stats["files"] += 1
+            if existed:
+                stats["deduplicated"] += 1
+            if final != key:
+                remap[key] = final
+                stats["renamed"] += 1
+
+    if manifest is None:
+        raise ArchiveError("Archivo vacío")
+    try:
+        stats.update(apply_manifest(manifest, user_id, remap, replace))
+    except (AttributeError, TypeError, ValueError) as e:
+        # Los archivos ya publicados sin fila los recoge uploads-gc
+        db.session.rollback()
+        if isinstance(e, ArchiveError):
+            raise
+        raise ArchiveError(f"manifest.json no válido: {e}") from None
+    except Exception:
+        db.session.rollback()
+        raise
+    return stats
+
+
+# ======================================================
+# CLI: flask portfolio-export / portfolio-import
+# ======================================================
+
+def _user_id(user_id):
+    user = db.session.get(User, user_id) if user_id else User.query.order_by(User.id).first()
+    if user is None:
+        raise click.ClickException("Usuario no encontrado")
+    return user.id
+
+
+@click.command("portfolio-export")
+@click.argument("path", type=click.Path(dir_okay=False, allow_dash=True))
+@click.option("--user-id", type=int, help="Por defecto, el primer usuario")
+@with_appcontext
+def portfolio_export_command(path, user_id):
+    """Exporta el portfolio a un tar (PATH, o - para stdout)."""
+    manifest = build_manifest(_user_id(user_id))
+    plan = archive_plan(manifest)
+    with click.open_file(path, "wb") as out:
+        for block in iter_archive(plan, get_storage()):
+            out.write(block)
+    if path != "-":
+        click.echo(f"Exportado: {len(manifest['categories'])} categorías, {len(manifest['files'])} archivos, "
+                   f"{archive_size(plan) / 1e6:.1f} MB, archivos que faltan: {len(manifest['missing'])}")
+
+
+@click.command("portfolio-import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.option("--user-id", type=int, help="Por defecto, el primer usuario")
+@click.option("--replace", is_flag=True, help="Borra antes las categorías existentes")
+@with_appcontext
+def portfolio_import_command(path, user_id, replace):
+    """Importa un tar generado por portfolio-export."""
+    with click.open_file(path, "rb") as fh:
+        try:
+            stats = import_archive(fh, _user_id(user_id), replace)
+        except (ArchiveError, tarfile.TarError) as e:
+            raise click.ClickException(str(e))
+    bump(current_app)
+    click.echo(", ".join(f"{k}: {v}" for k, v in stats.items()))
@@ -0,0 +1,111 @@
+# public_cache.py
+"""
+Caché por proceso de las respuestas públicas (GET sin autenticación).
+
+- Clave: vista + ruta con query string. Solo se guardan los 200 y el cuerpo
+  sin comprimir; la compresión (y su propia caché) va después, en
+  after_request.
+- No hay invalidación por entrada: cuando cambia la generación de contenido
+  (content_version) se vacía entera. La llena también el warm-up.
+- Cada vaciado sube `epoch`. Una respuesta solo se guarda si el epoch no ha
+  cambiado desde que empezó a generarse: si otro hilo vació la caché mientras
+  tanto, el cuerpo puede venir de filas viejas y no se guarda.
+- LRU acotada por número de entradas y por bytes.
+- En un acierto se reenvían como 103 Early Hints los Link rel=preload
+  guardados: la vista, que es quien los manda en un fallo, no se ejecuta.
+"""
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from content_version import on_change
+
+_KEPT_HEADERS = ("Content-Type", "ETag", "Cache-Control", "Link", "Content-Location")
+
+
+class PublicResponseCache:
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.epoch = 0
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry, max_entries, max_bytes, epoch=None):
+        size = len(entry[1])
+        if size > max_bytes:
+            return
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return  # generada antes de un vaciado
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[key] = entry
+            self._bytes += size
+            while self._entries and (len(self._entries) > max_entries or self._bytes > max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.epoch += 1
+
+
+def send_early_hints(links):
+    """103 Early Hints si el servidor lo expone (gunicorn: environ['wsgi.early_hints'])."""
+    early_hints = request.environ.get("wsgi.early_hints")
+    if not links or early_hints is None:
+        return
+    try:
+        early_hints([("Link", link) for link in links])
+    except Exception:
+        pass  # p. ej. cliente HTTP/1.0: se queda solo con las cabeceras de la respuesta
+
+
+public_cache = PublicResponseCache()
+on_change(public_cache.clear)
+
+
+def cached_public(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        cfg = current_app.config
+        if request.method != "GET" or not cfg.get("PUBLIC_CACHE_ENABLED", True):
+            return view(*args, **kwargs)
+
+        key = (view.__name__, request.full_path)
+        entry = public_cache.get(key)
+        if entry is not None:
+            headers, body = entry
+            send_early_hints([v for h, v in headers if h == "Link" and "rel=preload" in v])
+            resp = current_app.response_class(body, status=200, headers=headers)
+            return resp.make_conditional(request) if "ETag" in resp.headers else resp
+
+        epoch = public_cache.epoch
+        resp = make_response(view(*args, **kwargs))
+        if resp.status_code == 200 and not resp.direct_passthrough and not resp.is_streamed:
+            headers = [(h, v) for h in _KEPT_HEADERS for v in resp.headers.getlist(h)]
+            public_cache.put(
+                key, (headers, resp.get_data()),
+                int(cfg.get("PUBLIC_CACHE_MAX_ENTRIES", 200)),
+                int(cfg.get("PUBLIC_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+                epoch=epoch,
+            )
+        return resp
+
+    return wrapper
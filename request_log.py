@@ -0,0 +1,306 @@
+# request_log.py
+"""
+Logging estructurado sin bloquear las peticiones:
+
+- Los hilos de las peticiones solo encolan (QueueHandler con put_nowait; si
+  la cola está llena el registro se descarta y se cuenta, nunca se espera).
+- Un QueueListener por proceso escribe líneas JSON en LOG_FILE ("-" = stderr)
+  con rotación por tamaño y por día a la vez.
+- Cada petición lleva un id (X-Request-ID de entrada si es válido, si no uno
+  nuevo) que se devuelve en la respuesta y se añade a todos los registros que
+  se emitan mientras dura.
+- Log de acceso (logger "access"): método, ruta, status, latencia y tiempo en
+  BD (eventos de cursor de SQLAlchemy). Los 2xx/3xx rápidos se pueden muestrear
+  con LOG_SUCCESS_SAMPLE_RATE; errores y peticiones lentas van siempre.
+
+Con gunicorn --preload el listener arrancado en el master no sobrevive al
+fork: cada hijo crea su propia cola y su propio hilo (os.register_at_fork).
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+access_logger = logging.getLogger("access")
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+# Atributos estándar de LogRecord: lo demás viene de extra= y va al JSON
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+
+# ======================================================
+# Formato y rotación
+# ======================================================
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """Rota a medianoche y además al pasar de max_bytes. Los archivos del
+       mismo día llevan un contador (app.jsonl.2024-05-01.001). Si otro
+       worker ya rotó el archivo, este solo lo reabre."""
+
+    def __init__(self, filename, max_bytes=0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+
+    def _open(self):
+        # La carpeta se crea al escribir el primer registro (hilo del listener,
+        # ya en el worker), no al crear la app
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+    def _rotated_elsewhere(self):
+        if self.stream is None:
+            return False
+        try:
+            st = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        own = os.fstat(self.stream.fileno())
+        return (st.st_dev, st.st_ino) != (own.st_dev, own.st_ino)
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes and self.stream is not None:
+            self.stream.seek(0, os.SEEK_END)
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def rotation_filename(self, default_name):
+        name, n = default_name, 0
+        while os.path.exists(name):
+            n += 1
+            name = f"{default_name}.{n:03d}"
+        return name
+
+    def doRollover(self):
+        if self._rotated_elsewhere():
+            self.stream.close()
+            self.stream = self._open()
+            self.rolloverAt = self.computeRollover(int(time.time()))
+            return
+        super().doRollover()
+
+
+# ======================================================
+# Cola
+# ======================================================
+
+class NonBlockingQueueHandler(QueueHandler):
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+    def prepare(self, record):
+        # Como QueueHandler.prepare, pero la traza va aparte ("exc") en lugar
+        # de pegarse al mensaje
+        record = copy.copy(record)
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+        record.msg = record.message = record.getMessage()
+        record.args = record.exc_info = record.stack_info = None
+        record.exc_text = exc_text
+        return record
+
+
+class RequestIdFilter(logging.Filter):
+    """Se ejecuta en el hilo que emite, así ve el contexto de la petición."""
+
+    def filter(self, record):
+        if getattr(record, "request_id", None) is None and has_request_context():
+            record.request_id = g.get("request_id")
+        return True
+
+
+_pipeline = None
+
+
+def _build_handler(app):
+    target = app.config.get("LOG_FILE") or "-"
+    if target == "-":
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        handler = SizedTimedRotatingFileHandler(
+            target,
+            max_bytes=int(app.config.get("LOG_MAX_BYTES", 0)),
+            when=app.config.get("LOG_ROTATE_WHEN", "midnight"),
+            backupCount=int(app.config.get("LOG_BACKUP_COUNT", 14)),
+            encoding="utf-8",
+            delay=True,
+        )
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def _start_pipeline(app):
+    global _pipeline
+    if _pipeline is not None:
+        return _pipeline
+
+    log_queue = queue.Queue(int(app.config.get("LOG_QUEUE_SIZE", 10000)))
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    handler = _build_handler(app)
+
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(app.config.get("LOG_LEVEL", "INFO"))
+
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    _pipeline = {"queue_handler": queue_handler, "handler": handler, "listener": listener}
+    return _pipeline
+
+
+def _restart_after_fork():
+    # El hilo del listener no existe en el hijo y la cola pudo quedar a medias
+    if _pipeline is None:
+        return
+    old_queue = _pipeline["queue_handler"].queue
+    new_queue = queue.Queue(old_queue.maxsize)
+    _pipeline["queue_handler"].queue = new_queue
+    _pipeline["listener"] = QueueListener(new_queue, _pipeline["handler"], respect_handler_level=True)
+    _pipeline["listener"].start()
+
+
+def _stop_pipeline():
+    # Vacía la cola al salir del proceso
+    if _pipeline is not None:
+        try:
+            _pipeline["listener"].stop()
+        except Exception:
+            pass
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(_stop_pipeline)
+
+
+# ======================================================
+# Tiempo en BD
+# ======================================================
+
+_db_events_registered = False
+
+
+def _register_db_timing():
+    global _db_events_registered
+    if _db_events_registered:
+        return
+    _db_events_registered = True
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("log_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["log_query_start"].pop()
+        if has_request_context() and "db_stats" in g:
+            g.db_stats[0] += elapsed
+            g.db_stats[1] += 1
+
+    @event.listens_for(Engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("log_query_start"):
+            conn.info["log_query_start"].pop()
+
+
+# ======================================================
+# Petición
+# ======================================================
+
+def request_id_from(incoming) -> str:
+    """X-Request-ID de entrada si es válido; si no, uno nuevo."""
+    return incoming if incoming and _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+
+
+def log_access(config, method, path, status, latency_ms, route=None,
+               db_seconds=0.0, db_queries=0, request_id=None):
+    """Registro del logger "access", con el muestreo de LOG_SUCCESS_SAMPLE_RATE.
+       También lo usa la ruta nativa de /uploads de asgi.py, que no pasa por Flask."""
+    rate = float(config.get("LOG_SUCCESS_SAMPLE_RATE", 1.0))
+    slow = latency_ms >= float(config.get("LOG_SLOW_MS", 1000))
+    sampled = status < 400 and not slow and rate < 1.0
+    if sampled and random.random() >= rate:
+        return
+
+    access_logger.info(
+        "%s %s %s", method, path, status,
+        extra={
+            "method": method,
+            "route": route,
+            "path": path,
+            "status": status,
+            "latency_ms": round(latency_ms, 2),
+            "db_ms": round(db_seconds * 1000, 2),
+            "db_queries": db_queries,
+            "sample_rate": rate if sampled else None,
+            "request_id": request_id,  # None: lo pone RequestIdFilter desde g
+        },
+    )
+
+
+def init_logging(app):
+    _start_pipeline(app)
+    _register_db_timing()
+
+    @app.before_request
+    def _start_request_log():
+        g.request_id = request_id_from(request.headers.get("X-Request-ID", ""))
+        g.request_started = time.perf_counter()
+        g.db_stats = [0.0, 0]
+
+    # Registrado antes que el resto de after_request: se ejecuta el último y
+    # la latencia incluye compresión, CORS, etc.
+    @app.after_request
+    def _access_log(response):
+        started = g.get("request_started")
+        if started is None:
+            return response
+        response.headers["X-Request-ID"] = g.request_id
+        db_seconds, db_queries = g.db_stats
+        log_access(
+            app.config, request.method, request.path, response.status_code,
+            (time.perf_counter() - started) * 1000,
+            route=request.url_rule.rule if request.url_rule else None,
+            db_seconds=db_seconds, db_queries=db_queries,
+        )
+        return response
@@ -1,8 +1,9 @@
 from flask import Blueprint, request, jsonify
 from models import User, db
 from flask_bcrypt import Bcrypt
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from werkzeug.security import check_password_hash, generate_password_hash  # <- IMPORTANTE
+from token_revocation import issue_token, revoke_token, revoke_user_tokens
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -13,14 +14,13 @@ def login():
     data = request.json
     user = User.query.filter_by(email=data['email']).first()
     if user and check_password_hash(user.password, data['password']):
-        token = create_access_token(identity=str(user.id))  # JWT necesita string
+        token = issue_token(user)
         return jsonify({"token": token}), 200
     return jsonify({"error": "Credenciales inválidas"}), 401
 
 @auth_bp.route('/change-password', methods=['PUT'])
 @jwt_required()
 def change_password():
-    print("Endpoint /auth/change-password llamado")
     user_id = get_jwt_identity()
     user = User.query.get(user_id)
 
@@ -38,6 +38,22 @@ def change_password():
 
     # Hashear nueva contraseña usando werkzeug
     user.password = generate_password_hash(data['new_password'])
-    db.session.commit()
+    # Los tokens emitidos con la contraseña anterior dejan de valer (mismo commit)
+    revoke_user_tokens(user)
 
-    return jsonify({"message": "Contraseña actualizada exitosamente"}), 200
+    return jsonify({"message": "Contraseña actualizada exitosamente", "token": issue_token(user)}), 200
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    revoke_token(get_jwt())
+    return jsonify({"message": "Sesión cerrada"}), 200
+
+@auth_bp.route('/logout-all', methods=['POST'])
+@jwt_required()
+def logout_all():
+    user = User.query.get(get_jwt_identity())
+    if not user:
+        return jsonify({"error": "Usuario no encontrado"}), 404
+    revoke_user_tokens(user)
+    return jsonify({"message": "Todas las sesiones cerradas"}), 200
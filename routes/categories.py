@@ -1,41 +1,95 @@
-from flask import Blueprint, request, jsonify, send_from_directory, current_app
-from models import Category, ProjectImage, ProjectVideo, db
+from flask import Blueprint, request, jsonify, make_response, current_app
+from models import Category, CategorySlugRedirect, ProjectImage, ProjectVideo, db, slugify, unique_slug
+from sqlalchemy import and_, or_, tuple_
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
+from storage import LocalStorage, get_storage, key_from_url, public_url
+from media_probe import image_placeholder, probe_image, probe_video
+from faststart import schedule_faststart
+from content_version import bump_on_write, on_change
+from file_deletions import schedule_deletion
+from public_cache import cached_public, send_early_hints
 import os
+import mimetypes
+import base64, json
 import time, random, string
 
 categories_bp = Blueprint('categories', __name__)
+bump_on_write(categories_bp)
 
 # === CONFIG / HELPERS =========================================================
 
 ALLOWED_IMG = {'.png', '.jpg', '.jpeg', '.webp'}
 ALLOWED_VID = {'.mp4', '.webm', '.ogg'}
 
-def uploads_root():
-    # Define en config.py: UPLOADS_DIR = os.path.join(BASE_DIR, "uploads")
-    return current_app.config.get("UPLOADS_DIR", os.path.join(current_app.root_path, "uploads"))
-
-def abs_path(*parts):
-    return os.path.join(uploads_root(), *parts)
-
 def rel_url(*parts):
     return "/uploads/" + "/".join(parts)
 
-def ensure_dirs():
-    os.makedirs(abs_path("projects", "images"), exist_ok=True)
-    os.makedirs(abs_path("projects", "videos"), exist_ok=True)
+def save_upload(f, *parts) -> str:
+    """Guarda el archivo subido en el backend de storage y devuelve su URL /uploads/..."""
+    get_storage().save(f, "/".join(parts), content_type=getattr(f, "mimetype", None))
+    return rel_url(*parts)
+
+VIDEO_META_FIELDS = ("width", "height", "duration", "codec")
+IMAGE_META_FIELDS = ("width", "height", "placeholder", "dominant_color")
+FILE_META_FIELDS = ("size_bytes", "content_type")
+
+def file_meta(f) -> dict:
+    """Tamaño y tipo del archivo subido, para guardarlos en la fila."""
+    stream = f.stream
+    pos = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(pos)
+    content_type = mimetypes.guess_type(f.filename or "")[0] or getattr(f, "mimetype", None) or None
+    return {"size_bytes": size, "content_type": content_type}
+
+def probe_upload(f, media_type="video") -> dict:
+    """Metadatos del archivo subido, antes de guardarlo: cabeceras y, en
+       imágenes, el placeholder. Siempre devuelve todas las claves (None si no se sabe)."""
+    if media_type == "image":
+        meta = {**(probe_image(f.stream) or {}), **(image_placeholder(f.stream) or {})}
+        fields = IMAGE_META_FIELDS
+    else:
+        meta = probe_video(f.stream) or {}
+        fields = VIDEO_META_FIELDS
+    return {**{k: meta.get(k) for k in fields}, **file_meta(f)}
+
+def faststart_upload(url_rel: str):
+    """MP4 con moov al final: se reescribe en segundo plano (solo storage local)."""
+    storage = get_storage()
+    key = key_from_url(url_rel)
+    if key and isinstance(storage, LocalStorage):
+        schedule_faststart(current_app._get_current_object(), storage.path(key))
 
 def remove_local_if_needed(rel_url_path: str):
-    # si empieza por /uploads/ lo borro del disco
-    if rel_url_path and rel_url_path.startswith("/uploads/"):
-        rel = rel_url_path.replace("/uploads/", "")
-        full = abs_path(rel)
-        if os.path.exists(full):
-            try:
-                os.remove(full)
-            except Exception:
-                pass
+    # si empieza por /uploads/ se apunta en el diario de borrados (misma
+    # transacción); el archivo se borra después del commit, fuera de la petición
+    schedule_deletion(rel_url_path)
+
+def unique_filename(filename: str) -> str:
+    ext = os.path.splitext(secure_filename(filename or ""))[1].lower()
+    rnd = ''.join(random.choices(string.ascii_lowercase + string.digits, k=5))
+    return f"{int(time.time())}_{rnd}{ext}"
+
+def presign_media_upload(folder, allowed_ext):
+    """Prepara una subida directa al storage (sin pasar bytes por el worker)."""
+    data = request.get_json() or {}
+    filename = (data.get('filename') or '').strip()
+    content_type = (data.get('content_type') or '').strip() or None
+    if not filename:
+        return jsonify({"error": "filename requerido"}), 400
+
+    name = unique_filename(filename)
+    if os.path.splitext(name)[1] not in allowed_ext:
+        return jsonify({"error": "Extensión no permitida"}), 400
+
+    key = "/".join(folder + (name,))
+    upload = get_storage().presign_upload(key, content_type=content_type)
+    if not upload:
+        return jsonify({"error": "El almacenamiento actual no admite subida directa"}), 501
+
+    return jsonify({"key": key, "url": rel_url(*folder, name), "upload": upload}), 200
 
 def gen_slide_key() -> str:
     rnd = ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
@@ -48,53 +102,336 @@ def parse_bool(v):
         return False
     return str(v).strip().lower() in {"1", "true", "t", "yes", "y", "on"}
 
+# === SLUGS ====================================================================
+
+# slug -> (id, es_el_slug_actual). Guarda también slugs antiguos, así un enlace
+# viejo se resuelve sin tocar la tabla de redirecciones. Cada entrada se
+# comprueba contra la fila al usarla (la trae igualmente el detalle), de modo
+# que un renombrado hecho en otro worker solo cuesta una consulta de más; y
+# además se vacía con cada cambio de generación de contenido (content_version).
+_slug_ids = {}
+SLUG_CACHE_MAX = 4096
+on_change(_slug_ids.clear)
+
+def forget_slugs(*slugs):
+    for slug in slugs:
+        _slug_ids.pop(slug, None)
+
+def _remember_slug(slug, category_id, current):
+    if len(_slug_ids) >= SLUG_CACHE_MAX:
+        _slug_ids.clear()
+    _slug_ids[slug] = (category_id, current)
+
+def resolve_slug(slug):
+    """-> Category para un slug actual o antiguo (None si no existe)."""
+    cached = _slug_ids.get(slug)
+    if cached:
+        category_id, current = cached
+        category = db.session.get(Category, category_id)
+        # Un slug antiguo nunca se reutiliza para otra categoría del mismo
+        # usuario (unique_slug lo evita), así que basta con que la fila exista
+        if category is not None and (category.slug == slug or not current):
+            return category
+        forget_slugs(slug)
+
+    category = Category.query.filter_by(slug=slug).order_by(Category.id).first()
+    if category is not None:
+        _remember_slug(slug, category.id, True)
+        return category
+
+    redirect_row = CategorySlugRedirect.query.filter_by(slug=slug) \
+        .order_by(CategorySlugRedirect.id.desc()).first()
+    if redirect_row is None:
+        return None
+    _remember_slug(slug, redirect_row.category_id, False)
+    return db.session.get(Category, redirect_row.category_id)
+
+def rename_category(category, name):
+    """Cambia el nombre y el slug; el slug anterior queda como redirección."""
+    old_slug = category.slug
+    category.name = name
+    new_slug = unique_slug(db.session.connection(), category.user_id, slugify(name), category.id)
+    if new_slug == old_slug:
+        return
+
+    # Si vuelve a un slug que ya tuvo, esa redirección sobra
+    CategorySlugRedirect.query.filter_by(user_id=category.user_id, slug=new_slug).delete()
+    if old_slug:
+        db.session.add(CategorySlugRedirect(slug=old_slug, category_id=category.id, user_id=category.user_id))
+    category.slug = new_slug
+    forget_slugs(old_slug, new_slug)
+
+# === PAGINACIÓN KEYSET ========================================================
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 200
+
+class BadCursor(ValueError):
+    pass
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise BadCursor(cursor)
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, int) for v in values):
+        raise BadCursor(cursor)
+    return values
+
+def page_args():
+    """(limit, cursor) de la query string. limit=None => sin paginar (compat)."""
+    limit = request.args.get('limit')
+    if limit is None:
+        return None, None
+    try:
+        limit = max(1, min(int(limit), MAX_PAGE_LIMIT))
+    except ValueError:
+        limit = DEFAULT_PAGE_LIMIT
+    return limit, request.args.get('cursor') or None
+
+def categories_page(query, limit, cursor):
+    """Página de categorías por (order, id); devuelve (filas, next_cursor)."""
+    if cursor:
+        order, cid = decode_cursor(cursor, 2)
+        query = query.filter(tuple_(Category.order, Category.id) > tuple_(order, cid))
+    rows = query.order_by(Category.order, Category.id).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1].order, rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+# Empates (position, id) entre tablas: las imágenes van antes que los videos
+_KIND_RANK = {"image": 0, "video": 1}
+
+def media_page(category_id, limit, cursor, where=None):
+    """Página mixta de imágenes y videos por (position, id, tipo).
+       `where(model)` añade filtros por tabla. Devuelve (items serializados, next_cursor)."""
+    after = decode_cursor(cursor, 3) if cursor else None
+    results = []
+
+    for model, kind in ((ProjectImage, "image"), (ProjectVideo, "video")):
+        q = model.query.filter(model.category_id == category_id, *(where(model) if where else ()))
+        if after:
+            pos, mid, rank = after
+            key = tuple_(model.position, model.id)
+            if _KIND_RANK[kind] > rank:
+                q = q.filter(or_(key > tuple_(pos, mid), and_(model.position == pos, model.id == mid)))
+            else:
+                q = q.filter(key > tuple_(pos, mid))
+        rows = q.order_by(model.position, model.id).limit(limit + 1).all()
+        results += [media_item(m) for m in rows]
+
+    results.sort(key=lambda x: (x["position"] or 0, x["id"], _KIND_RANK[x["type"]]))
+    page = results[:limit]
+    next_cursor = None
+    if len(results) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last["position"] or 0, last["id"], _KIND_RANK[last["type"]])
+    return page, next_cursor
+
+# === FORMATO COMPACTO (v=2) Y FIELDS ==========================================
+
+def parse_fields():
+    """?fields=url,type,... -> set de campos de media (None = todos)."""
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    return {f.strip() for f in raw.split(',') if f.strip()}
+
+def sparse(item, fields, keep=("id", "type")):
+    if fields is None:
+        return item
+    return {k: v for k, v in item.items() if k in fields or k in keep}
+
+def media_ref(item) -> str:
+    # ids de imágenes y videos pueden coincidir: la ref lleva el tipo ("i12", "v3")
+    return f"{item['type'][0]}{item['id']}"
+
+# En v2 sobran: el id va en la ref y image_url/video_url repiten `url`
+_COMPACT_SKIP = {"id", "image_url", "video_url"}
+
+def compact_item(item, fields):
+    out = {"ref": media_ref(item)}
+    for k, v in item.items():
+        if fields is None:
+            if k not in _COMPACT_SKIP:
+                out[k] = v
+        elif k in fields:
+            out[k] = v
+    return out
+
+def compact_detail(category, timeline, slides, fields, extra=None):
+    """v=2: cada media aparece UNA vez en `media`; slides y by_slide son refs."""
+    media = {}
+    for it in list(timeline) + list(slides):
+        media.setdefault(media_ref(it), compact_item(it, fields))
+
+    by_slide = {}
+    for it in timeline:
+        if not it.get("is_carousel") and it.get("slide_key"):
+            by_slide.setdefault(it["slide_key"], []).append(media_ref(it))
+
+    payload = {
+        "v": 2,
+        "id": category.id,
+        "name": category.name,
+        "slug": category.slug,
+        "description": category.description,
+        "media": list(media.values()),
+        "slides": [media_ref(it) for it in slides],
+        "by_slide": by_slide,
+    }
+    payload.update(extra or {})
+    return payload
+
+def media_item(m):
+    """Serialización de una media (imagen o video) tal como la ve el frontend."""
+    if isinstance(m, ProjectImage):
+        return {
+            "id": m.id,
+            "image_url": m.image_url,
+            "description": getattr(m, "description", None),
+            "position": m.position,
+            "is_carousel": getattr(m, "is_carousel", False),
+            "slide_key": getattr(m, "slide_key", None),
+            "type": "image",
+            "url": public_url(m.image_url),
+            "width": m.width,
+            "height": m.height,
+            "placeholder": m.placeholder,
+            "dominant_color": m.dominant_color,
+        }
+    return {
+        "id": m.id,
+        "video_url": m.video_url,
+        "description": getattr(m, "description", None),
+        "position": m.position,
+        "is_carousel": getattr(m, "is_carousel", False),
+        "slide_key": getattr(m, "slide_key", None),
+        "type": "video",
+        "url": public_url(m.video_url),
+        "width": m.width,
+        "height": m.height,
+        "duration": m.duration,
+        "codec": m.codec,
+    }
+
 # === SERVIR ARCHIVOS ==========================================================
 
 @categories_bp.route('/uploads/<path:filename>', methods=['GET'])
 def serve_uploaded_file(filename):
-    # Sirve TODO desde la carpeta UPLOADS_DIR
-    return send_from_directory(uploads_root(), filename)
+    # Sirve TODO desde el storage (disco local o redirección al bucket)
+    return get_storage().serve(filename)
 
 # === CATEGORÍAS (PÚBLICO) =====================================================
 
+def public_category_item(c):
+    """Entrada del listado público (también la usa /api/site)."""
+    return {"id": c.id, "name": c.name, "order": c.order, "slug": getattr(c, "slug", str(c.id))}
+
 @categories_bp.route('/public', methods=['GET'])
+@cached_public
 def get_public_categories():
-    categories = Category.query.order_by(Category.order).all()
-    return jsonify([
-        {"id": c.id, "name": c.name, "order": c.order, "slug": getattr(c, "slug", str(c.id))}
-        for c in categories
-    ]), 200
+    limit, cursor = page_args()
+    if limit is None:
+        categories = Category.query.order_by(Category.order).all()
+        return jsonify([public_category_item(c) for c in categories]), 200
+
+    try:
+        categories, next_cursor = categories_page(Category.query, limit, cursor)
+    except BadCursor:
+        return jsonify({"error": "cursor inválido"}), 400
+    return jsonify({
+        "items": [public_category_item(c) for c in categories],
+        "next_cursor": next_cursor,
+    }), 200
+
+# === PRELOAD DEL CARRUSEL / MANIFEST =========================================
+
+def carousel_head(category_id, n):
+    """Primeros n slides del carrusel, solo columnas: [(tipo, url, content_type)]."""
+    rows = []
+    for kind, model, url_col in (("image", ProjectImage, ProjectImage.image_url),
+                                 ("video", ProjectVideo, ProjectVideo.video_url)):
+        q = db.session.query(model.position, model.id, url_col, model.content_type) \
+            .filter(model.category_id == category_id, model.is_carousel.is_(True)) \
+            .order_by(model.position, model.id).limit(n)
+        rows += [(pos or 0, mid, _KIND_RANK[kind], kind, url, ctype) for pos, mid, url, ctype in q]
+    rows.sort()
+    return [(kind, url, ctype) for *_, kind, url, ctype in rows[:n]]
+
+def preload_links(category_id):
+    """Link rel=preload de las imágenes con las que arranca el carrusel. Los
+       videos no: los navegadores no soportan as=video y descargarían el archivo
+       entero; con faststart les basta preload="metadata" en el <video>."""
+    n = int(current_app.config.get("PRELOAD_SLIDES", 3))
+    if n <= 0:
+        return []
+    links = []
+    for kind, url, ctype in carousel_head(category_id, n):
+        if kind != "image":
+            continue
+        link = f'<{public_url(url)}>; rel=preload; as=image'
+        if ctype:
+            link += f'; type="{ctype}"'
+        links.append(link)
+    return links
+
+@categories_bp.route('/<int:category_id>/manifest', methods=['GET'])
+@cached_public
+def get_category_manifest(category_id):
+    """Media de la categoría en orden de timeline con tamaño y tipo guardados
+       al subir (sin tocar el disco), para que el cliente decida qué precargar."""
+    if not db.session.query(Category.id).filter_by(id=category_id).first():
+        return jsonify({"error": "Categoría no encontrada"}), 404
+
+    items = []
+    for kind, model, url_col in (("image", ProjectImage, ProjectImage.image_url),
+                                 ("video", ProjectVideo, ProjectVideo.video_url)):
+        q = db.session.query(model.id, model.position, model.is_carousel, model.slide_key,
+                             url_col, model.size_bytes, model.content_type) \
+            .filter(model.category_id == category_id)
+        for mid, pos, is_carousel, slide_key, url, size, ctype in q:
+            items.append({
+                "id": mid, "type": kind, "url": public_url(url),
+                "position": pos, "is_carousel": bool(is_carousel), "slide_key": slide_key,
+                "size_bytes": size, "content_type": ctype,
+            })
+    items.sort(key=lambda x: (x["position"] or 0, x["id"], _KIND_RANK[x["type"]]))
+    known = [it["size_bytes"] for it in items if it["size_bytes"] is not None]
+    return jsonify({
+        "id": category_id,
+        "items": items,
+        "total_bytes": sum(known),
+        "complete": len(known) == len(items),  # False si hay URLs externas o media antigua sin tamaño
+    }), 200
 
 @categories_bp.route('/<int:category_id>/detail', methods=['GET'])
+@cached_public
 def get_category_detail(category_id):
     category = Category.query.get_or_404(category_id)
 
-    def _img_dict(img):
-        return {
-            "id": img.id,
-            "image_url": img.image_url,
-            "description": getattr(img, "description", None),
-            "position": img.position,
-            "is_carousel": getattr(img, "is_carousel", False),
-            "slide_key": getattr(img, "slide_key", None),
-            "type": "image",
-            "url": img.image_url,
-        }
-
-    def _vid_dict(vid):
-        return {
-            "id": vid.id,
-            "video_url": vid.video_url,
-            "description": getattr(vid, "description", None),
-            "position": vid.position,
-            "is_carousel": getattr(vid, "is_carousel", False),
-            "slide_key": getattr(vid, "slide_key", None),
-            "type": "video",
-            "url": vid.video_url,
-        }
-
-    images = [_img_dict(img) for img in category.images]
-    videos = [_vid_dict(vid) for vid in category.videos]
+    limit, cursor = page_args()
+    links = [] if cursor else preload_links(category.id)
+    send_early_hints(links)
+
+    if limit is not None:
+        resp = make_response(_paginated_detail(category, limit, cursor))
+    else:
+        resp = make_response(_full_detail(category))
+    if resp.status_code == 200:
+        for link in links:
+            resp.headers.add("Link", link)
+    return resp
+
+def _full_detail(category):
+    """Detalle completo (sin ?limit): timeline, slides y by_slide de una vez."""
+    fields = parse_fields()
+    images = [media_item(img) for img in category.images]
+    videos = [media_item(vid) for vid in category.videos]
 
     all_blocks = images + videos
     all_blocks.sort(key=lambda x: (x["position"] or 0, x["id"]))
@@ -102,6 +439,9 @@ def get_category_detail(category_id):
     # Slides del carrusel
     slides = [b for b in all_blocks if b.get("is_carousel")]
 
+    if request.args.get('v') == '2':
+        return jsonify(compact_detail(category, all_blocks, slides, fields)), 200
+
     # Subcontenido agrupado por slide_key
     by_slide = {}
     for b in all_blocks:
@@ -111,9 +451,17 @@ def get_category_detail(category_id):
     for sk in by_slide:
         by_slide[sk].sort(key=lambda x: (x["position"] or 0, x["id"]))
 
+    if fields is not None:
+        images = [sparse(b, fields) for b in images]
+        videos = [sparse(b, fields) for b in videos]
+        all_blocks = [sparse(b, fields) for b in all_blocks]
+        slides = [sparse(b, fields) for b in slides]
+        by_slide = {sk: [sparse(b, fields) for b in blocks] for sk, blocks in by_slide.items()}
+
     return jsonify({
         "id": category.id,
         "name": category.name,
+        "slug": category.slug,
         "description": category.description,
         "images": images,        # compat
         "videos": videos,        # compat
@@ -122,14 +470,103 @@ def get_category_detail(category_id):
         "by_slide": by_slide,    # NUEVO: sub-bloques de cada slide
     }), 200
 
+@categories_bp.route('/by-slug/<slug>/detail', methods=['GET'])
+@cached_public
+def get_category_detail_by_slug(slug):
+    """Mismo detalle (y mismos parámetros) que /<id>/detail, direccionado por slug.
+       Los slugs antiguos responden directamente, con el canónico en las cabeceras."""
+    category = resolve_slug(slug)
+    if category is None:
+        return jsonify({"error": "Categoría no encontrada"}), 404
+
+    # Sin pasar por la caché del detalle por id: esta respuesta ya se guarda con su ruta
+    resp = make_response(get_category_detail.__wrapped__(category.id))
+    if resp.status_code == 200 and category.slug:
+        canonical = f"/api/categories/by-slug/{category.slug}/detail"
+        resp.headers.add("Link", f'<{canonical}>; rel="canonical"')
+        if category.slug != slug:
+            resp.headers["Content-Location"] = canonical
+    return resp
+
+def _paginated_detail(category, limit, cursor):
+    """?limit=N[&cursor=...]: slides completos desde el principio y el timeline
+       por páginas; el subcontenido de cada slide va por /slides/<slide_key>."""
+    try:
+        items, next_cursor = media_page(category.id, limit, cursor)
+    except BadCursor:
+        return jsonify({"error": "cursor inválido"}), 400
+
+    slides = []
+    if not cursor:
+        for model in (ProjectImage, ProjectVideo):
+            rows = model.query.filter_by(category_id=category.id, is_carousel=True) \
+                .order_by(model.position, model.id).all()
+            slides += [media_item(m) for m in rows]
+        slides.sort(key=lambda x: (x["position"] or 0, x["id"], _KIND_RANK[x["type"]]))
+
+    fields = parse_fields()
+    if request.args.get('v') == '2':
+        payload = compact_detail(category, items, slides, fields, extra={
+            "timeline": [media_ref(it) for it in items],
+            "next_cursor": next_cursor,
+        })
+        if cursor:
+            del payload["slides"]
+        return jsonify(payload), 200
+
+    payload = {
+        "id": category.id,
+        "name": category.name,
+        "slug": category.slug,
+        "description": category.description,
+        "timeline": [sparse(it, fields) for it in items],
+        "next_cursor": next_cursor,
+    }
+    if not cursor:
+        payload["slides"] = [sparse(it, fields) for it in slides]
+    return jsonify(payload), 200
+
+@categories_bp.route('/<int:category_id>/slides/<slide_key>', methods=['GET'])
+@cached_public
+def get_slide_content(category_id, slide_key):
+    """Subcontenido (no carrusel) de un slide, paginado por (position, id)."""
+    if not db.session.query(Category.id).filter_by(id=category_id).first():
+        return jsonify({"error": "Recurso no encontrado"}), 404
+
+    limit, cursor = page_args()
+    try:
+        items, next_cursor = media_page(
+            category_id, limit or MAX_PAGE_LIMIT, cursor,
+            where=lambda model: (model.slide_key == slide_key, model.is_carousel.is_(False)),
+        )
+    except BadCursor:
+        return jsonify({"error": "cursor inválido"}), 400
+    fields = parse_fields()
+    if request.args.get('v') == '2':
+        items = [compact_item(it, fields) for it in items]
+    else:
+        items = [sparse(it, fields) for it in items]
+    return jsonify({"slide_key": slide_key, "items": items, "next_cursor": next_cursor}), 200
+
 # === CATEGORÍAS (ADMIN) =======================================================
 
 @categories_bp.route('', methods=['GET'])
 @jwt_required()
 def get_categories():
     user_id = int(get_jwt_identity())
-    categories = Category.query.filter_by(user_id=user_id).order_by(Category.order).all()
-    return jsonify([{"id": c.id, "name": c.name, "order": c.order} for c in categories]), 200
+    limit, cursor = page_args()
+    if limit is None:
+        categories = Category.query.filter_by(user_id=user_id).order_by(Category.order).all()
+        return jsonify([{"id": c.id, "name": c.name, "order": c.order} for c in categories]), 200
+
+    try:
+        categories, next_cursor = categories_page(Category.query.filter_by(user_id=user_id), limit, cursor)
+    except BadCursor:
+        return jsonify({"error": "cursor inválido"}), 400
+    return jsonify({
+        "items": [{"id": c.id, "name": c.name, "order": c.order} for c in categories],
+        "next_cursor": next_cursor,
+    }), 200
 
 @categories_bp.route('', methods=['POST'])
 @jwt_required()
@@ -146,7 +583,35 @@ def create_category():
     category = Category(name=name, description=description, user_id=user_id, order=max_order + 1)
     db.session.add(category)
     db.session.commit()
-    return jsonify({"id": category.id, "name": category.name}), 201
+    return jsonify({"id": category.id, "name": category.name, "slug": category.slug}), 201
+
+@categories_bp.route('/<int:category_id>', methods=['PATCH'])
+@jwt_required()
+def update_category(category_id):
+    """Edita nombre y/o descripción. Al renombrar cambia el slug y el anterior
+       sigue resolviendo en /by-slug/<slug>/detail."""
+    user_id = int(get_jwt_identity())
+    category = Category.query.filter_by(id=category_id, user_id=user_id).first()
+    if not category:
+        return jsonify({"error": "Categoría no encontrada"}), 404
+
+    data = request.get_json() or {}
+    if 'name' in data:
+        name = (data.get('name') or '').strip()
+        if not name:
+            return jsonify({"error": "El nombre de la categoría es obligatorio"}), 400
+        if name != category.name:
+            rename_category(category, name)
+    if 'description' in data:
+        category.description = data.get('description') or ''
+
+    db.session.commit()
+    return jsonify({
+        "id": category.id,
+        "name": category.name,
+        "slug": category.slug,
+        "description": category.description,
+    }), 200
 
 # ---- REORDENAR TODAS LAS CATEGORÍAS (↑ / ↓) ---------------------------------
 
@@ -192,7 +657,6 @@ def add_media(category_id):
     """Añade UNA imagen o UN video: archivo (form-data) o url (JSON).
        Requiere type=image|video. Soporta description, position, is_carousel y slide_key."""
     user_id = int(get_jwt_identity())
-    ensure_dirs()
 
     category = Category.query.filter_by(id=category_id, user_id=user_id).first()
     if not category:
@@ -241,7 +705,7 @@ def add_media(category_id):
         f = request.files['file']
         if not f or not f.filename:
             return jsonify({"error": "Archivo vacío"}), 400
-        filename = secure_filename(f.filename)
+        filename = unique_filename(f.filename)
         ext = os.path.splitext(filename)[1].lower()
 
         if media_type == 'image' and ext not in ALLOWED_IMG:
@@ -250,15 +714,17 @@ def add_media(category_id):
             return jsonify({"error": "Video no válido"}), 400
 
         dest_rel = ("projects", "images", filename) if media_type == 'image' else ("projects", "videos", filename)
-        f.save(abs_path(*dest_rel))
-        url_rel = rel_url(*dest_rel)
+        meta = probe_upload(f, media_type)
+        url_rel = save_upload(f, *dest_rel)
+        if media_type == 'video':
+            faststart_upload(url_rel)
 
         if media_type == 'image':
             m = ProjectImage(image_url=url_rel, description=description, position=next_pos,
-                             category_id=category.id, is_carousel=is_carousel, slide_key=slide_key)
+                             category_id=category.id, is_carousel=is_carousel, slide_key=slide_key, **meta)
         else:
             m = ProjectVideo(video_url=url_rel, description=description, position=next_pos,
-                             category_id=category.id, is_carousel=is_carousel, slide_key=slide_key)
+                             category_id=category.id, is_carousel=is_carousel, slide_key=slide_key, **meta)
 
         db.session.add(m)
         db.session.commit()
@@ -269,7 +735,8 @@ def add_media(category_id):
             "description": description,
             "position": next_pos,
             "is_carousel": is_carousel,
-            "slide_key": slide_key
+            "slide_key": slide_key,
+            **meta,
         }), 201
 
     # --- B) url (JSON) ---
@@ -301,12 +768,29 @@ def add_media(category_id):
     return jsonify({"error": "Usa form-data (file) o JSON (url)"}), 415
 
 
+@categories_bp.route('/<int:category_id>/media/presign', methods=['POST'])
+@jwt_required()
+def presign_media(category_id):
+    """Subida directa al bucket: body JSON {type, filename, content_type}.
+       Devuelve la PUT prefirmada y la url /uploads/... que luego se manda a add_media (JSON)."""
+    user_id = int(get_jwt_identity())
+    category = Category.query.filter_by(id=category_id, user_id=user_id).first()
+    if not category:
+        return jsonify({"error": "Categoría no encontrada"}), 404
+
+    media_type = ((request.get_json() or {}).get('type') or '').lower()
+    if media_type == 'image':
+        return presign_media_upload(("projects", "images"), ALLOWED_IMG)
+    if media_type == 'video':
+        return presign_media_upload(("projects", "videos"), ALLOWED_VID)
+    return jsonify({"error": "type debe ser 'image' o 'video'"}), 400
+
+
 @categories_bp.route('/media/<int:media_id>', methods=['PUT'])
 @jwt_required()
 def replace_media(media_id):
     """Reemplaza UNA media por archivo (form-data) o por nueva URL (JSON).
        También permite actualizar description, position, is_carousel y slide_key."""
-    ensure_dirs()
 
     img = ProjectImage.query.get(media_id)
     vid = None if img else ProjectVideo.query.get(media_id)
@@ -323,7 +807,7 @@ def replace_media(media_id):
             f = request.files['file']
             if not f or not f.filename:
                 return jsonify({"error": "Archivo vacío"}), 400
-            filename = secure_filename(f.filename)
+            filename = unique_filename(f.filename)
             ext = os.path.splitext(filename)[1].lower()
 
             if img and ext not in ALLOWED_IMG:
@@ -331,16 +815,22 @@ def replace_media(media_id):
             if vid and ext not in ALLOWED_VID:
                 return jsonify({"error": "Video no válido"}), 400
 
+            meta = probe_upload(f, "image" if img else "video")
+            # Primero se publica el nuevo (os.replace) y después se borra el
+            # anterior, salvo que sea el mismo archivo
             if img:
-                dest_rel = ("projects", "images", filename)
-                remove_local_if_needed(img.image_url)
-                f.save(abs_path(*dest_rel))
-                img.image_url = rel_url(*dest_rel)
+                old_url = img.image_url
+                img.image_url = save_upload(f, "projects", "images", filename)
+                new_url = img.image_url
             else:
-                dest_rel = ("projects", "videos", filename)
-                remove_local_if_needed(vid.video_url)
-                f.save(abs_path(*dest_rel))
-                vid.video_url = rel_url(*dest_rel)
+                old_url = vid.video_url
+                vid.video_url = save_upload(f, "projects", "videos", filename)
+                new_url = vid.video_url
+                faststart_upload(new_url)
+            if old_url != new_url:
+                remove_local_if_needed(old_url)
+            for k, v in meta.items():
+                setattr(target, k, v)
 
             changed = True
 
@@ -396,6 +886,8 @@ def replace_media(media_id):
                 img.image_url = url
             else:
                 vid.video_url = url
+            for k in (IMAGE_META_FIELDS if img else VIDEO_META_FIELDS) + FILE_META_FIELDS:
+                setattr(target, k, None)  # eran del archivo anterior
             changed = True
 
         if description is not None:
@@ -511,6 +1003,7 @@ def delete_category(category_id):
         remove_local_if_needed(video.video_url)
         db.session.delete(video)
 
+    forget_slugs(category.slug, *(r.slug for r in category.slug_redirects))
     db.session.delete(category)
     db.session.commit()
     return jsonify({"message": "Categoría y contenido eliminados"}), 200
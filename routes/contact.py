@@ -1,14 +1,18 @@
 # routes/contact.py
 import json
 import os
+import re
 import time, random, string
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
 from models import db, ContactPage
-from routes.categories import abs_path, rel_url, ensure_dirs  # reutilizamos helpers de uploads
+from content_version import bump_on_write
+from public_cache import cached_public
+from routes.categories import save_upload, presign_media_upload, probe_upload, faststart_upload  # reutilizamos helpers de uploads
 
 contact_bp = Blueprint("contact", __name__)
+bump_on_write(contact_bp)
 
 ALLOWED_IMG = {".png", ".jpg", ".jpeg", ".webp"}
 ALLOWED_VID = {".mp4", ".webm", ".ogg"}
@@ -43,12 +47,37 @@ def _parse_blocks(s: str):
         return []
 
 
+def _positive(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool) and v > 0
+
+_COLOR_RE = re.compile(r"^#[0-9a-f]{6}$")
+
+# Metadatos de media que se conservan en los bloques, con su validación
+_BLOCK_META = {
+    "image": {
+        "width": _positive,
+        "height": _positive,
+        "placeholder": lambda v: isinstance(v, str) and v.startswith("data:image/") and len(v) <= 4096,
+        "dominant_color": lambda v: isinstance(v, str) and bool(_COLOR_RE.match(v)),
+    },
+    "video": {
+        "width": _positive,
+        "height": _positive,
+        "duration": _positive,
+        "codec": lambda v: isinstance(v, str) and len(v) <= 32,
+    },
+}
+
+
 def _safe_blocks(blocks):
     """
     Bloques válidos:
       { "type":"text",  "content":"...",                          "position": 1 }
-      { "type":"image", "url":"/uploads/...", "caption":"",       "position": 2, "in_carousel": true|false }
-      { "type":"video", "url":"https://…|/uploads/video.mp4",     "position": 3, "in_carousel": true|false }
+      { "type":"image", "url":"/uploads/...", "caption":"",       "position": 2, "in_carousel": true|false,
+        "width": 1600, "height": 900, "placeholder": "data:image/webp;base64,…", "dominant_color": "#aabbcc" }
+      { "type":"video", "url":"https://…|/uploads/video.mp4",     "position": 3, "in_carousel": true|false,
+        "width": 1920, "height": 1080, "duration": 12.5, "codec": "avc1" }
+    Los metadatos (los que devuelven /upload-image y /upload-video) son opcionales.
     """
     out = []
     for b in blocks or []:
@@ -66,6 +95,11 @@ def _safe_blocks(blocks):
             # NUEVO: flag para carrusel (por defecto False)
             item["in_carousel"] = bool(b.get("in_carousel", False))
 
+        for k, valid in _BLOCK_META.get(t, {}).items():
+            v = b.get(k)
+            if valid(v):
+                item[k] = v
+
         out.append(item)
 
     out.sort(key=lambda x: (x.get("position", 0)))
@@ -82,20 +116,19 @@ def _unique_name(filename: str) -> str:
 # Público
 # ======================================================
 
-@contact_bp.route("/public", methods=["GET"])
-def contact_public():
-    cp = ContactPage.query.order_by(ContactPage.id.asc()).first()
+def public_contact_payload(cp):
+    """Payload público de la página de contacto (también lo usa /api/site)."""
     if not cp:
-        return jsonify({
+        return {
             "title": "Contacto",
             "intro": "",
             "body": "",
             "footer_note": "",
             "hero_image_url": None,
             "blocks": []
-        }), 200
+        }
 
-    return jsonify({
+    return {
         "title": cp.title,
         "intro": cp.intro,
         "body": cp.body,
@@ -103,7 +136,14 @@ def contact_public():
         "hero_image_url": cp.hero_image_url,  # no se usa en frontend actual
         "blocks": _parse_blocks(cp.videos_json),
         "updated_at": cp.updated_at.isoformat() if getattr(cp, "updated_at", None) else None
-    }), 200
+    }
+
+
+@contact_bp.route("/public", methods=["GET"])
+@cached_public
+def contact_public():
+    cp = ContactPage.query.order_by(ContactPage.id.asc()).first()
+    return jsonify(public_contact_payload(cp)), 200
 
 
 # ======================================================
@@ -166,7 +206,6 @@ def contact_save_blocks():
 @contact_bp.route("/upload-image", methods=["POST"])
 @jwt_required()
 def upload_image():
-    ensure_dirs()
     if "file" not in request.files:
         return jsonify({"error": "Falta archivo"}), 400
 
@@ -180,16 +219,14 @@ def upload_image():
         return jsonify({"error": "Extensión de imagen no permitida"}), 400
 
     dest_rel = ("contact", "images", filename)
-    os.makedirs(abs_path(*dest_rel[:-1]), exist_ok=True)
-    f.save(abs_path(*dest_rel))
-    url_rel = rel_url(*dest_rel)
-    return jsonify({"url": url_rel}), 201
+    meta = probe_upload(f, "image")
+    url_rel = save_upload(f, *dest_rel)
+    return jsonify({"url": url_rel, **meta}), 201
 
 
 @contact_bp.route("/upload-video", methods=["POST"])
 @jwt_required()
 def upload_video():
-    ensure_dirs()
     if "file" not in request.files:
         return jsonify({"error": "Falta archivo"}), 400
 
@@ -203,7 +240,19 @@ def upload_video():
         return jsonify({"error": "Extensión de video no permitida"}), 400
 
     dest_rel = ("contact", "videos", filename)
-    os.makedirs(abs_path(*dest_rel[:-1]), exist_ok=True)
-    f.save(abs_path(*dest_rel))
-    url_rel = rel_url(*dest_rel)
-    return jsonify({"url": url_rel}), 201
+    meta = probe_upload(f)
+    url_rel = save_upload(f, *dest_rel)
+    faststart_upload(url_rel)
+    return jsonify({"url": url_rel, **meta}), 201
+
+
+@contact_bp.route("/presign", methods=["POST"])
+@jwt_required()
+def presign_upload():
+    """Subida directa al bucket: body JSON {type: image|video, filename, content_type}."""
+    media_type = ((request.get_json() or {}).get("type") or "").lower()
+    if media_type == "image":
+        return presign_media_upload(("contact", "images"), ALLOWED_IMG)
+    if media_type == "video":
+        return presign_media_upload(("contact", "videos"), ALLOWED_VID)
+    return jsonify({"error": "type debe ser 'image' o 'video'"}), 400
@@ -1,28 +1,24 @@
-from flask import Blueprint, request, jsonify, send_from_directory, current_app
+from datetime import datetime, timezone
+from flask import Blueprint, request, jsonify
+from sqlalchemy.exc import IntegrityError
 from models import User, CV, db
 from flask_jwt_extended import jwt_required, get_jwt_identity
-import os
+from storage import get_storage, key_from_url
+from content_version import bump_on_write
+from file_deletions import schedule_deletion
 
 cv_bp = Blueprint('cv', __name__)
+bump_on_write(cv_bp)
 
 # ---------------- helpers de rutas ----------------
-def uploads_root():
-    # Preferimos la config; si no existe, fallback a ./uploads
-    return current_app.config.get("UPLOADS_DIR", os.path.join(current_app.root_path, "uploads"))
-
-def cv_dir():
-    # Subcarpeta de CVs
-    return current_app.config.get("CV_DIR", os.path.join(uploads_root(), "cvs"))
+def cv_key(filename: str) -> str:
+    # key en el storage (subcarpeta de CVs)
+    return f"cvs/{filename}"
 
 def rel_url_for(filename: str) -> str:
     # lo que guarda/expone el frontend
     return f"/uploads/cvs/{filename}"
 
-def abs_path_from_rel(rel: str) -> str:
-    # convierte "/uploads/cvs/xxx.pdf" -> <ABS>/cvs/xxx.pdf
-    assert rel.startswith("/uploads/"), "se esperaba ruta /uploads/..."
-    return os.path.join(uploads_root(), rel.replace("/uploads/", ""))
-
 # ---------------- endpoints ----------------
 
 @cv_bp.route('/', methods=['POST'])
@@ -40,27 +36,29 @@ def upload_cv():
     if file.filename == '' or not file.filename.lower().endswith('.pdf'):
         return jsonify({"error": "Invalid file type. Solo PDF"}), 400
 
-    # asegurar carpeta
-    os.makedirs(cv_dir(), exist_ok=True)
+    storage = get_storage()
 
-    # si ya hay CV, lo borramos (físico + BD)
-    existing = CV.query.filter_by(user_id=user_id).first()
-    if existing and existing.file_path:
-        if existing.file_path.startswith("/uploads/"):
-            old_abs = abs_path_from_rel(existing.file_path)
-            if os.path.exists(old_abs):
-                os.remove(old_abs)
-        db.session.delete(existing)
-
-    # guardar nuevo
+    # El archivo nuevo sustituye al anterior de forma atómica (mismo nombre)
     filename = f"cv_{user_id}.pdf"
-    abs_dest = os.path.join(cv_dir(), filename)
-    file.save(abs_dest)
-
+    storage.save(file, cv_key(filename), content_type="application/pdf")
     rel = rel_url_for(filename)
-    new_cv = CV(file_path=rel, user_id=user_id)
-    db.session.add(new_cv)
-    db.session.commit()
+
+    # Una fila por usuario (UNIQUE user_id): se actualiza, no se borra y reinserta
+    existing = CV.query.filter_by(user_id=user_id).first()
+    if existing is None:
+        db.session.add(CV(file_path=rel, user_id=user_id, uploaded_at=datetime.now(timezone.utc)))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # otra subida simultánea creó la fila primero
+            db.session.rollback()
+            existing = CV.query.filter_by(user_id=user_id).one()
+    if existing is not None:
+        if existing.file_path and existing.file_path != rel:
+            schedule_deletion(existing.file_path)
+        existing.file_path = rel
+        existing.uploaded_at = datetime.now(timezone.utc)
+        db.session.commit()
 
     return jsonify({"message": "CV subido exitosamente", "cv_url": rel}), 200
 
@@ -74,8 +72,10 @@ def public_download_cv():
         return jsonify({"error": "CV no disponible"}), 404
 
     # cv.file_path es "/uploads/cvs/xxx.pdf"
-    rel = cv.file_path.replace("/uploads/", "")  # -> "cvs/xxx.pdf"
-    return send_from_directory(uploads_root(), rel, as_attachment=True)
+    key = key_from_url(cv.file_path)  # -> "cvs/xxx.pdf"
+    if not key:
+        return jsonify({"error": "CV no disponible"}), 404
+    return get_storage().serve(key, as_attachment=True)
 
 
 # Eliminar CV (cliente)
@@ -91,11 +91,7 @@ def delete_cv():
     if not cv or not cv.file_path:
         return jsonify({"error": "No CV to delete"}), 404
 
-    if cv.file_path.startswith("/uploads/"):
-        abs_p = abs_path_from_rel(cv.file_path)
-        if os.path.exists(abs_p):
-            os.remove(abs_p)
-
+    schedule_deletion(cv.file_path)
     db.session.delete(cv)
     db.session.commit()
     return jsonify({"message": "CV eliminado correctamente"}), 200
@@ -1,7 +1,12 @@
 # backend/messages.py
 from flask import Blueprint, request, jsonify, current_app
-import html, re, smtplib, ssl
-from email.message import EmailMessage
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError, OperationalError
+from datetime import datetime, timedelta, timezone
+from models import Message, MessageDedup, User, db
+from routes.categories import BadCursor, DEFAULT_PAGE_LIMIT, decode_cursor, encode_cursor, page_args
+import hashlib, html, re
 
 messages_bp = Blueprint('messages', __name__)
 
@@ -13,8 +18,49 @@ def sanitize_text(s: str, maxlen: int = 5000) -> str:
     s = s[:maxlen]
     return html.escape(s)
 
+# --- Envíos repetidos (doble clic, reintentos, bots) ---
+def dedup_key(email: str, content: str) -> str:
+    normalized = " ".join(content.split()).casefold()
+    return hashlib.sha256(f"{email.strip().casefold()}\0{normalized}".encode()).hexdigest()
+
+def claim_submission(key: str) -> bool:
+    """True si es el primer envío en la ventana; False si es un repetido.
+       El INSERT sobre la PK decide, así dos workers no envían los dos."""
+    window = int(current_app.config.get("MESSAGE_DEDUP_SECONDS", 600))
+    if window <= 0:
+        return True
+    now = datetime.now(timezone.utc)
+    try:
+        MessageDedup.query.filter(MessageDedup.expires_at < now).delete(synchronize_session=False)
+        db.session.add(MessageDedup(key=key, expires_at=now + timedelta(seconds=window)))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    except OperationalError:
+        # BD bloqueada/caída: sin dedup antes que perder el mensaje. Se libera
+        # por si el COMMIT llegó a aplicarse antes del error
+        db.session.rollback()
+        current_app.logger.warning("Dedup de mensajes no disponible", exc_info=True)
+        release_submission(key)
+        return True
+
+def release_submission(key: str) -> None:
+    """Si el envío falló del todo, que el reintento del usuario sí pase."""
+    try:
+        MessageDedup.query.filter_by(key=key).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("No se pudo liberar el envío %s", key)
+
 # --- Envío de email por SMTP (Gmail con contraseña de aplicación u otro SMTP) ---
 def send_mail(subject: str, body: str, to_email: str) -> None:
+    # Imports diferidos: solo se pagan cuando alguien usa el formulario
+    import smtplib, ssl
+    from email.message import EmailMessage
+
     host = current_app.config.get("MAIL_SERVER")
     port = int(current_app.config.get("MAIL_PORT", 587))
     use_tls = bool(current_app.config.get("MAIL_USE_TLS", True))
@@ -77,13 +123,24 @@ def send_message():
         return jsonify({"error": "Todos los campos son obligatorios"}), 400
     if len(content) < 5:
         return jsonify({"error": "El mensaje es demasiado corto"}), 400
-    if not EMAIL_RE.match(email):
+    if not EMAIL_RE.match(email) or len(email) > 100:
         return jsonify({"error": "Email no válido"}), 400
 
+    # Repetido dentro de la ventana: mismo acuse, sin guardar ni enviar otra vez
+    key = dedup_key(email, content)
+    if not claim_submission(key):
+        return jsonify({"message": "Mensaje recibido", "duplicate": True}), 200
+
+    # Guardar en la bandeja antes del SMTP: si el correo falla, el mensaje no se pierde
+    stored = store_message(name, last_name, email, content)
+
     # Preparar correo
     dest = current_app.config.get("CONTACT_DEST_EMAIL")
     if not dest:
         current_app.logger.error("CONTACT_DEST_EMAIL no configurado")
+        if stored:
+            return jsonify({"message": "Mensaje recibido", "email_sent": False}), 202
+        release_submission(key)
         return jsonify({"error": "Destino de contacto no configurado"}), 500
 
     subject = f"Nuevo mensaje del portfolio: {name} {last_name}"
@@ -99,5 +156,130 @@ def send_message():
         return jsonify({"message": "Mensaje recibido", "email_sent": True}), 201
     except Exception:
         current_app.logger.exception("Fallo enviando email")
-        # A tu elección: puedes responder 500 o 202 aceptado sin email.
+        # Ya está en la bandeja: aceptado aunque no haya email
+        if stored:
+            return jsonify({"message": "Mensaje recibido", "email_sent": False}), 202
+        release_submission(key)
         return jsonify({"error": "No se pudo enviar el email", "email_sent": False}), 500
+
+def store_message(name, last_name, email, content) -> bool:
+    """Guarda el mensaje para el dueño del portfolio (el primer usuario)."""
+    owner_id = db.session.query(User.id).order_by(User.id).limit(1).scalar()
+    if owner_id is None:
+        current_app.logger.warning("Mensaje no guardado: no hay ningún usuario")
+        return False
+    try:
+        db.session.add(Message(
+            name=name[:100], last_name=last_name[:100], email=email,
+            content=content, is_read=False, user_id=owner_id,
+        ))
+        db.session.commit()
+        return True
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("No se pudo guardar el mensaje")
+        return False
+
+# ============================
+# ADMIN: Bandeja de entrada
+# ============================
+
+_EPOCH = datetime(1970, 1, 1)
+MARK_READ_MAX_IDS = 1000
+_NO_DATE = -1  # cursor de una fila sin created_at (filas antiguas con NULL)
+
+def _ts(dt) -> int:
+    # microsegundos: el cursor solo lleva enteros
+    if dt is None:
+        return _NO_DATE
+    return (dt.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+
+def _message_item(m):
+    return {
+        "id": m.id,
+        "name": m.name,
+        "last_name": m.last_name,
+        "email": m.email,
+        "content": m.content,
+        "created_at": m.created_at.isoformat() if m.created_at else None,
+        "is_read": bool(m.is_read),
+    }
+
+def unread_count(user_id) -> int:
+    return db.session.query(db.func.count(Message.id)) \
+        .filter(Message.user_id == user_id, Message.is_read == False).scalar()  # noqa: E712
+
+@messages_bp.route('', methods=['GET'])
+@messages_bp.route('/', methods=['GET'])
+@jwt_required()
+def list_messages():
+    """Bandeja, del más reciente al más antiguo.
+       ?limit=N (máx. 200) &cursor=... &unread=1 para ver solo los no leídos."""
+    user_id = int(get_jwt_identity())
+    limit, _ = page_args()
+    limit = limit or DEFAULT_PAGE_LIMIT
+    cursor = request.args.get('cursor') or None  # siempre paginada, aunque falte limit
+
+    query = Message.query.filter(Message.user_id == user_id)
+    if request.args.get('unread') in {"1", "true"}:
+        query = query.filter(Message.is_read == False)  # noqa: E712
+    # Las filas sin created_at van al final, detrás de todas las fechadas
+    undated = query.filter(Message.created_at.is_(None))
+    if cursor:
+        try:
+            ts, mid = decode_cursor(cursor, 2)
+        except BadCursor:
+            return jsonify({"error": "cursor inválido"}), 400
+        if ts == _NO_DATE:
+            query, undated = None, undated.filter(Message.id < mid)
+        else:
+            created = _EPOCH + timedelta(microseconds=ts)
+            query = query.filter(tuple_(Message.created_at, Message.id) < tuple_(created, mid))
+
+    rows = []
+    if query is not None:
+        rows = query.order_by(Message.created_at.desc().nulls_last(), Message.id.desc()) \
+            .limit(limit + 1).all()
+    if cursor and len(rows) <= limit:
+        # el rango (created_at, id) < cursor excluye los NULL: se añaden aparte
+        rows += undated.order_by(Message.id.desc()).limit(limit + 1 - len(rows)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(_ts(last.created_at), last.id)
+
+    return jsonify({
+        "items": [_message_item(m) for m in rows[:limit]],
+        "next_cursor": next_cursor,
+        "unread": unread_count(user_id),
+    }), 200
+
+@messages_bp.route('/unread-count', methods=['GET'])
+@jwt_required()
+def get_unread_count():
+    return jsonify({"unread": unread_count(int(get_jwt_identity()))}), 200
+
+@messages_bp.route('/read', methods=['PATCH'])
+@jwt_required()
+def mark_read():
+    """Marca en bloque, con un solo UPDATE.
+       Body JSON: { "ids": [1, 2, ...] } (máx. 1000) o { "all": true }; "is_read": false para desmarcar."""
+    user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    is_read = data.get('is_read', True)
+    if not isinstance(is_read, bool):
+        return jsonify({"error": "is_read debe ser true o false"}), 400
+
+    query = Message.query.filter(Message.user_id == user_id, Message.is_read != is_read)
+    if data.get('all') is not True:
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not ids \
+                or not all(isinstance(x, int) and not isinstance(x, bool) for x in ids):
+            return jsonify({"error": "ids debe ser un array de enteros (o all: true)"}), 400
+        if len(ids) > MARK_READ_MAX_IDS:
+            return jsonify({"error": f"Máximo {MARK_READ_MAX_IDS} ids por petición (o all: true)"}), 400
+        query = query.filter(Message.id.in_(ids))
+
+    updated = query.update({Message.is_read: is_read}, synchronize_session=False)
+    db.session.commit()
+    return jsonify({"updated": updated, "unread": unread_count(user_id)}), 200
@@ -0,0 +1,71 @@
+# routes/portfolio.py
+import tarfile
+from datetime import datetime, timezone
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db
+from content_version import bump_on_write
+from portfolio_archive import ArchiveError, archive_plan, archive_size, build_manifest, import_archive, iter_archive
+from routes.categories import parse_bool
+from storage import get_storage
+
+portfolio_bp = Blueprint("portfolio", __name__)
+bump_on_write(portfolio_bp)
+
+
+# ======================================================
+# Admin: copia completa del portfolio (ver portfolio_archive.py)
+# ======================================================
+
+@portfolio_bp.route("/export", methods=["GET"])
+@jwt_required()
+def export_portfolio():
+    """
+    GET /api/portfolio/export -> tar con manifest.json + files/<key>.
+    Se genera mientras se envía; la memoria no depende del tamaño de /uploads.
+    """
+    user_id = int(get_jwt_identity())
+    plan = archive_plan(build_manifest(user_id))
+    name = f"portfolio-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.tar"
+    return Response(
+        iter_archive(plan, get_storage()),
+        mimetype="application/x-tar",
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}"',
+            "Content-Length": str(archive_size(plan)),
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+@portfolio_bp.route("/import", methods=["POST"])
+@jwt_required()
+def import_portfolio():
+    """
+    POST /api/portfolio/import[?replace=1]
+    Cuerpo: el tar tal cual (application/x-tar) o multipart con campo "file".
+    replace=1 borra antes las categorías existentes; redes, contacto y CV se
+    sobrescriben siempre con los del archivo.
+    """
+    user_id = int(get_jwt_identity())
+    request.max_content_length = current_app.config["PORTFOLIO_IMPORT_MAX_BYTES"]
+    replace = parse_bool(request.args.get("replace"))
+
+    if request.mimetype == "multipart/form-data":
+        if "file" not in request.files:
+            return jsonify({"error": "No file provided"}), 400
+        stream = request.files["file"].stream
+    else:
+        stream = request.stream
+
+    try:
+        stats = import_archive(stream, user_id, replace)
+    except ArchiveError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except tarfile.TarError:
+        db.session.rollback()
+        return jsonify({"error": "Archivo tar no válido o incompleto"}), 400
+
+    return jsonify({"message": "Portfolio importado", **stats}), 200
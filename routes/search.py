@@ -0,0 +1,38 @@
+# routes/search.py
+from flask import Blueprint, request, jsonify
+from models import db
+from search_index import search
+
+search_bp = Blueprint("search", __name__)
+
+MAX_LIMIT = 50
+MAX_OFFSET = 1000
+
+
+# ======================================================
+# Público: búsqueda por texto (categorías y descripciones de media)
+# ======================================================
+
+@search_bp.route("", methods=["GET"])
+@search_bp.route("/", methods=["GET"])
+def search_public():
+    """
+    GET /api/search?q=robot arm&limit=20&offset=0
+    Cada palabra se busca como prefijo ("rob" encuentra "robot"), ordenado por relevancia.
+    """
+    q = (request.args.get("q") or "").strip()
+    try:
+        limit = max(1, min(int(request.args.get("limit", 20)), MAX_LIMIT))
+        offset = max(0, min(int(request.args.get("offset", 0)), MAX_OFFSET))
+    except ValueError:
+        return jsonify({"error": "limit y offset deben ser enteros"}), 400
+
+    if not q:
+        return jsonify({"q": q, "items": [], "next_offset": None}), 200
+
+    hits = search(db.session.connection(), q, limit=limit + 1, offset=offset)
+    return jsonify({
+        "q": q,
+        "items": hits[:limit],
+        "next_offset": offset + limit if len(hits) > limit else None,
+    }), 200
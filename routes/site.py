@@ -0,0 +1,58 @@
+# routes/site.py
+import hashlib
+import json
+from flask import Blueprint, request, current_app
+from models import db, Category, SocialLink, ContactPage, CV
+from public_cache import cached_public
+from routes.categories import public_category_item
+from routes.contact import public_contact_payload
+from routes.socials import ALLOWED as SOCIAL_PLATFORMS, public_socials_payload
+
+site_bp = Blueprint("site", __name__)
+
+
+# ======================================================
+# Público: arranque del frontend en una sola petición
+# ======================================================
+
+@site_bp.route("", methods=["GET"])
+@site_bp.route("/", methods=["GET"])
+@cached_public
+def site_bootstrap():
+    """
+    Devuelve de una vez lo que el frontend pide en el primer render:
+    categorías, redes, página de contacto y disponibilidad/versión del CV.
+    Cuatro SELECT de solo columnas (sin cargar relaciones) y un ETag común.
+    """
+    categories = db.session.query(
+        Category.id, Category.name, Category.order, Category.slug
+    ).order_by(Category.order).all()
+
+    socials = db.session.query(
+        SocialLink.platform, SocialLink.url
+    ).filter(SocialLink.platform.in_(SOCIAL_PLATFORMS)).all()
+
+    cp = ContactPage.query.order_by(ContactPage.id.asc()).first()
+
+    cv = db.session.query(CV.file_path, CV.uploaded_at).order_by(CV.id.asc()).first()
+    cv_available = bool(cv and cv.file_path)
+
+    payload = {
+        "categories": [public_category_item(c) for c in categories],
+        "socials": public_socials_payload(socials),
+        "contact": public_contact_payload(cp),
+        "cv": {
+            "available": cv_available,
+            "url": "/api/cv/download" if cv_available else None,
+            "version": cv.uploaded_at.isoformat() if cv_available and cv.uploaded_at else None,
+        },
+    }
+
+    # ETag combinado: hash del documento completo, así cambia si cambia cualquier parte
+    body = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    etag = hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+    resp = current_app.response_class(body, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"  # revalida siempre con If-None-Match
+    return resp.make_conditional(request)
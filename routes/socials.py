@@ -2,8 +2,11 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, SocialLink
+from content_version import bump_on_write
+from public_cache import cached_public
 
 socials_bp = Blueprint("socials", __name__)
+bump_on_write(socials_bp)
 ALLOWED = {"linkedin", "artstation"}
 
 def normalize_url(u: str) -> str:
@@ -14,14 +17,19 @@ def normalize_url(u: str) -> str:
         u = "https://" + u
     return u
 
-@socials_bp.get("/public")
-def socials_public():
-    rows = SocialLink.query.filter(SocialLink.platform.in_(ALLOWED)).all()
+def public_socials_payload(rows):
+    """Payload público de redes (también lo usa /api/site)."""
     data = {s.platform: {"platform": s.platform, "url": s.url} for s in rows}
-    return jsonify({
+    return {
         "linkedin": data.get("linkedin"),
         "artstation": data.get("artstation"),
-    }), 200
+    }
+
+@socials_bp.get("/public")
+@cached_public
+def socials_public():
+    rows = SocialLink.query.filter(SocialLink.platform.in_(ALLOWED)).all()
+    return jsonify(public_socials_payload(rows)), 200
 
 @socials_bp.route("", methods=["POST"])
 @socials_bp.route("/", methods=["POST"])
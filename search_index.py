@@ -0,0 +1,235 @@
+# search_index.py
+"""
+Índice de búsqueda (SQLite FTS5) sobre Category.name/description y las
+descripciones de ProjectImage/ProjectVideo.
+
+- La tabla virtual `search_index` y los triggers que la mantienen al día los
+  crea la migración; `ensure_search_index` hace lo mismo para bases creadas
+  sin migraciones (y lo usa el benchmark).
+- rowid = id * 4 + tipo, así insertar/borrar un documento es por clave
+  primaria y no un recorrido de la tabla FTS.
+- Fuera de SQLite (o sin FTS5) se cae a un LIKE, que es también la línea
+  base del benchmark.
+"""
+import re
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import text
+
+from content_version import bump
+
+KIND_CODES = {"category": 0, "image": 1, "video": 2}
+KINDS = {v: k for k, v in KIND_CODES.items()}
+
+FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        title, body, category_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+    # --- categorías ---
+    """CREATE TRIGGER IF NOT EXISTS search_category_ai AFTER INSERT ON category BEGIN
+        INSERT INTO search_index(rowid, title, body, category_id)
+        VALUES (new.id * 4 + 0, new.name, coalesce(new.description, ''), new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_category_au AFTER UPDATE OF name, description ON category BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 0;
+        INSERT INTO search_index(rowid, title, body, category_id)
+        VALUES (new.id * 4 + 0, new.name, coalesce(new.description, ''), new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_category_ad AFTER DELETE ON category BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 0;
+    END""",
+    # --- imágenes ---
+    """CREATE TRIGGER IF NOT EXISTS search_image_ai AFTER INSERT ON project_image
+    WHEN coalesce(new.description, '') <> '' BEGIN
+        INSERT INTO search_index(rowid, title, body, category_id)
+        VALUES (new.id * 4 + 1, '', new.description, new.category_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_image_au AFTER UPDATE OF description, category_id ON project_image BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+        INSERT INTO search_index(rowid, title, body, category_id)
+        SELECT new.id * 4 + 1, '', new.description, new.category_id
+        WHERE coalesce(new.description, '') <> '';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_image_ad AFTER DELETE ON project_image BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+    END""",
+    # --- videos ---
+    """CREATE TRIGGER IF NOT EXISTS search_video_ai AFTER INSERT ON project_video
+    WHEN coalesce(new.description, '') <> '' BEGIN
+        INSERT INTO search_index(rowid, title, body, category_id)
+        VALUES (new.id * 4 + 2, '', new.description, new.category_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_video_au AFTER UPDATE OF description, category_id ON project_video BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+        INSERT INTO search_index(rowid, title, body, category_id)
+        SELECT new.id * 4 + 2, '', new.description, new.category_id
+        WHERE coalesce(new.description, '') <> '';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_video_ad AFTER DELETE ON project_video BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+    END""",
+)
+
+REBUILD_SQL = (
+    "DELETE FROM search_index",
+    """INSERT INTO search_index(rowid, title, body, category_id)
+       SELECT id * 4 + 0, name, coalesce(description, ''), id FROM category""",
+    """INSERT INTO search_index(rowid, title, body, category_id)
+       SELECT id * 4 + 1, '', description, category_id FROM project_image
+       WHERE coalesce(description, '') <> ''""",
+    """INSERT INTO search_index(rowid, title, body, category_id)
+       SELECT id * 4 + 2, '', description, category_id FROM project_video
+       WHERE coalesce(description, '') <> ''""",
+)
+
+
+def ensure_search_index(conn, rebuild=True):
+    for stmt in FTS_DDL:
+        conn.exec_driver_sql(stmt)
+    if rebuild:
+        for stmt in REBUILD_SQL:
+            conn.exec_driver_sql(stmt)
+
+
+FTS_RECHECK_SECONDS = 30
+_fts_by_url = {}  # url -> True, o instante (monotonic) hasta el que se da por ausente
+
+def fts_available(conn) -> bool:
+    """¿Existe search_index en esta BD? Un sí vale para todo el proceso; un no
+       se vuelve a comprobar pasados FTS_RECHECK_SECONDS (la migración o
+       search-rebuild pueden crear la tabla con el worker ya arrancado)."""
+    if conn.dialect.name != "sqlite":
+        return False
+    url = str(conn.engine.url)
+    cached = _fts_by_url.get(url)
+    if cached is True:
+        return True
+    if cached is not None and time.monotonic() < cached:
+        return False
+    row = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+    )).first()
+    _fts_by_url[url] = True if row is not None else time.monotonic() + FTS_RECHECK_SECONDS
+    return row is not None
+
+
+# ======================================================
+# Consultas
+# ======================================================
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def query_terms(q: str, max_terms: int = 8):
+    return _TOKEN_RE.findall(q or "")[:max_terms]
+
+
+def to_match_expr(terms) -> str:
+    # Cada término entre comillas (sin sintaxis FTS del usuario) y como prefijo
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def _hit(row):
+    kind = KINDS[row.rowid % 4]
+    return {
+        "type": kind,
+        "id": row.rowid // 4,
+        "category_id": row.category_id,
+        "category_name": row.category_name,
+        "category_slug": row.category_slug,
+        "snippet": row.snippet,
+    }
+
+
+def fts_search(conn, terms, limit, offset):
+    """Resultados ordenados por bm25 (el título pesa 10x la descripción).
+       Primero se ordena solo por rank y después se generan los snippets de
+       la página: así no se calcula un snippet por cada coincidencia."""
+    match = to_match_expr(terms)
+    page = conn.execute(text("""
+        SELECT rowid FROM search_index
+        WHERE search_index MATCH :match AND rank MATCH 'bm25(10.0, 1.0)'
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+    """), {"match": match, "limit": limit, "offset": offset}).scalars().all()
+    if not page:
+        return []
+
+    params = {"match": match}
+    params.update({f"r{i}": rowid for i, rowid in enumerate(page)})
+    in_list = ", ".join(f":r{i}" for i in range(len(page)))
+    rows = conn.execute(text(f"""
+        SELECT s.rowid AS rowid, s.category_id AS category_id,
+               c.name AS category_name, c.slug AS category_slug,
+               snippet(search_index, 1, '<mark>', '</mark>', '…', 12) AS snippet
+        FROM search_index s
+        JOIN category c ON c.id = s.category_id
+        WHERE search_index MATCH :match AND s.rowid IN ({in_list})
+    """), params).all()
+
+    by_rowid = {r.rowid: r for r in rows}
+    return [_hit(by_rowid[rowid]) for rowid in page if rowid in by_rowid]
+
+
+def like_search(conn, terms, limit, offset):
+    """Búsqueda ingenua con LIKE (fallback y línea base del benchmark)."""
+    params = {"limit": limit, "offset": offset}
+    conds = {"c": [], "m": []}
+    for i, t in enumerate(terms):
+        params[f"t{i}"] = f"%{t}%"
+        conds["c"].append(f"(c.name LIKE :t{i} OR coalesce(c.description, '') LIKE :t{i})")
+        conds["m"].append(f"m.description LIKE :t{i}")
+    where_c = " AND ".join(conds["c"]) or "1 = 0"
+    where_m = " AND ".join(conds["m"]) or "1 = 0"
+
+    rows = conn.execute(text(f"""
+        SELECT * FROM (
+            SELECT c.id * 4 + 0 AS rowid, c.id AS category_id, c.name AS category_name,
+                   c.slug AS category_slug, substr(coalesce(c.description, ''), 1, 120) AS snippet,
+                   0 AS grp
+            FROM category c WHERE {where_c}
+            UNION ALL
+            SELECT m.id * 4 + 1, c.id, c.name, c.slug, substr(m.description, 1, 120), 1
+            FROM project_image m JOIN category c ON c.id = m.category_id WHERE {where_m}
+            UNION ALL
+            SELECT m.id * 4 + 2, c.id, c.name, c.slug, substr(m.description, 1, 120), 1
+            FROM project_video m JOIN category c ON c.id = m.category_id WHERE {where_m}
+        )
+        ORDER BY grp, rowid
+        LIMIT :limit OFFSET :offset
+    """), params).all()
+    return [_hit(r) for r in rows]
+
+
+def search(conn, q, limit=20, offset=0):
+    terms = query_terms(q)
+    if not terms:
+        return []
+    if fts_available(conn):
+        return fts_search(conn, terms, limit, offset)
+    return like_search(conn, terms, limit, offset)
+
+
+# ======================================================
+# CLI: flask search-rebuild
+# ======================================================
+
+
+@click.command("search-rebuild")
+@with_appcontext
+def search_rebuild_command():
+    """Crea (si falta) y repuebla el índice FTS5 desde las tablas."""
+    from extensions import db
+
+    with db.engine.begin() as conn:
+        if conn.dialect.name != "sqlite":
+            raise click.ClickException("El índice FTS5 solo existe con SQLite")
+        ensure_search_index(conn)
+    _fts_by_url.clear()
+    bump(current_app)  # los workers vacían sus cachés públicas
+    click.echo("Índice de búsqueda reconstruido")
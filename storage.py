@@ -0,0 +1,303 @@
+# storage.py
+"""
+Backends de almacenamiento para /uploads.
+
+Las filas siguen guardando URLs "/uploads/<key>"; la key es la ruta relativa
+("projects/images/foo.png") y el backend decide dónde viven los bytes:
+
+- LocalStorage: disco bajo UPLOADS_DIR (comportamiento de siempre). Las
+  subidas multipart se vuelcan directamente a UPLOADS_DIR/.tmp (mismo
+  sistema de archivos, ver SpoolingRequest) y se publican con os.replace:
+  sin segunda copia y sin archivos a medio escribir en /uploads.
+- S3Storage: bucket S3-compatible (AWS, MinIO, R2...). Las descargas se
+  redirigen a una URL pública o prefirmada y las subidas pueden hacerse
+  directamente al bucket con una PUT prefirmada, así los bytes no pasan
+  por los workers de Python. boto3 solo hace falta con este backend.
+"""
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+
+from flask import Request, abort, current_app, redirect, send_from_directory
+from werkzeug.security import safe_join
+
+UPLOADS_PREFIX = "/uploads/"
+SPOOL_DIR = ".tmp"  # oculta: no se sirve ni es contenido; el GC barre lo abandonado
+FILE_MODE = 0o644  # los temporales se crean con 0600
+
+
+def key_from_url(url):
+    """'/uploads/projects/images/a.png' -> 'projects/images/a.png' (None si no es
+    nuestro). Es la puerta de todos los backends: una key con segmentos vacíos,
+    '.' o '..' (p. ej. '/uploads/../x') no es válida."""
+    if not url or not url.startswith(UPLOADS_PREFIX):
+        return None
+    key = url[len(UPLOADS_PREFIX):].split("?", 1)[0].strip("/")
+    if not key or "\\" in key or any(p in ("", ".", "..") for p in key.split("/")):
+        return None
+    return key
+
+
+def url_for_key(key):
+    return UPLOADS_PREFIX + key
+
+
+def is_hidden_key(key):
+    """True si algún segmento empieza por punto (.tmp, estado interno...): en
+    UPLOADS_DIR eso no es contenido publicado y no se sirve."""
+    return any(p.startswith(".") for p in key.replace("\\", "/").split("/"))
+
+
+class Storage(ABC):
+    """Interfaz común. `fileobj` puede ser un FileStorage o cualquier stream binario.
+       Un backend incompleto falla al instanciarse (create_app), no en la primera petición."""
+
+    @abstractmethod
+    def save(self, fileobj, key, content_type=None): ...
+
+    @abstractmethod
+    def open(self, key): ...
+
+    @abstractmethod
+    def delete(self, key): ...
+
+    @abstractmethod
+    def exists(self, key): ...
+
+    @abstractmethod
+    def size(self, key):
+        """Tamaño en bytes, o None si no existe."""
+
+    def direct_url(self, key):
+        """URL pública estable fuera de nuestro servidor, o None."""
+        return None
+
+    def presign_upload(self, key, content_type=None):
+        """Datos para subir directamente al backend, o None si no se soporta."""
+        return None
+
+    @abstractmethod
+    def serve(self, key, as_attachment=False, download_name=None): ...
+
+
+# ======================================================
+# Disco local
+# ======================================================
+
+class LocalStorage(Storage):
+    def __init__(self, root):
+        self.root = root
+        self.spool_path = os.path.join(root, SPOOL_DIR)
+
+    def path(self, key):
+        path = safe_join(self.root, key)
+        if path is None:
+            raise ValueError(f"Key fuera de UPLOADS_DIR: {key!r}")
+        return path
+
+    def spool_file(self):
+        """Temporal con nombre donde Werkzeug escribe una parte de archivo."""
+        os.makedirs(self.spool_path, exist_ok=True)
+        return tempfile.NamedTemporaryFile("wb+", dir=self.spool_path, prefix="upload-", delete=False)
+
+    def save(self, fileobj, key, content_type=None):
+        dest = self.path(key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        stream = getattr(fileobj, "stream", fileobj)
+
+        # Subida ya volcada en .tmp: se publica moviéndola, sin copiar bytes
+        spooled = getattr(stream, "name", None)
+        if isinstance(spooled, str) and os.path.dirname(spooled) == self.spool_path \
+                and os.path.exists(spooled):
+            stream.flush()
+            os.chmod(spooled, FILE_MODE)
+            os.replace(spooled, dest)
+            return
+
+        # Cualquier otro stream: copia a un temporal junto al destino y os.replace
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), prefix=f".{os.path.basename(dest)}.", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(stream, out, 1024 * 1024)
+            os.chmod(tmp, FILE_MODE)
+            os.replace(tmp, dest)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def open(self, key):
+        return open(self.path(key), "rb")
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError):
+            current_app.logger.warning("No se pudo borrar %s", key)
+
+    def exists(self, key):
+        try:
+            return os.path.isfile(self.path(key))
+        except ValueError:
+            return False
+
+    def size(self, key):
+        try:
+            return os.path.getsize(self.path(key))
+        except (OSError, ValueError):
+            return None
+
+    def serve(self, key, as_attachment=False, download_name=None):
+        if is_hidden_key(key):
+            abort(404)
+        return send_from_directory(self.root, key, as_attachment=as_attachment,
+                                   download_name=download_name)
+
+
+# ======================================================
+# S3-compatible
+# ======================================================
+
+class S3Storage(Storage):
+    def __init__(self, bucket, prefix="", endpoint_url=None, region=None,
+                 public_base_url=None, presign_expires=3600):
+        import boto3  # opcional: solo con STORAGE_BACKEND=s3
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.public_base_url = (public_base_url or "").rstrip("/") or None
+        self.presign_expires = presign_expires
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def _object_key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def save(self, fileobj, key, content_type=None):
+        stream = getattr(fileobj, "stream", fileobj)
+        extra = {"ContentType": content_type} if content_type else None
+        # upload_fileobj sube por partes: no carga el archivo entero en memoria
+        self.client.upload_fileobj(stream, self.bucket, self._object_key(key), ExtraArgs=extra)
+
+    def open(self, key):
+        obj = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        return obj["Body"]
+
+    def delete(self, key):
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        except Exception:
+            current_app.logger.warning("No se pudo borrar s3://%s/%s", self.bucket, key)
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except Exception:
+            return False
+
+    def size(self, key):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))["ContentLength"]
+        except Exception:
+            return None
+
+    def direct_url(self, key):
+        if self.public_base_url:
+            return f"{self.public_base_url}/{self._object_key(key)}"
+        return None
+
+    def download_url(self, key, as_attachment=False, download_name=None):
+        if not as_attachment:
+            url = self.direct_url(key)
+            if url:
+                return url
+        params = {"Bucket": self.bucket, "Key": self._object_key(key)}
+        if as_attachment:
+            name = download_name or key.rsplit("/", 1)[-1]
+            params["ResponseContentDisposition"] = f'attachment; filename="{name}"'
+        return self.client.generate_presigned_url(
+            "get_object", Params=params, ExpiresIn=self.presign_expires
+        )
+
+    def presign_upload(self, key, content_type=None):
+        params = {"Bucket": self.bucket, "Key": self._object_key(key)}
+        headers = {}
+        if content_type:
+            params["ContentType"] = content_type
+            headers["Content-Type"] = content_type
+        url = self.client.generate_presigned_url(
+            "put_object", Params=params, ExpiresIn=self.presign_expires
+        )
+        return {"method": "PUT", "url": url, "headers": headers}
+
+    def serve(self, key, as_attachment=False, download_name=None):
+        return redirect(self.download_url(key, as_attachment, download_name), code=302)
+
+
+# ======================================================
+# Request que vuelca las subidas junto a UPLOADS_DIR
+# ======================================================
+
+class SpoolingRequest(Request):
+    """Con storage local, cada archivo de un multipart se escribe en
+       UPLOADS_DIR/.tmp en vez de en /tmp (o en memoria), para que
+       LocalStorage.save pueda publicarlo con un rename. Lo que no se llegue
+       a guardar se borra al cerrar la petición."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        storage = current_app.extensions.get("storage")
+        if not isinstance(storage, LocalStorage):
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        f = storage.spool_file()
+        self.__dict__.setdefault("_spooled_paths", []).append(f.name)
+        return f
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            for path in self.__dict__.pop("_spooled_paths", ()):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # ya publicado con os.replace
+
+
+# ======================================================
+# Registro en la app
+# ======================================================
+
+def init_storage(app):
+    cfg = app.config
+    backend = (cfg.get("STORAGE_BACKEND") or "local").lower()
+    if backend == "s3":
+        storage = S3Storage(
+            bucket=cfg["S3_BUCKET"],
+            prefix=cfg.get("S3_PREFIX", ""),
+            endpoint_url=cfg.get("S3_ENDPOINT_URL"),
+            region=cfg.get("S3_REGION"),
+            public_base_url=cfg.get("S3_PUBLIC_BASE_URL"),
+            presign_expires=int(cfg.get("S3_PRESIGN_EXPIRES", 3600)),
+        )
+    else:
+        storage = LocalStorage(cfg["UPLOADS_DIR"])
+        app.request_class = SpoolingRequest
+    app.extensions["storage"] = storage
+    return storage
+
+
+def get_storage() -> Storage:
+    return current_app.extensions["storage"]
+
+
+def public_url(url):
+    """URL que ve el cliente: directa al bucket si existe, si no la de siempre."""
+    key = key_from_url(url)
+    if not key:
+        return url
+    return get_storage().direct_url(key) or url
@@ -0,0 +1,146 @@
+# token_revocation.py
+"""
+Revocación de tokens JWT sin consultar la BD en cada petición.
+
+- Cada token lleva "ver" = User.token_version al emitirse. Subir la versión
+  (cambio de contraseña, "cerrar todas las sesiones", flask revoke-tokens)
+  invalida de golpe todos los tokens anteriores de ese usuario.
+- Un token suelto (logout) se revoca por su jti: fila RevokedToken hasta que
+  caduca.
+- Cada proceso guarda en memoria {user_id: versión} y el set de jti
+  revocados: comprobar un token es un par de búsquedas O(1).
+- Sincronización entre workers como content_version.py: revocar sube la
+  generación de TOKEN_REVOCATION_FILE (temporal + os.replace) y cada
+  petición compara su os.stat con la última vista. Solo cuando cambia (o
+  pasan TOKEN_REVOCATION_REFRESH segundos, por si el archivo no es común a
+  todos los hosts) se recarga el estado con dos consultas pequeñas.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import click
+from flask import current_app, jsonify
+from flask.cli import with_appcontext
+from flask_jwt_extended import create_access_token, decode_token
+
+from content_version import bump_file, file_token
+from models import db, User, RevokedToken
+
+_UNSET = object()
+_state = {"token": _UNSET, "loaded_at": 0.0, "versions": {}, "jtis": frozenset()}
+_lock = threading.Lock()
+
+
+def issue_token(user) -> str:
+    return create_access_token(identity=str(user.id),  # JWT necesita string
+                               additional_claims={"ver": user.token_version or 0})
+
+
+# ======================================================
+# Estado en memoria
+# ======================================================
+
+def _load():
+    now = datetime.now(timezone.utc).replace(tzinfo=None)  # SQLite guarda fechas naive (UTC)
+    versions = dict(db.session.query(User.id, User.token_version))
+    jtis = frozenset(jti for (jti,) in db.session.query(RevokedToken.jti).filter(RevokedToken.expires_at > now))
+    return versions, jtis
+
+
+def _refresh(app):
+    token = file_token(app.config["TOKEN_REVOCATION_FILE"])
+    max_age = float(app.config.get("TOKEN_REVOCATION_REFRESH", 60))
+    if token == _state["token"] and time.monotonic() - _state["loaded_at"] < max_age:
+        return
+    with _lock:
+        if token == _state["token"] and time.monotonic() - _state["loaded_at"] < max_age:
+            return
+        # token leído antes de consultar: una revocación posterior vuelve a cambiarlo
+        versions, jtis = _load()
+        _state.update(token=token, loaded_at=time.monotonic(), versions=versions, jtis=jtis)
+
+
+def is_revoked(payload, app=None) -> bool:
+    app = app or current_app
+    _refresh(app)
+    if payload.get("jti") in _state["jtis"]:
+        return True
+    try:
+        user_id = int(payload["sub"])
+    except (KeyError, TypeError, ValueError):
+        return True
+    current = _state["versions"].get(user_id)
+    return current is not None and payload.get("ver", 0) < current
+
+
+def _notify(app=None):
+    app = app or current_app
+    with _lock:
+        bump_file(app.config["TOKEN_REVOCATION_FILE"])
+    _refresh(app)  # este worker ya no acepta el token revocado
+
+
+# ======================================================
+# Revocar
+# ======================================================
+
+def revoke_user_tokens(user, commit=True):
+    """Invalida todos los tokens emitidos hasta ahora para `user`."""
+    user.token_version = (user.token_version or 0) + 1
+    if commit:
+        db.session.commit()
+        _notify()
+
+
+def revoke_token(payload):
+    """Revoca un token concreto (su jti) hasta que caduque."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    RevokedToken.query.filter(RevokedToken.expires_at <= now).delete(synchronize_session=False)
+    db.session.merge(RevokedToken(
+        jti=payload["jti"],
+        user_id=int(payload["sub"]),
+        expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None),
+    ))
+    db.session.commit()
+    _notify()
+
+
+def init_token_revocation(app):
+    app.config.setdefault(
+        "TOKEN_REVOCATION_FILE", os.path.join(app.root_path, ".token_revocation")
+    )
+    jwt = app.extensions["flask-jwt-extended"]
+
+    @jwt.token_in_blocklist_loader
+    def _token_revoked(jwt_header, jwt_payload):
+        return is_revoked(jwt_payload, app)
+
+    @jwt.revoked_token_loader
+    def _revoked_response(jwt_header, jwt_payload):
+        return jsonify({"error": "Sesión cerrada o caducada, vuelve a iniciar sesión"}), 401
+
+
+# ======================================================
+# CLI: flask revoke-tokens
+# ======================================================
+
+@click.command("revoke-tokens")
+@click.option("--user-id", type=int, help="Solo ese usuario (por defecto, todos)")
+@click.option("--token", help="Revoca solo este token (p. ej. uno filtrado)")
+@with_appcontext
+def revoke_tokens_command(user_id, token):
+    """Invalida tokens emitidos: todos, los de un usuario o uno concreto."""
+    if token:
+        revoke_token(decode_token(token, allow_expired=True))
+        click.echo("Token revocado")
+        return
+    users = [db.session.get(User, user_id)] if user_id else User.query.all()
+    if not users or users[0] is None:
+        raise click.ClickException("Usuario no encontrado")
+    for user in users:
+        revoke_user_tokens(user, commit=False)
+    db.session.commit()
+    _notify()
+    click.echo(f"Tokens revocados para {len(users)} usuario(s)")
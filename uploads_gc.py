@@ -0,0 +1,285 @@
+# uploads_gc.py
+"""
+Reconciliación de /uploads: detecta y borra archivos que ya no referencia
+ninguna fila (media de proyectos, CV, bloques/hero de la página de contacto).
+
+- El índice de referencias se construye en cada ejecución (son pocas filas).
+- El árbol de uploads se recorre de forma incremental: si el mtime de una
+  carpeta no ha cambiado desde la última pasada, se reutiliza su listado
+  guardado en el fichero de estado en lugar de volver a listarla.
+- Un archivo huérfano solo se borra cuando lleva más de `grace` segundos
+  sin referencias y sin modificarse (protege subidas aún sin commit).
+- dry_run=True solo informa y no borra nada; el estado (listados y fecha
+  en que se vio cada huérfano) sí se guarda, así la gracia empieza a contar.
+- Temporales: lo que dejan a medias un worker muerto (partes volcadas en
+  .tmp/, '.<nombre>.*.part' de LocalStorage.save, '.<nombre>.faststart') se
+  borra cuando lleva `UPLOADS_GC_TEMP_SECONDS` sin modificarse.
+"""
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from models import db, ProjectImage, ProjectVideo, CV, ContactPage
+from storage import SPOOL_DIR
+
+STATE_VERSION = 2  # v2: los listados guardan también los temporales
+TEMP_SUFFIXES = (".part", ".faststart")
+
+
+class UploadsGCError(ValueError):
+    pass
+
+
+# ======================================================
+# Índice de referencias
+# ======================================================
+
+def _rel_from_url(url):
+    """'/uploads/a/b.png' (o 'https://host/uploads/a/b.png') -> 'a/b.png'."""
+    if not url:
+        return None
+    path = urlparse(url).path or ""
+    if not path.startswith("/uploads/"):
+        return None
+    rel = path[len("/uploads/"):].strip("/")
+    return rel or None
+
+
+def build_reference_index():
+    refs = set()
+
+    for (url,) in db.session.query(ProjectImage.image_url):
+        refs.add(_rel_from_url(url))
+    for (url,) in db.session.query(ProjectVideo.video_url):
+        refs.add(_rel_from_url(url))
+    for (path,) in db.session.query(CV.file_path):
+        refs.add(_rel_from_url(path))
+
+    for hero, blocks_json in db.session.query(ContactPage.hero_image_url, ContactPage.videos_json):
+        refs.add(_rel_from_url(hero))
+        try:
+            blocks = json.loads(blocks_json or "[]")
+        except Exception:
+            blocks = []
+        for b in blocks if isinstance(blocks, list) else []:
+            if isinstance(b, dict):
+                refs.add(_rel_from_url(b.get("url")))
+
+    refs.discard(None)
+    return refs
+
+
+# ======================================================
+# Recorrido incremental del árbol
+# ======================================================
+
+def _load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            state = json.load(fh)
+        if state.get("version") == STATE_VERSION:
+            return state
+    except (OSError, ValueError):
+        pass
+    return {"version": STATE_VERSION, "dirs": {}, "orphans": {}}
+
+
+def _save_state(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh)
+    os.replace(tmp, path)
+
+
+def _is_temp(name):
+    return name.startswith(".") and name.endswith(TEMP_SUFFIXES)
+
+
+def _scan_tree(root, old_dirs, stats):
+    """Devuelve ({rel_dir: entrada}, [rel_file, ...], [rel_temp, ...])
+       reutilizando carpetas sin cambios."""
+    new_dirs = {}
+    files = []
+    temps = []
+    pending = [""]
+
+    while pending:
+        rel_dir = pending.pop()
+        full_dir = os.path.join(root, rel_dir) if rel_dir else root
+        try:
+            mtime_ns = os.stat(full_dir).st_mtime_ns
+        except FileNotFoundError:
+            continue
+
+        cached = old_dirs.get(rel_dir)
+        if cached and cached.get("mtime_ns") == mtime_ns:
+            entry = cached
+            stats["dirs_reused"] += 1
+        else:
+            entry = {"mtime_ns": mtime_ns, "files": [], "subdirs": [], "temps": []}
+            with os.scandir(full_dir) as it:
+                for de in it:
+                    if de.name.startswith("."):
+                        # .tmp/ se barre aparte; el resto de ocultos no es contenido
+                        if _is_temp(de.name) and de.is_file(follow_symlinks=False):
+                            entry["temps"].append(de.name)
+                        continue
+                    if de.is_dir(follow_symlinks=False):
+                        entry["subdirs"].append(de.name)
+                    elif de.is_file(follow_symlinks=False):
+                        entry["files"].append(de.name)
+            stats["dirs_scanned"] += 1
+
+        new_dirs[rel_dir] = entry
+        for name in entry["files"]:
+            files.append(f"{rel_dir}/{name}" if rel_dir else name)
+        for name in entry["subdirs"]:
+            pending.append(f"{rel_dir}/{name}" if rel_dir else name)
+        for name in entry["temps"]:
+            temps.append(f"{rel_dir}/{name}" if rel_dir else name)
+
+    # Partes volcadas por SpoolingRequest: una carpeta plana
+    spool = os.path.join(root, SPOOL_DIR)
+    if os.path.isdir(spool):
+        with os.scandir(spool) as it:
+            temps.extend(f"{SPOOL_DIR}/{de.name}" for de in it if de.is_file(follow_symlinks=False))
+
+    return new_dirs, files, temps
+
+
+def _sweep_temps(root, temps, max_age, now, dry_run, report):
+    """Temporales abandonados: sin tocar desde hace `max_age` segundos."""
+    for rel in temps:
+        full = os.path.join(root, rel)
+        try:
+            st = os.stat(full)
+        except FileNotFoundError:
+            continue  # publicado o limpiado mientras tanto
+        age = now - st.st_mtime
+        if age < max_age:
+            continue  # subida o reescritura en curso
+        report["temps"].append({"path": f"/uploads/{rel}", "size": st.st_size, "age_seconds": int(age)})
+        report["reclaimed_bytes"] += st.st_size
+        if not dry_run:
+            try:
+                os.remove(full)
+                report["deleted"] += 1
+            except OSError:
+                current_app.logger.warning("GC uploads: no se pudo borrar %s", full)
+
+
+# ======================================================
+# Reconciliación
+# ======================================================
+
+def reconcile_uploads(dry_run=True, grace=None, now=None):
+    cfg = current_app.config
+    root = cfg["UPLOADS_DIR"]
+    grace = cfg.get("UPLOADS_GC_GRACE_SECONDS", 24 * 3600) if grace is None else grace
+    temp_age = cfg.get("UPLOADS_GC_TEMP_SECONDS", 6 * 3600)
+    state_path = cfg.get("UPLOADS_GC_STATE") or os.path.join(current_app.root_path, ".uploads_gc_state.json")
+    now = time.time() if now is None else now
+
+    report = {
+        "dry_run": dry_run,
+        "grace_seconds": grace,
+        "dirs_scanned": 0,
+        "dirs_reused": 0,
+        "files": 0,
+        "referenced": 0,
+        "orphans": [],
+        "temps": [],
+        "deleted": 0,
+        "reclaimed_bytes": 0,
+    }
+    if (cfg.get("STORAGE_BACKEND") or "local").lower() != "local":
+        raise UploadsGCError("uploads-gc solo recorre el backend de storage local")
+    if not os.path.isdir(root):
+        return report
+
+    state = _load_state(state_path)
+    refs = build_reference_index()
+    dirs, files, temps = _scan_tree(root, state["dirs"], report)
+    report["files"] = len(files)
+
+    old_orphans = state["orphans"]
+    orphans = {}
+    for rel in files:
+        if rel in refs:
+            report["referenced"] += 1
+            continue
+
+        first_seen = old_orphans.get(rel, now)
+        full = os.path.join(root, rel)
+        try:
+            st = os.stat(full)  # solo huérfanos: el mtime real, no el cacheado
+        except FileNotFoundError:
+            continue
+
+        age = now - max(first_seen, st.st_mtime)
+        reclaim = age >= grace
+        report["orphans"].append({
+            "path": f"/uploads/{rel}",
+            "size": st.st_size,
+            "age_seconds": int(age),
+            "action": "delete" if reclaim else "grace",
+        })
+
+        if reclaim:
+            report["reclaimed_bytes"] += st.st_size
+            if not dry_run:
+                try:
+                    os.remove(full)
+                    report["deleted"] += 1
+                    continue
+                except OSError:
+                    current_app.logger.warning("GC uploads: no se pudo borrar %s", full)
+        orphans[rel] = first_seen
+
+    _sweep_temps(root, temps, temp_age, now, dry_run, report)
+
+    state["dirs"] = dirs
+    state["orphans"] = orphans
+    _save_state(state_path, state)
+
+    return report
+
+
+# ======================================================
+# CLI: flask uploads-gc [--apply] [--grace-hours N]
+# ======================================================
+
+@click.command("uploads-gc")
+@click.option("--apply", "apply_", is_flag=True, help="Borra de verdad (por defecto dry-run).")
+@click.option("--grace-hours", type=float, default=None, help="Periodo de gracia para huérfanos.")
+@click.option("--json", "as_json", is_flag=True, help="Informe en JSON.")
+@with_appcontext
+def uploads_gc_command(apply_, grace_hours, as_json):
+    """Reconciliación de archivos subidos sin referencias."""
+    grace = None if grace_hours is None else int(grace_hours * 3600)
+    try:
+        report = reconcile_uploads(dry_run=not apply_, grace=grace)
+    except UploadsGCError as e:
+        raise click.ClickException(str(e))
+
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+
+    for o in report["orphans"]:
+        click.echo(f"{o['action']:6} {o['size']:>12}  {o['age_seconds']:>8}s  {o['path']}")
+    for t in report["temps"]:
+        click.echo(f"{'temp':6} {t['size']:>12}  {t['age_seconds']:>8}s  {t['path']}")
+    click.echo(
+        f"{'DRY-RUN ' if report['dry_run'] else ''}"
+        f"carpetas: {report['dirs_scanned']} listadas / {report['dirs_reused']} reutilizadas, "
+        f"archivos: {report['files']}, referenciados: {report['referenced']}, "
+        f"huérfanos: {len(report['orphans'])}, temporales: {len(report['temps'])}, "
+        f"borrados: {report['deleted']}, "
+        f"bytes recuperables: {report['reclaimed_bytes']}"
+    )
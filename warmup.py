@@ -0,0 +1,89 @@
+# warmup.py
+"""
+Calentamiento de cada worker tras el fork (gunicorn post_fork, lifespan ASGI
+o `python app.py`): abre conexiones del pool y hace una pasada por los
+endpoints públicos para que la caché de respuestas públicas (public_cache) y
+la de variantes comprimidas ya estén llenas cuando llega el primer visitante. /api/ready devuelve 503 hasta que termina.
+"""
+import threading
+import time
+
+from sqlalchemy import text
+
+from extensions import db
+
+PUBLIC_PATHS = (
+    "/api/site",
+    "/api/categories/public",
+    "/api/socials/public",
+    "/api/contact/public",
+)
+
+
+def init_warmup(app):
+    app.extensions["warmup"] = {"status": "pending", "seconds": None, "error": None}
+
+
+def _prime_connections(app, n):
+    # Varias conexiones a la vez para que el pool no las abra bajo carga
+    with app.app_context():
+        conns = []
+        try:
+            for _ in range(max(1, n)):
+                conn = db.engine.connect()
+                conn.execute(text("SELECT 1"))
+                conns.append(conn)
+        finally:
+            for conn in conns:
+                conn.close()
+
+
+def _prime_public_responses(app):
+    from models import Category
+
+    with app.app_context():
+        rows = db.session.query(Category.id, Category.slug).all()
+        db.session.remove()
+
+    paths = list(PUBLIC_PATHS)
+    for cid, slug in rows:
+        paths.append(f"/api/categories/{cid}/detail")
+        if slug:
+            paths.append(f"/api/categories/by-slug/{slug}/detail")
+    client = app.test_client()
+    for path in paths:
+        # una pasada por codificación: deja en caché br y gzip
+        for encoding in ("br", "gzip"):
+            client.get(path, headers={"Accept-Encoding": encoding})
+
+
+def warm_up(app):
+    state = app.extensions["warmup"]
+    state.update(status="running", error=None)
+    t0 = time.perf_counter()
+    try:
+        _prime_connections(app, int(app.config.get("WARMUP_CONNECTIONS", 2)))
+        _prime_public_responses(app)
+    except Exception as e:
+        app.logger.exception("Warm-up fallido")
+        state.update(status="failed", error=str(e))
+        return
+    state.update(status="ready", seconds=round(time.perf_counter() - t0, 3))
+
+
+def start_warm_up(app, background=True):
+    state = app.extensions["warmup"]
+    if state["status"] == "running":
+        return
+    if not app.config.get("WARMUP_ENABLED", True):
+        state["status"] = "ready"
+        return
+    if background:
+        state["status"] = "running"
+        threading.Thread(target=warm_up, args=(app,), name="warmup", daemon=True).start()
+    else:
+        warm_up(app)
+
+
+def is_ready(app):
+    return app.extensions["warmup"]["status"] == "ready"